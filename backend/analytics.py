@@ -0,0 +1,138 @@
+import logging
+import os
+from urllib.parse import unquote
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_ID = "overview"
+
+# All overview figures in one pass over the posts collection
+OVERVIEW_PIPELINE = [
+    {"$facet": {
+        "totals": [
+            {"$group": {
+                "_id": None,
+                "total_posts": {"$sum": 1},
+                "total_videos": {"$sum": {"$cond": [{"$eq": ["$media.type", "video"]}, 1, 0]}},
+                "total_likes": {"$sum": "$likes"},
+                "total_comments": {"$sum": "$comments"},
+                "total_shares": {"$sum": "$shares"}
+            }}
+        ],
+        "platforms": [{"$group": {"_id": "$platform", "count": {"$sum": 1}}}],
+        "categories": [{"$group": {"_id": "$category", "count": {"$sum": 1}}}]
+    }}
+]
+
+TOTAL_FIELDS = ("total_posts", "total_videos", "total_likes", "total_comments", "total_shares")
+
+# Post field -> per-value count map stored in the snapshot
+BREAKDOWN_FIELDS = {"platform": "platforms", "category": "categories"}
+
+
+def _breakdown_key(value: str) -> str:
+    """Percent-encode a platform/category so it is a single, valid field name ('.' and '$' are not)"""
+    return str(value).replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def _breakdown_counts(stored: Dict) -> Dict[str, int]:
+    """Decode a stored breakdown map back to the original values"""
+    return {unquote(key): count for key, count in (stored or {}).items()}
+
+
+class AnalyticsSnapshot:
+    """Materialized analytics overview.
+
+    The dashboard reads a single precomputed document from
+    ``analytics_snapshots``. Newly ingested posts and counter clicks are
+    applied to it with $inc; engagement refreshes of already stored posts
+    are not tracked individually, so the snapshot is rebuilt with the
+    $facet pipeline once it is older than ``max_age`` seconds.
+    """
+
+    def __init__(self, db, max_age: Optional[float] = None):
+        self.posts = db.posts
+        self.snapshots = db.analytics_snapshots
+        self.max_age = max_age or float(os.getenv('ANALYTICS_SNAPSHOT_MAX_AGE', '900'))
+
+    async def compute(self) -> Dict:
+        """Aggregate the overview straight from the posts collection, in stored form"""
+        result = await self.posts.aggregate(OVERVIEW_PIPELINE).to_list(1)
+        facets = result[0] if result else {}
+        totals = (facets.get("totals") or [{}])[0]
+
+        return {
+            **{field: totals.get(field, 0) for field in TOTAL_FIELDS},
+            "platforms": {_breakdown_key(stat["_id"]): stat["count"] for stat in facets.get("platforms", []) if stat["_id"]},
+            "categories": {_breakdown_key(stat["_id"]): stat["count"] for stat in facets.get("categories", []) if stat["_id"]}
+        }
+
+    async def refresh(self) -> Dict:
+        """Recompute the snapshot and store it"""
+        overview = await self.compute()
+        await self.snapshots.replace_one(
+            {"_id": SNAPSHOT_ID},
+            {**overview, "computed_at": datetime.now(timezone.utc)},
+            upsert=True
+        )
+        logger.info(f"Analytics snapshot refreshed: {overview['total_posts']} posts")
+        return overview
+
+    def _age(self, snapshot: Dict) -> float:
+        computed_at = snapshot.get("computed_at")
+        if not isinstance(computed_at, datetime):
+            return float("inf")
+        if computed_at.tzinfo is None:
+            computed_at = computed_at.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - computed_at).total_seconds()
+
+    async def refresh_if_stale(self):
+        snapshot = await self.snapshots.find_one({"_id": SNAPSHOT_ID}, {"computed_at": 1})
+        if not snapshot or self._age(snapshot) > self.max_age:
+            await self.refresh()
+
+    async def overview(self) -> Dict:
+        """
+        Current overview in the /api/analytics/overview response shape
+
+        Falls back to computing (and storing) the snapshot if none exists yet.
+        """
+        snapshot = await self.snapshots.find_one({"_id": SNAPSHOT_ID}, {"_id": 0, "computed_at": 0})
+        if not snapshot:
+            snapshot = await self.refresh()
+
+        return {
+            "total_posts": snapshot.get("total_posts", 0),
+            "total_videos": snapshot.get("total_videos", 0),
+            "total_images": snapshot.get("total_posts", 0) - snapshot.get("total_videos", 0),
+            "total_likes": snapshot.get("total_likes", 0),
+            "total_comments": snapshot.get("total_comments", 0),
+            "total_shares": snapshot.get("total_shares", 0),
+            "platforms": _breakdown_counts(snapshot.get("platforms")),
+            "categories": _breakdown_counts(snapshot.get("categories"))
+        }
+
+    async def record_inserted(self, posts: List[Dict]):
+        """Fold newly inserted posts into the snapshot"""
+        if not posts:
+            return
+
+        increments: Dict[str, int] = {"total_posts": len(posts)}
+        for post in posts:
+            for field in ("likes", "comments", "shares"):
+                increments[f"total_{field}"] = increments.get(f"total_{field}", 0) + (post.get(field) or 0)
+            if (post.get("media") or {}).get("type") == "video":
+                increments["total_videos"] = increments.get("total_videos", 0) + 1
+            for field, breakdown in BREAKDOWN_FIELDS.items():
+                if post.get(field):
+                    key = f"{breakdown}.{_breakdown_key(post[field])}"
+                    increments[key] = increments.get(key, 0) + 1
+
+        # No upsert: a missing snapshot is built in full on the next read
+        await self.snapshots.update_one({"_id": SNAPSHOT_ID}, {"$inc": increments})
+
+    async def record_counter(self, field: str, delta: int = 1):
+        """Apply a like/comment/share increment to the snapshot totals"""
+        await self.snapshots.update_one({"_id": SNAPSHOT_ID}, {"$inc": {f"total_{field}": delta}})
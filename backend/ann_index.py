@@ -0,0 +1,393 @@
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from embeddings import PostEmbedder
+
+logger = logging.getLogger(__name__)
+
+# Below this many posts an exact scan is fast enough and IVF is not trained
+MIN_TRAIN_SIZE = 2000
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_SIZE = 50000
+# Rows scored per matrix product when assigning vectors to lists
+ASSIGN_CHUNK = 65536
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (by cosine) of every row, computed in chunks"""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_CHUNK):
+        chunk = np.asarray(vectors[start:start + ASSIGN_CHUNK])
+        assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+def _build_lists(assignments: np.ndarray, nlist: int) -> Dict[int, List[np.ndarray]]:
+    """Rows of every inverted list, from each row's list assignment"""
+    lists: Dict[int, List[np.ndarray]] = {}
+    order = np.argsort(assignments, kind="stable")
+    boundaries = np.searchsorted(assignments[order], np.arange(nlist + 1))
+    for list_id in range(nlist):
+        rows = order[boundaries[list_id]:boundaries[list_id + 1]]
+        if len(rows):
+            lists[list_id] = [rows.astype(np.int64)]
+    return lists
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means over a sample of the vectors"""
+    rng = np.random.default_rng(seed)
+    sample_rows = rng.choice(len(vectors), size=min(len(vectors), KMEANS_SAMPLE_SIZE), replace=False)
+    sample = np.asarray(vectors[np.sort(sample_rows)], dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+        # Empty lists are re-seeded from random sample points
+        empty = counts == 0
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = _normalize_rows(sums)
+
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file approximate nearest neighbour index over post embeddings.
+
+    Vectors are clustered with spherical k-means into ``nlist`` lists; a
+    query only scores the vectors of its ``nprobe`` closest lists. The
+    trained index is saved as .npy files and memory-mapped on startup, so
+    the corpus does not have to fit in RAM. Posts ingested afterwards go to
+    an in-memory tail (assigned to their nearest list) until the next save.
+
+    Saves and loads hold a lock file in the index directory, so several
+    processes sharing the directory never see a mix of two saves. Training
+    and saving (``maintain``) are meant to run in one process at a time;
+    the others pick up its files with ``reload_if_changed``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        embedder: Optional[PostEmbedder] = None,
+        nprobe: Optional[int] = None,
+        save_every: Optional[int] = None
+    ):
+        self.path = Path(path or os.getenv('ANN_INDEX_DIR', str(Path(__file__).parent / 'data' / 'ann')))
+        self.embedder = embedder or PostEmbedder()
+        self.nprobe = nprobe or int(os.getenv('ANN_NPROBE', '16'))
+        self.save_every = save_every or int(os.getenv('ANN_SAVE_EVERY', '5000'))
+        self.ready = False
+
+        self.base = np.zeros((0, self.embedder.dim), dtype=np.float32)  # memory-mapped once saved
+        self.tail: List[np.ndarray] = []
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: Dict[int, List[np.ndarray]] = {}
+        self._lock = asyncio.Lock()
+        self._loaded_version: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ---- persistence -------------------------------------------------
+
+    def _files(self) -> Dict[str, Path]:
+        return {
+            "vectors": self.path / "vectors.npy",
+            "assignments": self.path / "assignments.npy",
+            "centroids": self.path / "centroids.npy",
+            "ids": self.path / "ids.json",
+        }
+
+    @contextlib.contextmanager
+    def _file_lock(self, exclusive: bool):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def load(self) -> bool:
+        """Memory-map a previously saved index; returns False if there is none"""
+        files = self._files()
+        if not files["vectors"].exists() or not files["ids"].exists():
+            return False
+
+        with self._file_lock(exclusive=False):
+            vectors = np.load(files["vectors"], mmap_mode="r")
+            if vectors.shape[1] != self.embedder.dim:
+                logger.warning(f"ANN index at {self.path} has dim {vectors.shape[1]}, expected {self.embedder.dim}; rebuilding")
+                return False
+            version = files["ids"].stat().st_mtime_ns
+            ids = json.loads(files["ids"].read_text())
+            centroids = np.load(files["centroids"]) if files["centroids"].exists() else None
+            assignments = np.load(files["assignments"]) if centroids is not None and files["assignments"].exists() else None
+
+        self.base = vectors
+        self.tail = []
+        self.ids = ids
+        self.rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self.centroids = centroids
+        self.lists = _build_lists(assignments, len(centroids)) if assignments is not None else {}
+        self._loaded_version = version
+        logger.info(f"Loaded ANN index from {self.path}: {len(self)} vectors, {len(self.lists)} lists")
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """
+        Re-open the saved index if another process saved a newer one
+
+        Posts of the in-memory tail that the new files do not contain are
+        appended again. Returns True if the index was reloaded.
+        """
+        ids_file = self._files()["ids"]
+        if self._lock.locked() or not ids_file.exists() or ids_file.stat().st_mtime_ns == self._loaded_version:
+            return False
+
+        base_size = len(self.base)
+        pending = list(zip(self.ids[base_size:], self.tail))
+        if not self.load():
+            return False
+        for doc_id, vector in pending:
+            if doc_id not in self.rows:
+                self._append(doc_id, vector)
+        return True
+
+    def _temporary(self, file: Path) -> Path:
+        """Unique temporary file next to ``file`` (np.save appends .npy unless the name ends with it)"""
+        descriptor, name = tempfile.mkstemp(dir=self.path, prefix=f".{file.stem}.", suffix=file.suffix)
+        os.close(descriptor)
+        return Path(name)
+
+    def _save_sync(self, count: int, base: np.ndarray, tail: List[np.ndarray], ids: List[str], centroids: Optional[np.ndarray]):
+        self.path.mkdir(parents=True, exist_ok=True)
+        files = self._files()
+        names = ["vectors", "ids"] + (["centroids", "assignments"] if centroids is not None else [])
+
+        # Write to temporary files first so a crash never leaves a half-written index
+        temporary = {name: self._temporary(files[name]) for name in names}
+        try:
+            vectors = np.lib.format.open_memmap(temporary["vectors"], mode="w+", dtype=np.float32, shape=(count, self.embedder.dim))
+            base_size = len(base)
+            for start in range(0, base_size, ASSIGN_CHUNK):
+                end = min(start + ASSIGN_CHUNK, base_size)
+                vectors[start:end] = base[start:end]
+            if tail:
+                vectors[base_size:count] = np.stack(tail)
+            vectors.flush()
+
+            if centroids is not None:
+                np.save(temporary["centroids"], centroids)
+                np.save(temporary["assignments"], _assign(vectors, centroids))
+            temporary["ids"].write_text(json.dumps(ids))
+            del vectors
+
+            with self._file_lock(exclusive=True):
+                for name, file in temporary.items():
+                    os.replace(file, files[name])
+                if centroids is None:
+                    # An untrained save must not be paired with lists of an older one
+                    files["centroids"].unlink(missing_ok=True)
+                    files["assignments"].unlink(missing_ok=True)
+        finally:
+            for file in temporary.values():
+                file.unlink(missing_ok=True)
+
+    async def save(self):
+        """Persist base + tail and re-open the result memory-mapped"""
+        async with self._lock:
+            count = len(self.ids)
+            base_size = len(self.base)
+            await asyncio.to_thread(
+                self._save_sync, count, self.base, self.tail[:count - base_size], self.ids[:count], self.centroids
+            )
+
+            # Posts added while the files were written stay in the tail
+            pending_ids, pending_tail = self.ids[count:], self.tail[count - base_size:]
+            self.load()
+            for doc_id, vector in zip(pending_ids, pending_tail):
+                self._append(doc_id, vector)
+
+    # ---- building ----------------------------------------------------
+
+    @staticmethod
+    def _train_sync(base: np.ndarray, tail: List[np.ndarray]) -> Tuple[np.ndarray, Dict[int, List[np.ndarray]]]:
+        """Centroids and inverted lists for a snapshot of the vectors (runs in a worker thread)"""
+        vectors = np.concatenate([np.asarray(base), np.stack(tail)]) if tail else np.asarray(base)
+        nlist = int(min(4096, max(16, 4 * np.sqrt(len(vectors)))))
+        centroids = train_centroids(vectors, nlist)
+        lists = _build_lists(_assign(vectors, centroids), nlist)
+        logger.info(f"Trained ANN index: {len(vectors)} vectors in {nlist} lists")
+        return centroids, lists
+
+    async def _train(self):
+        """Cluster the current vectors (caller holds the lock); searches use the old state until the swap"""
+        count = len(self.ids)
+        base_size = len(self.base)
+        centroids, lists = await asyncio.to_thread(self._train_sync, self.base, self.tail[:count - base_size])
+
+        # Swapped in on the event loop; rows appended during training are assigned here
+        for row in range(count, len(self.ids)):
+            list_id = int(np.argmax(centroids @ self._vector(row)))
+            lists.setdefault(list_id, []).append(np.array([row], dtype=np.int64))
+        self.centroids, self.lists = centroids, lists
+
+    def add(self, post: Dict):
+        """Embed and append a post (ignored if already indexed)"""
+        doc_id = post.get("id")
+        if not doc_id or doc_id in self.rows:
+            return
+        self._append(doc_id, self.embedder.embed(post))
+
+    def _append(self, doc_id: str, vector: np.ndarray):
+        # The vector goes in before the id: rankings running in worker threads may read both
+        row = len(self.ids)
+        self.tail.append(vector)
+        self.ids.append(doc_id)
+        self.rows[doc_id] = row
+        if self.centroids is not None:
+            list_id = int(np.argmax(self.centroids @ vector))
+            self.lists.setdefault(list_id, []).append(np.array([row], dtype=np.int64))
+
+    def add_many(self, posts: Iterable[Dict]):
+        for post in posts:
+            self.add(post)
+
+    async def maintain(self) -> Dict:
+        """
+        Train once the corpus is large enough and persist a grown tail
+
+        Returns:
+            Size of the index after the run (for the job status)
+        """
+        if self.centroids is None and len(self) >= MIN_TRAIN_SIZE:
+            async with self._lock:
+                # Another call may have trained the index while this one waited for the lock
+                if self.centroids is None:
+                    await self._train()
+            await self.save()
+        elif len(self.tail) >= self.save_every:
+            await self.save()
+        return {"vectors": len(self), "unsaved": len(self.tail), "lists": len(self.lists)}
+
+    async def sync(self, collection, batch_size: int = 1000):
+        """
+        Load the saved index and embed posts it does not contain yet
+
+        Only post ids are scanned; full documents are fetched for missing
+        posts. They stay in the tail until the next ``maintain`` saves them.
+        """
+        self.ready = False
+        self.load()
+
+        missing = []
+        async for doc in collection.find({}, {"_id": 0, "id": 1}).batch_size(10000):
+            if doc.get("id") and doc["id"] not in self.rows:
+                missing.append(doc["id"])
+
+        projection = {"_id": 0, "id": 1, "content": 1, "user.name": 1, "platform": 1, "category": 1}
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            self.add_many(await collection.find({"id": {"$in": batch}}, projection).to_list(len(batch)))
+
+        self.ready = True
+        logger.info(f"ANN index synced: {len(self)} vectors ({len(missing)} newly embedded)")
+
+    # ---- search ------------------------------------------------------
+
+    def _vector(self, row: int) -> np.ndarray:
+        base_size = len(self.base)
+        return np.asarray(self.base[row]) if row < base_size else self.tail[row - base_size]
+
+    def vector(self, doc_id: str) -> Optional[np.ndarray]:
+        row = self.rows.get(doc_id)
+        return self._vector(row) if row is not None else None
+
+    def _score(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        base_size = len(self.base)
+        in_base = rows < base_size
+        scores = np.empty(len(rows), dtype=np.float32)
+        if in_base.any():
+            base_rows = rows[in_base]
+            order = np.argsort(base_rows)  # sorted reads are kinder to the memory map
+            scores_base = np.empty(len(base_rows), dtype=np.float32)
+            scores_base[order] = np.asarray(self.base[base_rows[order]]) @ query
+            scores[in_base] = scores_base
+        if (~in_base).any():
+            tail_rows = rows[~in_base] - base_size
+            scores[~in_base] = np.stack([self.tail[row] for row in tail_rows]) @ query
+        return scores
+
+    def search(self, query: np.ndarray, k: int, exclude: Optional[set] = None) -> List[Tuple[str, float]]:
+        """
+        Approximate top-k posts by cosine similarity
+
+        Scans every vector while the index is untrained, otherwise only the
+        nprobe lists whose centroids are closest to the query.
+        """
+        if not len(self) or k <= 0:
+            return []
+
+        if self.centroids is None:
+            rows = np.arange(len(self), dtype=np.int64)
+        else:
+            probe = np.argsort(-(self.centroids @ query))[:self.nprobe]
+            parts = [rows for list_id in probe for rows in self.lists.get(int(list_id), [])]
+            if not parts:
+                return []
+            rows = np.concatenate(parts)
+
+        scores = self._score(rows, query)
+        exclude = exclude or set()
+        wanted = min(len(rows), k + len(exclude))
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for position in top:
+            doc_id = self.ids[rows[position]]
+            if doc_id not in exclude:
+                results.append((doc_id, float(scores[position])))
+                if len(results) == k:
+                    break
+        return results
+
+    def similar(self, post_id: str, k: int = 10, post: Optional[Dict] = None) -> List[Tuple[str, float]]:
+        """
+        Posts most similar to a given post
+
+        Args:
+            post_id: Post to find neighbours for
+            k: Number of results
+            post: Post document, used to embed posts not indexed yet
+        """
+        row = self.rows.get(post_id)
+        if row is not None:
+            query = self._vector(row)
+        elif post is not None:
+            query = self.embedder.embed(post)
+        else:
+            return []
+        return self.search(query, k, exclude={post_id})
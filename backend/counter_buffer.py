@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, Optional
+
+from pymongo import UpdateOne
+
+from engagement import counter_update_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+class CounterBuffer:
+    """Write-behind buffer for post engagement counters.
+
+    Increments are accumulated in memory per post and flushed periodically
+    as one bulk_write, so a burst of likes on a viral post costs a single
+    update instead of one per click. Pending deltas are lost if the process
+    dies before the next flush, which is why the buffer is opt-in
+    (COUNTER_WRITE_BEHIND=true).
+    """
+
+    def __init__(
+        self,
+        collection,
+        flush_interval: Optional[float] = None,
+        on_flush: Optional[Callable[[Dict[str, int]], Awaitable[None]]] = None
+    ):
+        self.collection = collection
+        self.flush_interval = flush_interval or float(os.getenv('COUNTER_FLUSH_INTERVAL', '2'))
+        self.on_flush = on_flush
+        self.pending: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, post_id: str, field: str, delta: int = 1) -> int:
+        """
+        Queue an increment
+
+        Returns:
+            Total delta now pending for this post and field
+        """
+        self.pending[post_id][field] += delta
+        return self.pending[post_id][field]
+
+    def pending_delta(self, post_id: str, field: str) -> int:
+        """Increment not yet written for a post's counter"""
+        return self.pending.get(post_id, {}).get(field, 0)
+
+    async def flush(self) -> int:
+        """
+        Write all pending increments
+
+        Returns:
+            Number of posts updated
+        """
+        if not self.pending:
+            return 0
+
+        batch, self.pending = self.pending, defaultdict(lambda: defaultdict(int))
+        operations = [
+            UpdateOne({"id": post_id}, counter_update_pipeline(dict(deltas)))
+            for post_id, deltas in batch.items()
+        ]
+
+        try:
+            result = await self.collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # Put the deltas back so they are retried on the next flush
+            for post_id, deltas in batch.items():
+                for field, delta in deltas.items():
+                    self.pending[post_id][field] += delta
+            logger.error(f"Counter flush failed, {len(batch)} posts requeued: {e}")
+            return 0
+
+        if self.on_flush:
+            # Listeners get the per-field sums that were just written, e.g. {"likes": 12}
+            totals: Dict[str, int] = defaultdict(int)
+            for deltas in batch.values():
+                for field, delta in deltas.items():
+                    totals[field] += delta
+            await self.on_flush(dict(totals))
+        return result.modified_count
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error in counter flush loop: {e}")
+
+    def start(self):
+        """Start the periodic flush loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"Counter write-behind enabled (flush every {self.flush_interval}s)")
+
+    async def stop(self):
+        """Stop the flush loop and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
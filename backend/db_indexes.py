@@ -0,0 +1,156 @@
+import logging
+from typing import Dict, List
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Platforms whose scrapers tag posts with a native "<platform>_id"
+SCRAPED_PLATFORMS = [
+    "reddit", "youtube", "twitter", "instagram", "tiktok",
+    "facebook", "threads", "snapchat", "pinterest", "linkedin"
+]
+
+
+def _platform_id_indexes() -> List[IndexModel]:
+    """
+    Unique dedupe keys for scraped posts (personalized copies are keyed per user)
+
+    The indexes are partial rather than sparse: a sparse compound index still
+    covers every post that has ``user_specific``, so posts of other platforms
+    would all collide on a null ``<platform>_id``.
+    """
+    return [
+        IndexModel(
+            [(f"{platform}_id", ASCENDING), ("user_specific", ASCENDING)],
+            name=f"posts_{platform}_id_unique",
+            unique=True,
+            partialFilterExpression={f"{platform}_id": {"$exists": True}}
+        )
+        for platform in SCRAPED_PLATFORMS
+    ]
+
+
+# Declarative registry: one entry per query shape in server.py
+INDEX_REGISTRY: Dict[str, List[IndexModel]] = {
+    "posts": [
+        # get_post, like/comment/share, favorites ($in on id)
+        IndexModel([("id", ASCENDING)], name="posts_id_unique", unique=True),
+        # get_posts feeds: keyset pagination sorts on (sort key, id)
+        IndexModel([("createdAt", DESCENDING), ("id", DESCENDING)], name="posts_createdAt_id"),
+        IndexModel([("likes", DESCENDING), ("id", DESCENDING)], name="posts_likes_id"),
+        IndexModel([("comments", DESCENDING), ("id", DESCENDING)], name="posts_comments_id"),
+        IndexModel([("engagement_score", DESCENDING), ("id", DESCENDING)], name="posts_engagement_score_id"),
+        IndexModel([("hotness", DESCENDING), ("id", DESCENDING)], name="posts_hotness_id"),
+        # get_posts with platform / category filters
+        IndexModel([("platform", ASCENDING), ("createdAt", DESCENDING), ("id", DESCENDING)], name="posts_platform_createdAt_id"),
+        IndexModel([("platform", ASCENDING), ("likes", DESCENDING), ("id", DESCENDING)], name="posts_platform_likes_id"),
+        IndexModel([("category", ASCENDING), ("createdAt", DESCENDING), ("id", DESCENDING)], name="posts_category_createdAt_id"),
+        IndexModel([("category", ASCENDING), ("engagement_score", DESCENDING), ("id", DESCENDING)], name="posts_category_engagement_score_id"),
+        # featured post and viral fallbacks sort by likes within a category
+        IndexModel([("category", ASCENDING), ("likes", DESCENDING), ("id", DESCENDING)], name="posts_category_likes_id"),
+        # analytics video count
+        IndexModel([("media.type", ASCENDING)], name="posts_media_type"),
+    ] + _platform_id_indexes(),
+    "sessions": [
+        IndexModel([("session_token", ASCENDING)], name="sessions_token_unique", unique=True),
+        # Mongo removes sessions once expires_at (a BSON date) has passed
+        IndexModel([("expires_at", ASCENDING)], name="sessions_expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "users": [
+        IndexModel([("id", ASCENDING)], name="users_id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="users_email"),
+    ],
+    "response_cache": [
+        # Shared response cache backend (RESPONSE_CACHE_BACKEND=mongo)
+        IndexModel([("expires_at", ASCENDING)], name="response_cache_expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "engagement_rollups": [
+        # One bucket per (granularity, post, bucket start); upserted on every ingest
+        IndexModel(
+            [("granularity", ASCENDING), ("platform", ASCENDING), ("native_id", ASCENDING), ("bucket", ASCENDING)],
+            name="engagement_rollups_bucket_unique",
+            unique=True
+        ),
+        # Velocity queries scan one granularity over a recent window
+        IndexModel([("granularity", ASCENDING), ("bucket", DESCENDING)], name="engagement_rollups_granularity_bucket"),
+        IndexModel([("expires_at", ASCENDING)], name="engagement_rollups_expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "recommendation_cache": [
+        IndexModel([("expires_at", ASCENDING)], name="recommendation_cache_expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "activities": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="activities_user_created_at"),
+    ],
+}
+
+
+async def ensure_indexes(db) -> Dict[str, Dict]:
+    """
+    Apply the index registry idempotently
+
+    Each index is created on its own so one failure (e.g. duplicate keys left
+    over from older data) does not prevent the rest from being built.
+
+    Returns:
+        Mapping of collection name to created index names and failures
+    """
+    summary = {}
+
+    for collection_name, models in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        created, failed = [], {}
+
+        for model in models:
+            name = model.document["name"]
+            try:
+                await collection.create_indexes([model])
+                created.append(name)
+            except OperationFailure as e:
+                failed[name] = str(e)
+                logger.error(f"Could not create index {collection_name}.{name}: {e}")
+
+        summary[collection_name] = {"created": created, "failed": failed}
+
+    logger.info(f"Index registry applied to {len(INDEX_REGISTRY)} collections")
+    return summary
+
+
+async def index_report(db) -> Dict[str, Dict]:
+    """
+    Compare live indexes against the registry
+
+    Returns:
+        Per-collection lists of missing, unexpected and unused indexes plus
+        access counts from $indexStats (counters reset on server restart)
+    """
+    report = {}
+
+    for collection_name, models in INDEX_REGISTRY.items():
+        collection = db[collection_name]
+        expected = {model.document["name"]: model.document["key"] for model in models}
+
+        existing = await collection.index_information()
+        existing.pop("_id_", None)
+
+        try:
+            stats = await collection.aggregate([{"$indexStats": {}}]).to_list(None)
+            usage = {stat["name"]: stat["accesses"]["ops"] for stat in stats}
+        except OperationFailure as e:
+            logger.warning(f"$indexStats unavailable for {collection_name}: {e}")
+            usage = {}
+
+        mismatched = [
+            name for name, key in expected.items()
+            if name in existing and list(existing[name]["key"]) != list(key.items())
+        ]
+
+        report[collection_name] = {
+            "missing": [name for name in expected if name not in existing],
+            "unexpected": [name for name in existing if name not in expected],
+            "mismatched": mismatched,
+            "unused": [name for name in existing if usage.get(name, 0) == 0 and name in usage],
+            "usage": usage
+        }
+
+    return report
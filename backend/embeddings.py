@@ -0,0 +1,116 @@
+import math
+import os
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from search_index import tokenize
+
+# Weight of the categorical features relative to a single text term
+PLATFORM_WEIGHT = 2.0
+CATEGORY_WEIGHT = 1.5
+
+# Contribution of each interaction to the user vector
+INTERACTION_WEIGHTS = {"favorite": 1.0, "like": 0.6, "share": 0.8, "comment": 0.7, "view": 0.2, "unfavorite": -0.5}
+FAVORITE_POST_WEIGHT = 1.0
+FAVORITE_PLATFORM_WEIGHT = 0.5
+
+# Interactions lose half their weight every ACTIVITY_HALF_LIFE days
+ACTIVITY_HALF_LIFE = 14.0
+
+
+class PostEmbedder:
+    """Deterministic hashing-trick embeddings.
+
+    Terms (from the search tokenizer), the platform and the category are
+    hashed into a fixed number of signed buckets and L2-normalized, so two
+    posts' cosine similarity is a single dot product. No model or training
+    is needed and the same text always maps to the same vector.
+    """
+
+    def __init__(self, dim: Optional[int] = None):
+        self.dim = dim or int(os.getenv('EMBEDDING_DIM', '512'))
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        digest = zlib.crc32(feature.encode("utf-8"))
+        return digest % self.dim, (1.0 if (digest >> 31) & 1 else -1.0)
+
+    def _features(self, post: Dict) -> Dict[str, float]:
+        user = post.get("user") or {}
+        counts = Counter(tokenize(post.get("content")))
+        counts.update(tokenize(user.get("name")))
+
+        # Sublinear term frequency so repeated words do not dominate
+        features = {f"t:{term}": 1.0 + math.log(count) for term, count in counts.items()}
+        if post.get("platform"):
+            features[f"platform:{post['platform']}"] = PLATFORM_WEIGHT
+        if post.get("category"):
+            features[f"category:{post['category']}"] = CATEGORY_WEIGHT
+        return features
+
+    def embed_features(self, features: Dict[str, float]) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in features.items():
+            index, sign = self._bucket(feature)
+            vector[index] += sign * weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, post: Dict) -> np.ndarray:
+        """Unit-length embedding of a post"""
+        return self.embed_features(self._features(post))
+
+    def platform_vector(self, platform: str) -> np.ndarray:
+        return self.embed_features({f"platform:{platform}": 1.0})
+
+
+def user_vector(index, user: Dict, activities: List[Dict]) -> Optional[np.ndarray]:
+    """
+    Interest vector of a user
+
+    Combines favorited posts, favorite platforms and recent activities
+    (decayed by age) into one unit vector; None if there is no signal.
+
+    Args:
+        index: Vector store of the posts (``embedder`` and ``vector(post_id)``)
+        user: User document (favorite_posts, favorite_platforms)
+        activities: Recent activity items of the user
+    """
+    vector = np.zeros(index.embedder.dim, dtype=np.float32)
+    now = datetime.now(timezone.utc)
+
+    for post_id in user.get("favorite_posts", []):
+        post_vector = index.vector(post_id)
+        if post_vector is not None:
+            vector += FAVORITE_POST_WEIGHT * post_vector
+
+    for platform in user.get("favorite_platforms", []):
+        vector += FAVORITE_PLATFORM_WEIGHT * index.embedder.platform_vector(platform)
+
+    for activity in activities:
+        post_vector = index.vector(activity.get("post_id")) if activity.get("post_id") else None
+        weight = INTERACTION_WEIGHTS.get(activity.get("action"), 0.0)
+        if post_vector is None or not weight:
+            continue
+        vector += weight * _decay(activity.get("created_at"), now) * post_vector
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def _decay(created_at, now: datetime) -> float:
+    """Exponential recency weight of an activity (created_at is an ISO string or datetime)"""
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        except ValueError:
+            return 1.0
+    if not isinstance(created_at, datetime):
+        return 1.0
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    age_days = max((now - created_at).total_seconds() / 86400, 0.0)
+    return 0.5 ** (age_days / ACTIVITY_HALF_LIFE)
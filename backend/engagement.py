@@ -0,0 +1,121 @@
+import math
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Union
+
+# Weight of each counter in the engagement score
+ENGAGEMENT_WEIGHTS = {"likes": 1, "comments": 2, "shares": 3}
+
+# Hotness gains one order of magnitude of engagement every HOTNESS_PERIOD seconds,
+# so newer posts need less engagement to outrank older ones (Reddit-style "hot")
+HOTNESS_PERIOD = 45000
+HOTNESS_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def engagement_score(post: Dict) -> int:
+    """Weighted engagement: likes + comments * 2 + shares * 3"""
+    return sum(int(post.get(field) or 0) * weight for field, weight in ENGAGEMENT_WEIGHTS.items())
+
+
+def _as_utc(created_at: Optional[Union[datetime, str]]) -> datetime:
+    """Normalize createdAt (naive UTC datetime from Mongo, aware datetime or ISO string)"""
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        except ValueError:
+            created_at = None
+    if not isinstance(created_at, datetime):
+        return datetime.now(timezone.utc)
+    if created_at.tzinfo is None:
+        return created_at.replace(tzinfo=timezone.utc)
+    return created_at
+
+
+def hotness_score(score: int, created_at: Optional[Union[datetime, str]]) -> float:
+    """
+    Time-decayed ranking score
+
+    The decay is folded into the creation time, so the value only changes when
+    engagement changes and can be stored and indexed instead of recomputed per read.
+    """
+    age_seconds = (_as_utc(created_at) - HOTNESS_EPOCH).total_seconds()
+    return math.log10(max(score, 1)) + age_seconds / HOTNESS_PERIOD
+
+
+def engagement_fields(post: Dict) -> Dict:
+    """Materialized ranking fields for a post document with current counters"""
+    score = engagement_score(post)
+    return {
+        "engagement_score": score,
+        "hotness": hotness_score(score, post.get("createdAt"))
+    }
+
+
+# Aggregation expressions computing the same values server-side, for pipeline updates
+ENGAGEMENT_SCORE_EXPR = {
+    "$add": [
+        {"$multiply": [{"$ifNull": [f"${field}", 0]}, weight]}
+        for field, weight in ENGAGEMENT_WEIGHTS.items()
+    ]
+}
+
+_CREATED_AT_MS_EXPR = {
+    "$toLong": {
+        "$convert": {"input": "$createdAt", "to": "date", "onError": "$$NOW", "onNull": "$$NOW"}
+    }
+}
+
+HOTNESS_EXPR = {
+    "$add": [
+        {"$log10": {"$max": [{"$ifNull": ["$engagement_score", 0]}, 1]}},
+        {"$divide": [
+            {"$subtract": [_CREATED_AT_MS_EXPR, int(HOTNESS_EPOCH.timestamp() * 1000)]},
+            HOTNESS_PERIOD * 1000
+        ]}
+    ]
+}
+
+# Two stages: hotness reads the engagement_score written by the first one
+ENGAGEMENT_UPDATE_PIPELINE = [
+    {"$set": {"engagement_score": ENGAGEMENT_SCORE_EXPR}},
+    {"$set": {"hotness": HOTNESS_EXPR}}
+]
+
+
+def counter_update_pipeline(deltas: Dict[str, int]) -> List[Dict]:
+    """
+    Pipeline update adding deltas to counters and refreshing the ranking fields
+
+    The increment and the recomputation run in one atomic document update, so
+    concurrent clicks cannot overwrite each other.
+
+    Args:
+        deltas: Increment per counter field, e.g. {"likes": 1}
+    """
+    increments = {
+        field: {"$add": [{"$ifNull": [f"${field}", 0]}, delta]}
+        for field, delta in deltas.items()
+    }
+    return [{"$set": {**increments, "updatedAt": "$$NOW"}}] + ENGAGEMENT_UPDATE_PIPELINE
+
+
+async def backfill_engagement_fields(collection) -> int:
+    """Materialize engagement_score/hotness on posts written before the fields existed"""
+    result = await collection.update_many(
+        {"$or": [{"engagement_score": {"$exists": False}}, {"hotness": {"$exists": False}}]},
+        ENGAGEMENT_UPDATE_PIPELINE
+    )
+    return result.modified_count
+
+
+async def backfill_created_at(collection) -> int:
+    """
+    Convert createdAt stored as an ISO string by older writers to a BSON date
+
+    Strings and dates sort in different BSON type brackets, so legacy rows would
+    otherwise be skipped or repeated by the date keyset cursor and time filters.
+    """
+    result = await collection.update_many(
+        {"createdAt": {"$type": "string"}},
+        [{"$set": {"createdAt": {"$convert": {"input": "$createdAt", "to": "date", "onError": "$$NOW"}}}}]
+    )
+    return result.modified_count
@@ -0,0 +1,152 @@
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from engagement import engagement_score
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ("likes", "comments", "shares", "score")
+
+# Bucket width and how long buckets of each granularity are kept
+GRANULARITIES = {
+    "minute": {"width": timedelta(minutes=1), "retention": timedelta(hours=6)},
+    "hour": {"width": timedelta(hours=1), "retention": timedelta(days=7)},
+    "day": {"width": timedelta(days=1), "retention": timedelta(days=90)},
+}
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Truncate a timestamp to the start of its bucket"""
+    if granularity == "minute":
+        return moment.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def granularity_for(window: timedelta) -> str:
+    """Finest granularity whose retention still covers the window"""
+    for name, spec in GRANULARITIES.items():
+        if window <= spec["retention"]:
+            return name
+    return "day"
+
+
+class EngagementTimeSeries:
+    """Per-post engagement history kept as rollup buckets.
+
+    Every ingest batch samples the counters of the posts it wrote into
+    minute, hour and day buckets at once. Counters only grow, so a bucket
+    keeps its opening values with $min and its closing values with $max;
+    growth over any window is max(close) - min(open) across its buckets.
+    Old buckets are removed by a TTL index on expires_at.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def record(self, platform: str, posts: Dict[str, Dict], sampled_at: Optional[datetime] = None):
+        """
+        Sample the counters of a written batch
+
+        Args:
+            platform: Platform the posts belong to
+            posts: Posts keyed on their platform-native id
+            sampled_at: Sample time (defaults to now)
+        """
+        if not posts:
+            return
+
+        now = sampled_at or datetime.now(timezone.utc)
+        operations = []
+
+        for native_id, post in posts.items():
+            values = {field: int(post.get(field) or 0) for field in COUNTERS[:-1]}
+            values["score"] = engagement_score(post)
+
+            for granularity, spec in GRANULARITIES.items():
+                bucket = bucket_start(now, granularity)
+                operations.append(UpdateOne(
+                    {"granularity": granularity, "platform": platform, "native_id": native_id, "bucket": bucket},
+                    {
+                        "$min": {f"open.{field}": value for field, value in values.items()},
+                        "$max": {f"close.{field}": value for field, value in values.items()},
+                        "$inc": {"samples": 1},
+                        "$setOnInsert": {"expires_at": bucket + spec["width"] + spec["retention"]}
+                    },
+                    upsert=True
+                ))
+
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Could not record {platform} engagement samples: {e}")
+
+    def _window_match(self, window: timedelta, platform: Optional[str]) -> Dict:
+        granularity = granularity_for(window)
+        since = bucket_start(datetime.now(timezone.utc) - window, granularity)
+        match = {"granularity": granularity, "bucket": {"$gte": since}}
+        if platform:
+            match["platform"] = platform
+        return match
+
+    async def rising_posts(self, window: timedelta, platform: Optional[str] = None, limit: int = 10) -> List[Dict]:
+        """
+        Posts whose engagement grew fastest within the window
+
+        Returns:
+            Dicts with platform, native_id, gained counters and score growth per hour
+        """
+        hours = window.total_seconds() / 3600
+        pipeline = [
+            {"$match": self._window_match(window, platform)},
+            {"$group": {
+                "_id": {"platform": "$platform", "native_id": "$native_id"},
+                **{f"open_{field}": {"$min": f"$open.{field}"} for field in COUNTERS},
+                **{f"close_{field}": {"$max": f"$close.{field}"} for field in COUNTERS},
+            }},
+            {"$project": {
+                "_id": 0,
+                "platform": "$_id.platform",
+                "native_id": "$_id.native_id",
+                "gained": {field: {"$subtract": [f"$close_{field}", f"$open_{field}"]} for field in COUNTERS},
+            }},
+            {"$match": {"gained.score": {"$gt": 0}}},
+            {"$sort": {"gained.score": -1}},
+            {"$limit": limit},
+        ]
+        results = await self.collection.aggregate(pipeline).to_list(limit)
+        for result in results:
+            result["score_per_hour"] = round(result["gained"]["score"] / hours, 2) if hours else 0
+        return results
+
+    async def platform_velocity(self, window: timedelta) -> List[Dict]:
+        """Engagement gained per platform within the window, fastest first"""
+        hours = window.total_seconds() / 3600
+        pipeline = [
+            {"$match": self._window_match(window, None)},
+            {"$group": {
+                "_id": {"platform": "$platform", "native_id": "$native_id"},
+                **{f"open_{field}": {"$min": f"$open.{field}"} for field in COUNTERS},
+                **{f"close_{field}": {"$max": f"$close.{field}"} for field in COUNTERS},
+            }},
+            {"$group": {
+                "_id": "$_id.platform",
+                "posts": {"$sum": 1},
+                **{field: {"$sum": {"$subtract": [f"$close_{field}", f"$open_{field}"]}} for field in COUNTERS},
+            }},
+            {"$sort": {"score": -1}},
+        ]
+        stats = await self.collection.aggregate(pipeline).to_list(None)
+        return [
+            {
+                "platform": stat["_id"],
+                "posts": stat["posts"],
+                "gained": {field: stat[field] for field in COUNTERS},
+                "score_per_hour": round(stat["score"] / hours, 2) if hours else 0
+            }
+            for stat in stats
+        ]
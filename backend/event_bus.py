@@ -0,0 +1,241 @@
+import asyncio
+import inspect
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Event types; payloads are documented on EventBus
+POST_CREATED = "post.created"
+POST_UPDATED = "post.updated"
+USER_UPDATED = "user.updated"
+
+# Change events collected into one dispatch while more are immediately available
+MAX_CHANGE_BATCH = 500
+# Seconds before a failed change stream is reopened
+RESTART_DELAY = 5.0
+# Polled inserts that become visible out of _id order within this many seconds are still delivered
+POLL_OVERLAP = 30.0
+
+
+def _changed_fields(change: Dict) -> Set[str]:
+    """Top-level fields touched by a change event ("favorite_posts.3" counts as "favorite_posts")"""
+    if change["operationType"] != "update":
+        return set((change.get("fullDocument") or {}).keys())
+    description = change.get("updateDescription", {})
+    paths = list(description.get("updatedFields", {}).keys()) + list(description.get("removedFields", []))
+    paths += [truncated["field"] for truncated in description.get("truncatedArrays", [])]
+    return {path.split(".")[0] for path in paths}
+
+
+class EventBus:
+    """Internal publish/subscribe bus for data changes.
+
+    Writers publish what they changed and caches, search indexes, trend
+    counters and push channels subscribe once:
+
+    - ``post.created``: list of new post documents
+    - ``post.updated``: {"ids": post ids (empty when unknown), "fields": changed fields}
+    - ``user.updated``: {"user_id": id, "fields": changed fields}
+
+    In ``local`` mode events are dispatched in-process as they are
+    published. In ``changestream`` mode (a replica set is required) the
+    events are derived from MongoDB change streams on ``posts`` and
+    ``users`` instead, so every API worker sees every write no matter which
+    worker or process made it; local publishes of those events are then
+    skipped to avoid handling them twice. ``auto`` (the default) uses
+    change streams when the server supports them.
+
+    Without change streams (a standalone server) ``auto`` falls back to
+    ``poll``: each worker tails new posts by ``_id`` every
+    ``EVENT_BUS_POLL_INTERVAL`` seconds, so ``post.created`` still reaches
+    every worker, a few seconds late. Post and user updates stay in-process
+    in that mode; per-worker state derived from them (response and session
+    caches) only catches up through its own expiry. Use ``local`` for a
+    single worker.
+
+    Per-process state that the publishing request itself must see updated
+    (e.g. its own cached session) registers with ``on_publish`` instead:
+    those handlers run inside ``publish`` in both modes.
+    """
+
+    def __init__(self, db, mode: Optional[str] = None):
+        self.db = db
+        self.requested_mode = mode or os.getenv('EVENT_BUS_MODE', 'auto')
+        self.mode = "local"
+        self._handlers: Dict[str, List[Callable]] = {}
+        self._publish_handlers: Dict[str, List[Callable]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._resume_tokens: Dict[str, Any] = {}
+        self.poll_interval = float(os.getenv('EVENT_BUS_POLL_INTERVAL', '2'))
+        self._poll_watermark: Optional[datetime] = None
+        self._poll_seen: Set[ObjectId] = set()
+        self.stats = {"published": 0, "dispatched": 0, "handler_errors": 0}
+
+    def subscribe(self, event_type: str, handler: Callable[[Any], Any]):
+        """Register a callback (sync or async) receiving the payload of every event of a type"""
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def on_publish(self, event_type: str, handler: Callable[[Any], None]):
+        """Register a synchronous callback run by ``publish`` itself, before it returns, in every mode"""
+        self._publish_handlers.setdefault(event_type, []).append(handler)
+
+    async def _dispatch(self, event_type: str, payload: Any):
+        self.stats["dispatched"] += 1
+        for handler in self._handlers.get(event_type, []):
+            try:
+                result = handler(payload)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.stats["handler_errors"] += 1
+                logger.error(f"Event bus handler {getattr(handler, '__name__', handler)} for {event_type} failed: {e}")
+
+    async def publish(self, event_type: str, payload: Any):
+        """Announce a change made by this process"""
+        self.stats["published"] += 1
+        for handler in self._publish_handlers.get(event_type, []):
+            try:
+                handler(payload)
+            except Exception as e:
+                self.stats["handler_errors"] += 1
+                logger.error(f"Event bus publish handler {getattr(handler, '__name__', handler)} for {event_type} failed: {e}")
+        if self.mode == "changestream" or (self.mode == "poll" and event_type == POST_CREATED):
+            # The change stream (or the poller) delivers this write to every worker, this one included
+            return
+        await self._dispatch(event_type, payload)
+
+    # ---- change streams ----------------------------------------------
+
+    async def _supports_change_streams(self) -> bool:
+        try:
+            async with self.db.posts.watch(max_await_time_ms=1) as stream:
+                await stream.try_next()
+            return True
+        except (PyMongoError, NotImplementedError) as e:
+            logger.info(f"Change streams unavailable, event bus stays in-process: {e}")
+            return False
+
+    async def start(self):
+        """Pick the delivery mode and start the change stream watchers if used"""
+        if self.requested_mode == "local":
+            return
+        if await self._supports_change_streams():
+            self.mode = "changestream"
+            self._tasks = [
+                asyncio.create_task(self._watch(self.db.posts, self._post_events)),
+                asyncio.create_task(self._watch(self.db.users, self._user_events, full_document="updateLookup")),
+            ]
+            logger.info("Event bus delivering events from MongoDB change streams")
+        else:
+            if self.requested_mode == "changestream":
+                logger.warning("EVENT_BUS_MODE=changestream but change streams are unsupported; polling for new posts")
+            self.mode = "poll"
+            self._tasks = [asyncio.create_task(self._poll_posts())]
+            logger.info(f"Event bus polling for new posts every {self.poll_interval}s")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _watch(self, collection, translate: Callable, full_document: Optional[str] = None):
+        """Tail a collection's change stream, resuming after errors from the last seen event"""
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        while True:
+            try:
+                options = {"resume_after": self._resume_tokens.get(collection.name)}
+                if full_document:
+                    options["full_document"] = full_document
+                async with collection.watch(pipeline, **options) as stream:
+                    while True:
+                        changes = [await stream.next()]
+                        # Drain whatever else is already waiting so a bulk write becomes one dispatch
+                        while len(changes) < MAX_CHANGE_BATCH:
+                            change = await stream.try_next()
+                            if change is None:
+                                break
+                            changes.append(change)
+                        self._resume_tokens[collection.name] = stream.resume_token
+                        await translate(changes)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logger.error(f"Change stream on {collection.name} failed, reopening in {RESTART_DELAY}s: {e}")
+                await asyncio.sleep(RESTART_DELAY)
+
+    # ---- polling fallback ---------------------------------------------
+
+    async def _poll_posts(self):
+        """Dispatch posts inserted by any worker, for servers without change streams"""
+        # The first poll only records what already exists
+        primed = False
+        while True:
+            try:
+                created = await self._fetch_new_posts()
+                if primed and created:
+                    await self._dispatch(POST_CREATED, created)
+                primed = True
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                logger.error(f"Polling for new posts failed, retrying in {RESTART_DELAY}s: {e}")
+                await asyncio.sleep(RESTART_DELAY)
+                continue
+            await asyncio.sleep(self.poll_interval)
+
+    async def _fetch_new_posts(self) -> List[Dict]:
+        """
+        Posts not returned by an earlier poll
+
+        Upserted posts get their ObjectId from the server, so _id order is
+        insertion order; the query window reaches POLL_OVERLAP seconds back
+        from the newest post seen and ids already returned are skipped.
+        """
+        if self._poll_watermark is None:
+            newest = await self.db.posts.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+            self._poll_watermark = newest["_id"].generation_time if newest else None
+
+        query = {}
+        if self._poll_watermark is not None:
+            query = {"_id": {"$gte": ObjectId.from_datetime(self._poll_watermark - timedelta(seconds=POLL_OVERLAP))}}
+        documents = await self.db.posts.find(query).sort("_id", 1).to_list(None)
+        created = [document for document in documents if document["_id"] not in self._poll_seen]
+        # The window only moves forward, so ids that fall out of it never come back
+        self._poll_seen = {document["_id"] for document in documents}
+        if documents:
+            self._poll_watermark = documents[-1]["_id"].generation_time
+        return created
+
+    async def _post_events(self, changes: List[Dict]):
+        created = [change["fullDocument"] for change in changes if change["operationType"] == "insert"]
+        fields = set()
+        for change in changes:
+            if change["operationType"] != "insert":
+                fields.update(_changed_fields(change))
+
+        if created:
+            await self._dispatch(POST_CREATED, created)
+        if fields:
+            await self._dispatch(POST_UPDATED, {"ids": [], "fields": sorted(fields)})
+
+    async def _user_events(self, changes: List[Dict]):
+        for change in changes:
+            user = change.get("fullDocument") or {}
+            if not user.get("id"):
+                continue
+            await self._dispatch(USER_UPDATED, {"user_id": user["id"], "fields": sorted(_changed_fields(change))})
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.stats,
+            "mode": self.mode,
+            "subscriptions": {event_type: len(handlers) for event_type, handlers in self._handlers.items()},
+            "publish_handlers": {event_type: len(handlers) for event_type, handlers in self._publish_handlers.items()}
+        }
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Post ids remembered per subscriber between two deliveries
+MAX_PENDING_IDS = 20
+
+FilterKey = Tuple[Optional[str], Optional[str]]
+
+
+class Subscriber:
+    """One connected client: new-post counts accumulate here until the stream delivers them"""
+
+    def __init__(self, platform: Optional[str] = None, category: Optional[str] = None):
+        self.platform = platform
+        self.category = category
+        self.pending = 0
+        self.pending_ids: deque = deque(maxlen=MAX_PENDING_IDS)
+        self.platforms: Dict[str, int] = {}
+        self.wakeup = asyncio.Event()
+        self.closed = False
+
+    @property
+    def key(self) -> FilterKey:
+        return (self.platform, self.category)
+
+    def take(self) -> Dict:
+        """Pending counts as an event payload, resetting them"""
+        event = {"new_count": self.pending, "post_ids": list(self.pending_ids), "platforms": self.platforms}
+        self.pending = 0
+        self.pending_ids.clear()
+        self.platforms = {}
+        self.wakeup.clear()
+        return event
+
+
+class EventHub:
+    """In-process fan-out of new-post events to streaming clients.
+
+    Subscribers are grouped by their (platform, category) filter, so each
+    published batch is matched once per distinct filter rather than once
+    per client. A subscriber only holds counters, never a queue of events:
+    a slow client receives one combined event when it catches up instead
+    of growing a backlog, and no client ever causes a database query.
+    """
+
+    def __init__(self, heartbeat: Optional[float] = None):
+        self.heartbeat = heartbeat or float(os.getenv('EVENT_STREAM_HEARTBEAT', '15'))
+        self.groups: Dict[FilterKey, Set[Subscriber]] = {}
+        self.stats = {"published": 0, "delivered": 0}
+
+    def __len__(self) -> int:
+        return sum(len(group) for group in self.groups.values())
+
+    def subscribe(self, platform: Optional[str] = None, category: Optional[str] = None) -> Subscriber:
+        subscriber = Subscriber(platform, category)
+        self.groups.setdefault(subscriber.key, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        group = self.groups.get(subscriber.key)
+        if group is None:
+            return
+        group.discard(subscriber)
+        if not group:
+            del self.groups[subscriber.key]
+
+    def publish(self, posts: Iterable[Dict]):
+        """Notify every subscriber whose filter matches some of the new shared posts"""
+        # Personalized posts belong to one user and never appear in the public feed
+        posts = [post for post in posts if post.get("user_specific") is None]
+        if not posts or not self.groups:
+            return
+        self.stats["published"] += len(posts)
+
+        for (platform, category), group in self.groups.items():
+            matched = [
+                post for post in posts
+                if (platform is None or post.get("platform") == platform)
+                and (category is None or post.get("category") == category)
+            ]
+            if not matched:
+                continue
+
+            ids = [post.get("id") for post in matched if post.get("id")][-MAX_PENDING_IDS:]
+            by_platform: Dict[str, int] = {}
+            for post in matched:
+                name = post.get("platform") or "unknown"
+                by_platform[name] = by_platform.get(name, 0) + 1
+
+            for subscriber in group:
+                subscriber.pending += len(matched)
+                subscriber.pending_ids.extend(ids)
+                for name, count in by_platform.items():
+                    subscriber.platforms[name] = subscriber.platforms.get(name, 0) + count
+                subscriber.wakeup.set()
+
+    def close(self):
+        """End all open streams (on shutdown)"""
+        for group in self.groups.values():
+            for subscriber in group:
+                subscriber.closed = True
+                subscriber.wakeup.set()
+
+    async def stream(self, platform: Optional[str] = None, category: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Server-sent events for one client
+
+        The subscription is made when the stream starts and removed when it
+        ends, so a response that is never sent leaves nothing behind. Yields
+        a ``new_posts`` event whenever matching posts were published and a
+        comment line every ``heartbeat`` seconds to keep proxies from closing
+        an idle connection.
+        """
+        subscriber = self.subscribe(platform, category)
+        try:
+            yield "retry: 5000\n: connected\n\n"
+            while not subscriber.closed:
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if subscriber.closed:
+                    break
+                if subscriber.pending:
+                    self.stats["delivered"] += 1
+                    yield f"event: new_posts\ndata: {json.dumps(subscriber.take())}\n\n"
+                else:
+                    subscriber.wakeup.clear()
+        finally:
+            self.unsubscribe(subscriber)
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.stats,
+            "subscribers": len(self),
+            "filter_groups": len(self.groups)
+        }
@@ -0,0 +1,199 @@
+import csv
+import io
+import json
+import logging
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet/Arrow exports are optional
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# Rows buffered before a chunk is handed to the response
+DEFAULT_CHUNK_SIZE = 500
+
+# Flat columns of a post export; nested fields use dotted paths
+POST_EXPORT_FIELDS = [
+    "id", "platform", "category", "createdAt", "user.name", "user.username",
+    "content", "likes", "comments", "shares", "engagement_score", "hotness",
+    "media.type", "media.url",
+]
+
+# Column types for Parquet/Arrow; everything else is exported as a string
+NUMERIC_FIELDS = {
+    "likes": "int64", "comments": "int64", "shares": "int64", "engagement_score": "int64",
+    "hotness": "float64", "posts": "int64", "videos": "int64",
+}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+class ExportFormatError(ValueError):
+    """Raised for unknown export formats or ones whose optional dependency is missing"""
+
+
+def columnar_available() -> bool:
+    return pa is not None
+
+
+def check_format(format: str):
+    """Validate an export format before a streaming response is started"""
+    if format not in MEDIA_TYPES:
+        raise ExportFormatError(f"Unsupported export format: {format}")
+    if format in ("parquet", "arrow") and not columnar_available():
+        raise ExportFormatError(f"{format} export requires pyarrow to be installed")
+
+
+def _lookup(doc: Dict, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def flatten(doc: Dict, fields: List[str]) -> Dict:
+    """Pick dotted fields out of a document as a flat row"""
+    row = {}
+    for field in fields:
+        value = _lookup(doc, field)
+        row[field] = value.isoformat() if hasattr(value, "isoformat") else value
+    return row
+
+
+async def iterate(items: Iterable[Dict]) -> AsyncIterator[Dict]:
+    """Adapt an in-memory list to the async row interface of the writers"""
+    for item in items:
+        yield item
+
+
+async def flatten_rows(cursor, fields: List[str]) -> AsyncIterator[Dict]:
+    """Flatten documents from a Motor cursor one at a time"""
+    async for doc in cursor:
+        yield flatten(doc, fields)
+
+
+async def stream_csv(rows: AsyncIterator[Dict], fields: List[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[str]:
+    """Yield CSV text in chunks of chunk_size rows, header first"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    pending = 0
+
+    async for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue()
+
+
+async def stream_ndjson(rows: AsyncIterator[Dict], chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[str]:
+    """Yield newline-delimited JSON in chunks of chunk_size rows"""
+    lines = []
+    async for row in rows:
+        lines.append(json.dumps(row, default=str))
+        if len(lines) >= chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+class _ChunkSink:
+    """Write-only file object collecting bytes pyarrow writes, drained after every batch"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _arrow_schema(fields: List[str]):
+    return pa.schema([(field, getattr(pa, NUMERIC_FIELDS.get(field, "string"))()) for field in fields])
+
+
+async def stream_columnar(
+    rows: AsyncIterator[Dict],
+    fields: List[str],
+    format: str = "parquet",
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    """
+    Yield a Parquet file (one row group per chunk) or an Arrow IPC stream
+
+    Only one chunk of rows is held in memory at a time.
+    """
+    schema = _arrow_schema(fields)
+    sink = _ChunkSink()
+    target = pa.PythonFile(sink, mode="w")
+    writer = pq.ParquetWriter(target, schema) if format == "parquet" else pa.ipc.new_stream(target, schema)
+
+    def to_batch(batch_rows: List[Dict]):
+        columns = {}
+        for field in fields:
+            values = [row.get(field) for row in batch_rows]
+            if field not in NUMERIC_FIELDS:
+                values = [None if value is None else str(value) for value in values]
+            columns[field] = values
+        return pa.Table.from_pydict(columns, schema=schema)
+
+    batch: List[Dict] = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            writer.write_table(to_batch(batch))
+            batch = []
+            yield sink.drain()
+
+    if batch:
+        writer.write_table(to_batch(batch))
+    writer.close()
+    yield sink.drain()
+
+
+def stream_rows(rows: AsyncIterator[Dict], fields: List[str], format: str, chunk_size: Optional[int] = None) -> AsyncIterator:
+    """Pick the streaming writer for an export format (validate with check_format first)"""
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    if format == "csv":
+        return stream_csv(rows, fields, chunk_size)
+    if format == "ndjson":
+        return stream_ndjson(rows, chunk_size)
+    return stream_columnar(rows, fields, format, chunk_size)
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Response headers kept with a cached body (content-encoding is not: bodies are stored decoded)
+STORED_HEADERS = ("content-type", "etag", "last-modified", "cache-control", "date")
+# Header marking responses answered from the cache: "hit" (still fresh) or "revalidated" (304)
+CACHE_STATUS_HEADER = "x-upstream-cache"
+# Seconds between sweeps of expired entries
+PURGE_INTERVAL = 3600
+
+MAX_AGE_RE = re.compile(r"(?:s-maxage|max-age)\s*=\s*(\d+)")
+
+
+def not_modified(response: httpx.Response) -> bool:
+    """True when a response was served from the cache, i.e. the upstream content did not change"""
+    return response.headers.get(CACHE_STATUS_HEADER) in ("hit", "revalidated")
+
+
+def _freshness(headers: httpx.Headers) -> Optional[float]:
+    """Seconds a response may be reused without revalidation; None if it must not be stored"""
+    cache_control = headers.get("cache-control", "").lower()
+    if "no-store" in cache_control:
+        return None
+    if "no-cache" in cache_control:
+        return 0.0
+    match = MAX_AGE_RE.search(cache_control)
+    return float(match.group(1)) if match else 0.0
+
+
+class HttpResponseCache:
+    """Disk-backed cache of upstream GET responses for the scrapers.
+
+    Each entry is a metadata file (validators, expiry) next to the decoded
+    body. Fresh entries (per the upstream max-age) are answered without a
+    request; stale ones are revalidated with If-None-Match /
+    If-Modified-Since, and a 304 reuses the stored body. Entries are kept
+    for ``retention`` seconds after their last use so later cycles can
+    still revalidate them. Disk errors are logged and never fail a request:
+    an unreadable entry is a miss and an unwritable one is not stored.
+    """
+
+    def __init__(self, path: Optional[str] = None, retention: Optional[float] = None):
+        self.path = Path(path or os.getenv('HTTP_CACHE_DIR', str(Path(__file__).parent / 'data' / 'http_cache')))
+        self.retention = retention or float(os.getenv('HTTP_CACHE_RETENTION', '86400'))
+        self._last_purge = 0.0
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "bytes_saved": 0, "disk_errors": 0}
+
+    @staticmethod
+    def key(url: str, params: Optional[Dict] = None) -> str:
+        """Cache key of a GET request (authorization headers are deliberately not part of it)"""
+        full_url = str(httpx.URL(url, params=params)) if params else url
+        return hashlib.sha256(full_url.encode("utf-8")).hexdigest()
+
+    def _files(self, key: str):
+        return self.path / f"{key}.json", self.path / f"{key}.body"
+
+    def _read(self, key: str) -> Optional[Dict]:
+        meta_file, body_file = self._files(key)
+        try:
+            meta = json.loads(meta_file.read_text())
+            meta["body"] = body_file.read_bytes()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.stats["disk_errors"] += 1
+            logger.warning(f"Unreadable upstream cache entry {key}, fetching uncached: {e}")
+            return None
+        if meta["expires_at"] < time.time():
+            return None
+        return meta
+
+    def _replace(self, target: Path, content: bytes):
+        """Atomically replace a file; the temporary name is unique so concurrent writers never share it"""
+        descriptor, temporary = tempfile.mkstemp(dir=self.path, prefix=f".{target.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as handle:
+                handle.write(content)
+            os.replace(temporary, target)
+        except BaseException:
+            Path(temporary).unlink(missing_ok=True)
+            raise
+
+    def _write(self, key: str, meta: Dict, body: Optional[bytes]):
+        self.path.mkdir(parents=True, exist_ok=True)
+        meta_file, body_file = self._files(key)
+        if body is not None:
+            self._replace(body_file, body)
+        self._replace(meta_file, json.dumps(meta).encode("utf-8"))
+
+    async def _write_logged(self, key: str, meta: Dict, body: Optional[bytes]) -> bool:
+        try:
+            await asyncio.to_thread(self._write, key, meta, body)
+            return True
+        except OSError as e:
+            self.stats["disk_errors"] += 1
+            logger.warning(f"Could not write upstream cache entry {key}: {e}")
+            return False
+
+    def _purge(self):
+        now = time.time()
+        # Leftovers of writes interrupted by a crash (writes in progress are much younger)
+        for temporary in self.path.glob(".*.tmp"):
+            try:
+                if temporary.stat().st_mtime < now - PURGE_INTERVAL:
+                    temporary.unlink(missing_ok=True)
+            except FileNotFoundError:
+                continue
+        for meta_file in self.path.glob("*.json"):
+            try:
+                if json.loads(meta_file.read_text())["expires_at"] >= now:
+                    continue
+            except (OSError, ValueError, KeyError):
+                pass
+            meta_file.unlink(missing_ok=True)
+            meta_file.with_suffix(".body").unlink(missing_ok=True)
+
+    async def get(self, key: str) -> Optional[Dict]:
+        entry = await asyncio.to_thread(self._read, key)
+        if entry is None:
+            self.stats["misses"] += 1
+        return entry
+
+    @staticmethod
+    def is_fresh(entry: Dict) -> bool:
+        return entry["fresh_until"] > time.time()
+
+    @staticmethod
+    def validators(entry: Dict) -> Dict[str, str]:
+        """Conditional request headers for a stored entry"""
+        headers = {}
+        if entry["headers"].get("etag"):
+            headers["If-None-Match"] = entry["headers"]["etag"]
+        if entry["headers"].get("last-modified"):
+            headers["If-Modified-Since"] = entry["headers"]["last-modified"]
+        return headers
+
+    def _meta(self, url: str, headers: Dict[str, str], freshness: float) -> Dict:
+        now = time.time()
+        return {
+            "url": url,
+            "headers": headers,
+            "stored_at": now,
+            "fresh_until": now + freshness,
+            "expires_at": now + max(self.retention, freshness)
+        }
+
+    async def store(self, key: str, response: httpx.Response):
+        """Keep a 200 response if it is cacheable and carries validators or a max-age"""
+        freshness = _freshness(response.headers)
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        if freshness is None or not (freshness or "etag" in headers or "last-modified" in headers):
+            return
+        # The query string is left out of the metadata: it can carry API keys
+        url = str(response.url.copy_with(query=None))
+        if await self._write_logged(key, self._meta(url, headers, freshness), response.content):
+            self.stats["stored"] += 1
+
+        if time.time() - self._last_purge > PURGE_INTERVAL:
+            self._last_purge = time.time()
+            try:
+                await asyncio.to_thread(self._purge)
+            except OSError as e:
+                self.stats["disk_errors"] += 1
+                logger.warning(f"Could not purge the upstream cache: {e}")
+
+    async def revalidated(self, key: str, entry: Dict, response: httpx.Response) -> httpx.Response:
+        """Extend an entry after a 304 and answer with its stored body"""
+        headers = {**entry["headers"], **{name: response.headers[name] for name in STORED_HEADERS if name in response.headers}}
+        freshness = _freshness(response.headers) or 0.0
+        meta = self._meta(entry["url"], headers, freshness)
+        # Even if the extension cannot be written, the stored body is still the right answer
+        await self._write_logged(key, meta, None)
+        self.stats["revalidated"] += 1
+        self.stats["bytes_saved"] += len(entry["body"])
+        return self.as_response({**meta, "body": entry["body"]}, response.request, "revalidated")
+
+    def hit(self, entry: Dict, request: httpx.Request) -> httpx.Response:
+        self.stats["hits"] += 1
+        self.stats["bytes_saved"] += len(entry["body"])
+        return self.as_response(entry, request, "hit")
+
+    @staticmethod
+    def as_response(entry: Dict, request: httpx.Request, status: str) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={**entry["headers"], CACHE_STATUS_HEADER: status},
+            content=entry["body"],
+            request=request
+        )
+
+    def snapshot(self) -> Dict:
+        return {**self.stats, "path": str(self.path)}
@@ -0,0 +1,153 @@
+import asyncio
+import importlib.util
+import logging
+import os
+from typing import Dict, Optional
+
+import httpx
+
+from http_cache import HttpResponseCache
+from rate_limiter import RateLimiter, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClientPool:
+    """Process-wide async HTTP client shared by all scrapers.
+
+    Wraps a single httpx.AsyncClient so connections (and TLS sessions) are
+    kept alive and reused across fetches. HTTP/2 is negotiated when the
+    optional ``h2`` package is installed. Concurrent requests per upstream
+    host are capped with a semaphore on top of the global pool limits, and
+    requests are paced per host by the rate limiter; 429 and 5xx gateway
+    responses are retried with backoff. GET responses go through the
+    upstream response cache (conditional requests, disk-backed bodies).
+    """
+
+    # Responses worth retrying after a pause
+    RETRY_STATUSES = (429, 502, 503, 504)
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        per_host_limit: Optional[int] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_retries: Optional[int] = None,
+        response_cache: Optional[HttpResponseCache] = None
+    ):
+        self.timeout = httpx.Timeout(
+            timeout or float(os.getenv('HTTP_CLIENT_TIMEOUT', '15')),
+            connect=connect_timeout or float(os.getenv('HTTP_CLIENT_CONNECT_TIMEOUT', '5'))
+        )
+        self.limits = httpx.Limits(
+            max_connections=max_connections or int(os.getenv('HTTP_CLIENT_MAX_CONNECTIONS', '100')),
+            max_keepalive_connections=max_keepalive_connections or int(os.getenv('HTTP_CLIENT_MAX_KEEPALIVE', '20')),
+            keepalive_expiry=30.0
+        )
+        self.per_host_limit = per_host_limit or int(os.getenv('HTTP_CLIENT_PER_HOST_LIMIT', '10'))
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('HTTP_CLIENT_MAX_RETRIES', '2'))
+        self.response_cache = response_cache
+        if self.response_cache is None and os.getenv('HTTP_CACHE_ENABLED', 'true').lower() == 'true':
+            self.response_cache = HttpResponseCache()
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The underlying httpx client, created lazily on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                follow_redirects=True
+            )
+            logger.info(f"Created shared HTTP client (http2={self.http2}, per_host_limit={self.per_host_limit})")
+        return self._client
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_semaphores[host]
+
+    async def request(self, method: str, url: str, cache: bool = True, **kwargs) -> httpx.Response:
+        """
+        Send a request through the shared pool
+
+        Args:
+            method: HTTP method
+            url: Absolute URL
+            cache: Use the upstream response cache for GET requests
+            **kwargs: Passed through to httpx (params, headers, data, auth, timeout...)
+
+        Returns:
+            httpx.Response (the last one if all retries were throttled); answers
+            from the cache carry an x-upstream-cache header (see http_cache.not_modified)
+
+        Raises:
+            RateLimitedError: The host's quota does not allow a request soon enough
+        """
+        if not (cache and method == "GET" and self.response_cache):
+            return await self._send(method, url, **kwargs)
+
+        key = self.response_cache.key(url, kwargs.get("params"))
+        entry = await self.response_cache.get(key)
+        if entry and self.response_cache.is_fresh(entry):
+            return self.response_cache.hit(entry, httpx.Request(method, url, params=kwargs.get("params")))
+        if entry:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **self.response_cache.validators(entry)}
+
+        response = await self._send(method, url, **kwargs)
+        if response.status_code == 304 and entry:
+            return await self.response_cache.revalidated(key, entry, response)
+        if response.status_code == 200:
+            await self.response_cache.store(key, response)
+        return response
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        host = httpx.URL(url).host
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(host)
+            async with self._host_semaphore(host):
+                response = await self.client.request(method, url, **kwargs)
+            requested_wait = self.rate_limiter.observe(host, response)
+
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            delay = requested_wait if requested_wait is not None else backoff_delay(attempt)
+            if delay > self.rate_limiter.max_wait:
+                return response
+            logger.info(f"{host} answered {response.status_code}, retrying in {delay:.1f}s")
+            # A Retry-After already blocks the host; acquire() waits for it on the next attempt
+            if requested_wait is None:
+                await asyncio.sleep(delay)
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        """Close pooled connections (called on application shutdown)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+_shared_client: Optional[HttpClientPool] = None
+
+
+def get_http_client() -> HttpClientPool:
+    """Return the process-wide HTTP client pool"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = HttpClientPool()
+    return _shared_client
@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionEngine:
+    """Runs platform fetches concurrently and off the event loop.
+
+    Coroutine fetchers are awaited directly; blocking fetchers run on a bounded
+    thread pool. Every platform gets its own timeout and error boundary, so a
+    slow or failing upstream only costs its own results. A blocking fetch's
+    timeout starts once a worker thread is free to run it.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, default_timeout: Optional[float] = None):
+        self.max_workers = max_workers or int(os.getenv('INGEST_MAX_WORKERS', '8'))
+        self.default_timeout = default_timeout or float(os.getenv('INGEST_PLATFORM_TIMEOUT', '30'))
+        self.platform_timeouts: Dict[str, float] = {}
+        self.last_results: Dict[str, Dict] = {}
+        self._result_listeners: List[Callable[[str, Dict], None]] = []
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ingest")
+        # One slot per worker thread; held until the thread is done, even after a timeout
+        self._slots = asyncio.Semaphore(self.max_workers)
+
+    def set_timeout(self, platform: str, timeout: float):
+        """Override the fetch timeout (seconds) for a single platform"""
+        self.platform_timeouts[platform] = timeout
+
+    def on_result(self, listener: Callable[[str, Dict], None]):
+        """Register a callback (sync or async) receiving (platform, result) after every fetch"""
+        self._result_listeners.append(listener)
+
+    async def fetch(self, platform: str, fetch_fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> List[Dict]:
+        """
+        Run one platform fetch in isolation
+
+        Args:
+            platform: Platform name used for timeouts and bookkeeping
+            fetch_fn: Scraper method, either sync or async
+            timeout: Optional override of the platform timeout in seconds
+
+        Returns:
+            List of post dictionaries, empty on timeout or error
+        """
+        timeout = timeout or self.platform_timeouts.get(platform, self.default_timeout)
+        started = time.monotonic()
+        status, error, posts = "ok", None, []
+
+        try:
+            if asyncio.iscoroutinefunction(fetch_fn):
+                posts = await asyncio.wait_for(fetch_fn(*args, **kwargs), timeout=timeout) or []
+            else:
+                posts = await self._run_blocking(functools.partial(fetch_fn, *args, **kwargs), timeout) or []
+        except asyncio.TimeoutError:
+            status, error = "timeout", f"Timed out after {timeout}s"
+            logger.warning(f"Ingestion: {platform} fetch timed out after {timeout}s")
+        except Exception as e:
+            status, error = "error", str(e)
+            logger.error(f"Ingestion: {platform} fetch failed: {e}")
+
+        self.last_results[platform] = {
+            "status": status,
+            "error": error,
+            "items": len(posts),
+            "duration": round(time.monotonic() - started, 3),
+            "finished_at": datetime.now(timezone.utc).isoformat()
+        }
+        for listener in self._result_listeners:
+            try:
+                result = listener(platform, self.last_results[platform])
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Ingestion result listener failed: {e}")
+        return posts
+
+    async def _run_blocking(self, fn: Callable, timeout: float):
+        """Run a blocking fetcher on the pool; queueing for a free thread does not count against the timeout"""
+        # Blocking scrapers must never run on the event loop thread
+        await self._slots.acquire()
+        pending = asyncio.get_running_loop().run_in_executor(self._executor, fn)
+        pending.add_done_callback(self._release_slot)
+        # A timed-out thread cannot be interrupted; shielding keeps its slot taken until it returns
+        return await asyncio.wait_for(asyncio.shield(pending), timeout=timeout)
+
+    def _release_slot(self, future: asyncio.Future):
+        self._slots.release()
+        # Mark the outcome of an abandoned fetch as retrieved so it is not logged
+        if not future.cancelled():
+            future.exception()
+
+    async def fetch_all(self, jobs: Dict[str, Callable]) -> Dict[str, List[Dict]]:
+        """
+        Run several platform fetches concurrently
+
+        Args:
+            jobs: Mapping of platform name to a zero-argument fetch callable
+                  (typically a functools.partial over a scraper method)
+
+        Returns:
+            Mapping of platform name to fetched posts
+        """
+        if not jobs:
+            return {}
+
+        platforms = list(jobs.keys())
+        results = await asyncio.gather(*(self.fetch(platform, jobs[platform]) for platform in platforms))
+        return dict(zip(platforms, results))
+
+    def shutdown(self):
+        """Release worker threads; in-flight blocking fetches are abandoned"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,9 +1,10 @@
-import requests
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
 import time
 
+from http_client import HttpClientPool, get_http_client
+
 logger = logging.getLogger(__name__)
 
 class InstagramScraper:
@@ -12,7 +13,8 @@ class InstagramScraper:
     BASE_URL = "https://graph.instagram.com"
     GRAPH_URL = "https://graph.facebook.com/v18.0"
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[HttpClientPool] = None):
+        self.http = http_client or get_http_client()
         self.client_id = os.getenv('INSTAGRAM_CLIENT_ID')
         self.client_secret = os.getenv('INSTAGRAM_CLIENT_SECRET')
         self.access_token = None
@@ -20,7 +22,7 @@ class InstagramScraper:
         if not self.client_id or not self.client_secret:
             logger.warning("Instagram API credentials not found in environment variables")
     
-    def fetch_trending_posts(self, max_results: int = 50) -> List[Dict]:
+    async def fetch_trending_posts(self, max_results: int = 50) -> List[Dict]:
         """
         Fetch trending posts from Instagram
         
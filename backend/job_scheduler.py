@@ -0,0 +1,189 @@
+import asyncio
+import inspect
+import logging
+import os
+import random
+import socket
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """Definition of a periodic job (its run state lives in Mongo)"""
+
+    def __init__(self, name: str, func: Callable[[], Awaitable], interval: float, jitter: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+
+    def next_delay(self) -> float:
+        """Interval spread by +/- jitter so workers and platforms do not fire in lockstep"""
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+
+class JobScheduler:
+    """Periodic jobs shared by all API workers.
+
+    Every job has a document in ``scheduled_jobs`` holding its next run
+    time, pause flag, last outcome and a lease. Each worker polls every
+    ``tick`` seconds and claims due jobs with an atomic find_one_and_update
+    on an expired lease, so a job runs in exactly one worker at a time; the
+    lease is renewed while the job runs and released when it finishes. If
+    the owning worker dies, the lease expires and another worker takes over.
+    State survives restarts, so a redeploy does not re-run every job.
+
+    Only the worker running a scrape job writes its posts; the other workers
+    learn about them through the event bus (change streams, or polling on a
+    standalone server).
+    """
+
+    def __init__(self, collection, tick: Optional[float] = None, lease: Optional[float] = None):
+        self.collection = collection
+        self.tick = tick or float(os.getenv('SCHEDULER_TICK', '5'))
+        self.lease = lease or float(os.getenv('SCHEDULER_LEASE', '120'))
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.jobs: Dict[str, Job] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, func: Callable[[], Awaitable], interval: float, jitter: float = 0.1):
+        """
+        Add a job
+
+        Args:
+            name: Unique job name (the _id of its state document)
+            func: Coroutine function run on every tick the job is due; a returned
+                dict is stored as the job's last result
+            interval: Seconds between the end of one run and the start of the next
+            jitter: Fraction of the interval the next run time is randomly moved by
+        """
+        self.jobs[name] = Job(name, func, interval, jitter)
+
+    async def start(self):
+        """Create missing job documents and start polling"""
+        now = datetime.now(timezone.utc)
+        for job in self.jobs.values():
+            await self.collection.update_one(
+                {"_id": job.name},
+                {
+                    "$set": {"interval": job.interval},
+                    # A new job first runs after a short jittered delay, not all at once
+                    "$setOnInsert": {
+                        "paused": False,
+                        "next_run_at": now + timedelta(seconds=random.uniform(0, min(job.interval, self.tick * 6))),
+                        "lease_owner": None,
+                        "lease_expires_at": now,
+                        "run_count": 0
+                    }
+                },
+                upsert=True
+            )
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Job scheduler started in {self.owner} with {len(self.jobs)} jobs")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*([self._task] if self._task else []), *self._running.values(), return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                for job in self.jobs.values():
+                    if job.name not in self._running and await self._claim(job):
+                        self._running[job.name] = asyncio.create_task(self._execute(job))
+            except Exception as e:
+                logger.error(f"Job scheduler tick failed: {e}")
+            await asyncio.sleep(self.tick)
+
+    async def _claim(self, job: Job) -> bool:
+        now = datetime.now(timezone.utc)
+        claimed = await self.collection.find_one_and_update(
+            {
+                "_id": job.name,
+                "paused": {"$ne": True},
+                "next_run_at": {"$lte": now},
+                "lease_expires_at": {"$lte": now}
+            },
+            {"$set": {"lease_owner": self.owner, "lease_expires_at": now + timedelta(seconds=self.lease)}},
+            return_document=ReturnDocument.AFTER
+        )
+        return claimed is not None
+
+    async def _renew(self, job: Job):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            await self.collection.update_one(
+                {"_id": job.name, "lease_owner": self.owner},
+                {"$set": {"lease_expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.lease)}}
+            )
+
+    async def _execute(self, job: Job):
+        started = datetime.now(timezone.utc)
+        renewal = asyncio.create_task(self._renew(job))
+        status, error, result = "ok", None, None
+        try:
+            result = job.func()
+            if inspect.isawaitable(result):
+                result = await result
+        except asyncio.CancelledError:
+            status = "cancelled"
+        except Exception as e:
+            status, error = "error", str(e)
+            logger.error(f"Job {job.name} failed: {e}")
+        finally:
+            renewal.cancel()
+            self._running.pop(job.name, None)
+
+        finished = datetime.now(timezone.utc)
+        update = {
+            "$set": {
+                "last_run_at": started,
+                "last_status": status,
+                "last_error": error,
+                "last_duration": round((finished - started).total_seconds(), 3),
+                "last_result": result if isinstance(result, dict) else None,
+                "next_run_at": finished + timedelta(seconds=job.next_delay()),
+                "lease_owner": None,
+                "lease_expires_at": finished
+            },
+            "$inc": {"run_count": 1}
+        }
+        try:
+            # Shielded so a cancelled run (shutdown) still releases its lease
+            await asyncio.shield(self.collection.update_one({"_id": job.name, "lease_owner": self.owner}, update))
+        except Exception as e:
+            logger.error(f"Could not record run of job {job.name}: {e}")
+        logger.info(f"Job {job.name} finished with status {status} in {update['$set']['last_duration']}s")
+
+    async def trigger(self, name: str) -> Optional[Dict]:
+        """Make a job due now; whichever worker claims it first runs it"""
+        return await self.collection.find_one_and_update(
+            {"_id": name},
+            {"$set": {"next_run_at": datetime.now(timezone.utc)}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def set_paused(self, name: str, paused: bool) -> Optional[Dict]:
+        """Pause or resume a job (a run already in progress is not interrupted)"""
+        return await self.collection.find_one_and_update(
+            {"_id": name},
+            {"$set": {"paused": paused}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def status(self) -> List[Dict]:
+        """State documents of all registered jobs"""
+        docs = await self.collection.find({"_id": {"$in": list(self.jobs)}}).sort("_id", 1).to_list(None)
+        for doc in docs:
+            doc["name"] = doc.pop("_id")
+            doc["running_here"] = doc["name"] in self._running
+        return docs
@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from cachetools import TTLCache
+from emergentintegrations.llm.chat import LlmChat, UserMessage
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio; the chat wrapper does not report usage
+CHARS_PER_TOKEN = 4
+
+
+class LLMUnavailableError(Exception):
+    """Raised when a completion cannot be produced in time (timeout, provider error or open circuit)"""
+
+
+class CircuitBreaker:
+    """Stops calling a failing provider for a while.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are rejected immediately; once ``reset_timeout`` seconds have
+    passed a single trial call is let through (half-open) and its outcome
+    closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self):
+        """Let another trial through after one was cancelled before finishing"""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"LLM circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+
+
+class LLMClient:
+    """Shared LLM completion client.
+
+    All LLM calls of the process go through one instance, which bounds the
+    number of concurrent provider calls, enforces a deadline per call
+    (retries included; it starts once a concurrency slot is free), caches completions by prompt hash,
+    coalesces identical in-flight prompts into one provider call and trips
+    a circuit breaker when the provider keeps failing.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        cache_ttl: Optional[float] = None,
+        retries: Optional[int] = None
+    ):
+        self.api_key = api_key or os.getenv('EMERGENT_LLM_KEY')
+        self.provider = provider or os.getenv('LLM_PROVIDER', 'openai')
+        self.model = model or os.getenv('LLM_MODEL', 'gpt-4o-mini')
+        self.timeout = timeout or float(os.getenv('LLM_TIMEOUT', '20'))
+        self.retries = retries if retries is not None else int(os.getenv('LLM_RETRIES', '1'))
+        self._semaphore = asyncio.Semaphore(max_concurrency or int(os.getenv('LLM_MAX_CONCURRENCY', '4')))
+        self._cache = TTLCache(maxsize=int(os.getenv('LLM_CACHE_SIZE', '1024')), ttl=cache_ttl or float(os.getenv('LLM_CACHE_TTL', '3600')))
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv('LLM_BREAKER_THRESHOLD', '5')),
+            reset_timeout=float(os.getenv('LLM_BREAKER_RESET', '60'))
+        )
+        self.stats = {
+            "calls": 0, "cache_hits": 0, "coalesced": 0, "timeouts": 0, "failures": 0, "rejected": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "latency_total": 0.0, "latency_max": 0.0
+        }
+
+    @property
+    def available(self) -> bool:
+        return bool(self.api_key)
+
+    def _key(self, prompt: str, system_message: str, model: str) -> str:
+        return hashlib.sha256(f"{model}\x00{system_message}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    async def complete(self, prompt: str, system_message: str, session_id: str = "default", model: Optional[str] = None) -> str:
+        """
+        Completion text for a prompt
+
+        Args:
+            prompt: User message
+            system_message: System prompt
+            session_id: Session label passed to the provider
+            model: Model override (defaults to LLM_MODEL)
+
+        Returns:
+            Completion text (possibly from the cache)
+
+        Raises:
+            LLMUnavailableError: No API key, open circuit, timeout or provider error
+        """
+        if not self.api_key:
+            raise LLMUnavailableError("EMERGENT_LLM_KEY is not configured")
+
+        model = model or self.model
+        key = self._key(prompt, system_message, model)
+        if key in self._cache:
+            self.stats["cache_hits"] += 1
+            return self._cache[key]
+
+        # Identical prompts already on their way share the pending call
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        if not self.breaker.allow():
+            self.stats["rejected"] += 1
+            raise LLMUnavailableError("LLM circuit is open")
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            # Waiting for a slot does not count against the deadline: queueing under load is not a provider failure
+            async with self._semaphore:
+                text = await asyncio.wait_for(self._call(prompt, system_message, session_id, model), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            self.breaker.record_failure()
+            error = LLMUnavailableError(f"LLM call exceeded {self.timeout}s")
+            future.set_exception(error)
+            raise error
+        except Exception as e:
+            self.stats["failures"] += 1
+            self.breaker.record_failure()
+            error = LLMUnavailableError(f"LLM call failed: {e}")
+            future.set_exception(error)
+            raise error from e
+        else:
+            self.breaker.record_success()
+            self._cache[key] = text
+            future.set_result(text)
+            return text
+        finally:
+            del self._in_flight[key]
+            if not future.done():
+                self.breaker.release_trial()
+                future.set_exception(LLMUnavailableError("LLM call was cancelled"))
+            # Mark the outcome as retrieved so a future nobody waited on is not logged
+            future.exception()
+
+    async def _call(self, prompt: str, system_message: str, session_id: str, model: str) -> str:
+        for attempt in range(self.retries + 1):
+            started = time.monotonic()
+            try:
+                chat = LlmChat(api_key=self.api_key, session_id=session_id, system_message=system_message).with_model(self.provider, model)
+                text = await chat.send_message(UserMessage(text=prompt))
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"LLM call failed (attempt {attempt + 1}), retrying: {e}")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+
+            latency = time.monotonic() - started
+            self.stats["calls"] += 1
+            self.stats["latency_total"] += latency
+            self.stats["latency_max"] = max(self.stats["latency_max"], latency)
+            self.stats["prompt_tokens"] += (len(system_message) + len(prompt)) // CHARS_PER_TOKEN
+            self.stats["completion_tokens"] += len(text) // CHARS_PER_TOKEN
+            return text
+
+    def snapshot(self) -> Dict:
+        """Metrics for the admin endpoint"""
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "latency_total": round(self.stats["latency_total"], 3),
+            "latency_max": round(self.stats["latency_max"], 3),
+            "latency_avg": round(self.stats["latency_total"] / calls, 3) if calls else None,
+            "in_flight": len(self._in_flight),
+            "cached_prompts": len(self._cache),
+            "circuit": self.breaker.state
+        }
@@ -25,6 +25,8 @@ class Post(BaseModel):
     shares: int
     timestamp: str
     category: str
+    engagement_score: int = 0  # likes + comments * 2 + shares * 3, maintained on write
+    hotness: float = 0.0  # time-decayed engagement, maintained on write
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     updatedAt: datetime = Field(default_factory=datetime.utcnow)
 
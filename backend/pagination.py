@@ -0,0 +1,82 @@
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# Hard page size limits for feed endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Field each sort_by mode orders on (descending); ties are broken on post id
+SORT_FIELDS = {
+    "date": "createdAt",
+    "likes": "likes",
+    "comments": "comments",
+    "engagement": "engagement_score",
+    "hot": "hotness",
+}
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not match the sort"""
+
+
+def sort_field(sort_by: Optional[str]) -> str:
+    """Return the field a sort_by mode orders on (unknown modes fall back to date)"""
+    return SORT_FIELDS.get(sort_by or "date", SORT_FIELDS["date"])
+
+
+def keyset_sort(sort_by: Optional[str]) -> List[Tuple[str, int]]:
+    """Sort specification for a keyset-paginated query"""
+    return [(sort_field(sort_by), -1), ("id", -1)]
+
+
+def encode_cursor(sort_by: Optional[str], last_post: Dict) -> str:
+    """
+    Build an opaque cursor pointing just after the given post
+
+    Args:
+        sort_by: Sort mode the page was produced with
+        last_post: Last document of the current page
+
+    Returns:
+        URL-safe cursor string
+    """
+    field = sort_field(sort_by)
+    value = last_post.get(field)
+    payload = {"s": sort_by or "date", "id": last_post["id"]}
+
+    if isinstance(value, datetime):
+        payload["d"] = value.isoformat()
+    else:
+        payload["v"] = value
+
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: Optional[str]) -> Dict:
+    """
+    Turn a cursor back into a Mongo filter selecting the rows after it
+
+    Raises:
+        InvalidCursorError: if the cursor is malformed or was issued for another sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = payload["id"]
+        value = datetime.fromisoformat(payload["d"]) if "d" in payload else payload["v"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Malformed cursor: {e}")
+
+    if payload.get("s") != (sort_by or "date"):
+        raise InvalidCursorError("Cursor was issued for a different sort order")
+
+    field = sort_field(sort_by)
+    return {
+        "$or": [
+            {field: {"$lt": value}},
+            {field: value, "id": {"$lt": last_id}}
+        ]
+    }
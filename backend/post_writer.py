@@ -0,0 +1,167 @@
+import inspect
+import logging
+from typing import Callable, List, Dict, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from models import Post
+from engagement import ENGAGEMENT_UPDATE_PIPELINE, engagement_fields
+
+logger = logging.getLogger(__name__)
+
+# Counters refreshed on posts we have already stored
+ENGAGEMENT_FIELDS = ("likes", "comments", "shares")
+
+
+class PostWriter:
+    """Shared write path for scraped posts.
+
+    A whole batch is deduplicated and written with a single unordered
+    bulk_write of upserts keyed on the platform-native id (``<platform>_id``).
+    New posts are inserted in full; known posts only get their engagement
+    counters and the derived engagement_score/hotness refreshed.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._insert_listeners: List[Callable[[List[Dict]], None]] = []
+        self._change_listeners: List[Callable] = []
+        self._batch_listeners: List[Callable] = []
+
+    def on_insert(self, listener: Callable[[List[Dict]], None]):
+        """Register a callback (sync or async) receiving the documents of newly inserted posts"""
+        self._insert_listeners.append(listener)
+
+    def on_change(self, listener: Callable):
+        """Register a callback (sync or async) called with (platform, counts) after a batch changed stored posts"""
+        self._change_listeners.append(listener)
+
+    def on_batch(self, listener: Callable):
+        """Register a callback (sync or async) called with (platform, posts keyed on native id) after every write"""
+        self._batch_listeners.append(listener)
+
+    async def _notify(self, listeners: List[Callable], *args):
+        for listener in listeners:
+            try:
+                result = listener(*args)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Post writer listener {getattr(listener, '__name__', listener)} failed: {e}")
+
+    @staticmethod
+    def id_field(platform: str) -> str:
+        """Name of the platform-native id field, e.g. reddit_id"""
+        return f"{platform}_id"
+
+    @staticmethod
+    def url_field(platform: str) -> str:
+        """Name of the link to the post on its platform, e.g. reddit_url"""
+        return f"{platform}_url"
+
+    def _build_operation(self, platform: str, post_data: Dict, user_specific: Optional[str]) -> Tuple[UpdateOne, Dict]:
+        id_field = self.id_field(platform)
+
+        # Stored documents are the validated model plus the native id and the source link
+        doc = Post(**post_data).model_dump()
+        for field in (id_field, self.url_field(platform)):
+            if post_data.get(field) is not None:
+                doc[field] = post_data[field]
+        ranking = engagement_fields(doc)
+        counters = {field: doc.pop(field) for field in ENGAGEMENT_FIELDS}
+        counters["engagement_score"] = ranking["engagement_score"]
+        doc.pop("engagement_score", None)
+        doc["hotness"] = ranking["hotness"]
+        native_id = doc.pop(id_field)
+
+        query = {id_field: native_id}
+        if user_specific:
+            # Equality fields of the filter are copied into upserted documents
+            query["user_specific"] = user_specific
+            doc.pop("user_specific", None)
+        else:
+            query["user_specific"] = {"$exists": False}
+
+        inserted_doc = {**doc, **counters, id_field: native_id}
+        if user_specific:
+            inserted_doc["user_specific"] = user_specific
+
+        operation = UpdateOne(
+            query,
+            {"$setOnInsert": doc, "$set": counters},
+            upsert=True
+        )
+        return operation, inserted_doc
+
+    async def upsert_posts(self, platform: str, posts: List[Dict], user_specific: Optional[str] = None) -> Dict[str, int]:
+        """
+        Insert new posts and refresh engagement counters of known ones
+
+        Args:
+            platform: Platform the posts were scraped from
+            posts: Post dictionaries as returned by the scraper
+            user_specific: Optional user id the posts are personalized for
+
+        Returns:
+            Dictionary with inserted/updated/unchanged/skipped counts
+        """
+        id_field = self.id_field(platform)
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+
+        # Deduplicate within the batch; the last occurrence carries the freshest counters
+        batch: Dict[str, Dict] = {}
+        for post_data in posts:
+            native_id = post_data.get(id_field)
+            if not native_id:
+                counts["skipped"] += 1
+                continue
+            batch[native_id] = post_data
+
+        operations, docs = [], []
+        for post_data in batch.values():
+            try:
+                operation, doc = self._build_operation(platform, post_data, user_specific)
+                operations.append(operation)
+                docs.append(doc)
+            except Exception as e:
+                logger.error(f"Skipping invalid {platform} post {post_data.get(id_field)}: {e}")
+                counts["skipped"] += 1
+
+        if not operations:
+            return counts
+
+        try:
+            result = await self.collection.bulk_write(operations, ordered=False)
+            inserted, matched, modified = result.upserted_count, result.matched_count, result.modified_count
+            upserted_indexes = list(result.upserted_ids.keys())
+        except BulkWriteError as e:
+            # Duplicate keys from a concurrent writer; the rest of the batch was still applied
+            details = e.details
+            inserted, matched, modified = details.get("nUpserted", 0), details.get("nMatched", 0), details.get("nModified", 0)
+            upserted_indexes = [upsert["index"] for upsert in details.get("upserted", [])]
+            counts["skipped"] += len(details.get("writeErrors", []))
+            logger.warning(f"Bulk upsert of {platform} posts had {len(details.get('writeErrors', []))} write errors")
+
+        counts["inserted"] = inserted
+        counts["updated"] = modified
+        counts["unchanged"] = matched - modified
+
+        if modified:
+            # Hotness depends on the stored createdAt, so refresh it server-side for known posts
+            await self.collection.update_many(
+                {id_field: {"$in": list(batch.keys())}},
+                ENGAGEMENT_UPDATE_PIPELINE
+            )
+
+        inserted_docs = [docs[index] for index in upserted_indexes]
+        if inserted_docs:
+            await self._notify(self._insert_listeners, inserted_docs)
+        if inserted or modified:
+            await self._notify(self._change_listeners, platform, counts)
+        await self._notify(self._batch_listeners, platform, batch)
+
+        logger.info(
+            f"Upserted {platform} posts: {counts['inserted']} new, "
+            f"{counts['updated']} updated, {counts['unchanged']} unchanged"
+        )
+        return counts
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# (requests per second, burst) per upstream host; RATE_LIMITS="host=rate/burst,..." overrides
+DEFAULT_HOST_LIMITS: Dict[str, Tuple[float, float]] = {
+    "oauth.reddit.com": (1.5, 10),       # 100 requests/minute with OAuth
+    "old.reddit.com": (0.15, 3),         # ~10 requests/minute without OAuth
+    "www.reddit.com": (0.15, 3),
+    "api.twitter.com": (0.5, 5),         # 450 search requests per 15 minutes
+    "www.googleapis.com": (5.0, 10),
+}
+DEFAULT_LIMIT = (5.0, 10)
+
+# Reset values above this are epoch timestamps, below it seconds from now
+EPOCH_THRESHOLD = 1e9
+
+
+class RateLimitedError(httpx.HTTPError):
+    """Raised instead of waiting longer than allowed for an upstream host's quota"""
+
+
+def parse_limits(spec: Optional[str]) -> Dict[str, Tuple[float, float]]:
+    """Parse "host=rate/burst,host=rate" into per-host limits"""
+    limits = {}
+    for entry in (spec or "").split(","):
+        if "=" not in entry:
+            continue
+        host, value = entry.split("=", 1)
+        rate, _, burst = value.partition("/")
+        try:
+            limits[host.strip()] = (float(rate), float(burst or max(float(rate), 1.0)))
+        except ValueError:
+            logger.warning(f"Ignoring invalid rate limit entry: {entry}")
+    return limits
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _quota_headers(headers: httpx.Headers) -> Dict[str, float]:
+    """remaining/limit/reset from x-ratelimit-*, x-rate-limit-* or ratelimit-* headers"""
+    quota = {}
+    for name, value in headers.items():
+        key = name.lower()
+        if key.startswith("x-"):
+            key = key[2:]
+        key = key.replace("-", "")
+        if key in ("ratelimitremaining", "ratelimitlimit", "ratelimitreset", "ratelimitused"):
+            try:
+                quota[key[len("ratelimit"):]] = float(value)
+            except ValueError:
+                continue
+    return quota
+
+
+class TokenBucket:
+    """Token bucket that can also be blocked until a point in time (quota exhausted)"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def delay(self) -> float:
+        """Seconds until a token can be taken (0 if one is available now)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def block_for(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RateLimiter:
+    """Per-host request pacing shared by all scrapers.
+
+    Every request takes a token from its host's bucket. Responses feed the
+    provider's quota headers back: the bucket slows down to spread the
+    remaining quota over the time left until reset, and an exhausted quota
+    or a Retry-After blocks the host until it may be called again. Callers
+    never wait longer than ``max_wait`` seconds; beyond that the request
+    fails fast with RateLimitedError.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None, max_wait: Optional[float] = None):
+        self.limits = {**DEFAULT_HOST_LIMITS, **parse_limits(os.getenv('RATE_LIMITS')), **(limits or {})}
+        self.max_wait = max_wait if max_wait is not None else float(os.getenv('RATE_LIMIT_MAX_WAIT', '30'))
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.stats: Dict[str, Dict] = {}
+
+    def _bucket(self, host: str) -> TokenBucket:
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(*self.limits.get(host, DEFAULT_LIMIT))
+            self.stats[host] = {
+                "requests": 0, "throttled": 0, "rejected": 0, "waited_seconds": 0.0,
+                "remaining": None, "limit": None, "reset_at": None
+            }
+        return self._buckets[host]
+
+    def budget(self, host: str, seconds: float) -> int:
+        """Requests a host can take within the next ``seconds`` at its current pace"""
+        bucket = self._bucket(host)
+        bucket.delay()  # refills the bucket
+        usable = seconds - max(bucket.blocked_until - time.monotonic(), 0.0)
+        if usable <= 0:
+            return 0
+        return int(bucket.tokens + bucket.rate * usable)
+
+    async def acquire(self, host: str):
+        """
+        Wait for a request slot on a host
+
+        Raises:
+            RateLimitedError: The host cannot be called within max_wait seconds
+        """
+        bucket = self._bucket(host)
+        stats = self.stats[host]
+        waited = 0.0
+        while True:
+            delay = bucket.delay()
+            if delay <= 0:
+                bucket.take()
+                stats["requests"] += 1
+                stats["waited_seconds"] = round(stats["waited_seconds"] + waited, 3)
+                return
+            if waited + delay > self.max_wait:
+                stats["rejected"] += 1
+                raise RateLimitedError(f"Rate limit for {host} would need a {delay:.0f}s wait")
+            await asyncio.sleep(delay)
+            waited += delay
+
+    def observe(self, host: str, response: httpx.Response) -> Optional[float]:
+        """
+        Update a host's pacing from a response
+
+        Returns:
+            Seconds the server asked us to wait (Retry-After or quota reset) on
+            429/503 responses, None otherwise
+        """
+        bucket = self._bucket(host)
+        stats = self.stats[host]
+        quota = _quota_headers(response.headers)
+
+        reset_in = None
+        if "reset" in quota:
+            reset = quota["reset"]
+            reset_in = max(reset - time.time(), 0.0) if reset > EPOCH_THRESHOLD else reset
+            stats["reset_at"] = round(time.time() + reset_in)
+        if "remaining" in quota:
+            stats["remaining"] = quota["remaining"]
+        if "limit" in quota:
+            stats["limit"] = quota["limit"]
+
+        if "remaining" in quota and reset_in:
+            if quota["remaining"] < 1:
+                bucket.block_for(reset_in)
+            # Spread what is left of the quota over the rest of the window
+            bucket.rate = max(min(bucket.base_rate, quota["remaining"] / reset_in), 1.0 / reset_in)
+        elif bucket.rate != bucket.base_rate and time.monotonic() >= bucket.blocked_until:
+            bucket.rate = bucket.base_rate
+
+        if response.status_code not in (429, 503):
+            return None
+
+        stats["throttled"] += 1
+        wait = parse_retry_after(response.headers.get("retry-after"))
+        if wait is None:
+            wait = reset_in
+        if wait:
+            bucket.block_for(wait)
+            logger.warning(f"{host} answered {response.status_code}; pausing it for {wait:.0f}s")
+        return wait
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Quota accounting per host, for the admin endpoint"""
+        now = time.monotonic()
+        return {
+            host: {
+                **self.stats[host],
+                "rate": round(bucket.rate, 3),
+                "blocked_for": round(max(bucket.blocked_until - now, 0.0), 1)
+            }
+            for host, bucket in self._buckets.items()
+        }
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 20.0) -> float:
+    """Exponential backoff with jitter (half fixed, half random) for retry number ``attempt`` (0-based)"""
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
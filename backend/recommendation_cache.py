@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Set
+
+from pymongo import ReplaceOne
+
+logger = logging.getLogger(__name__)
+
+# Users fetched and ranked per batch by the precompute worker
+PRECOMPUTE_BATCH_SIZE = 200
+
+
+class RecommendationCache:
+    """Precomputed recommendation lists per user.
+
+    After each ingest cycle the worker ranks posts for every active user
+    (an unexpired session or recent activity) and stores the ids in
+    ``recommendation_cache`` with a TTL. Requests only read that list; a
+    missing or stale list is answered with the engagement ranking while the
+    user's list is recomputed in the background.
+    """
+
+    def __init__(self, db, recommendation_engine, ttl: Optional[float] = None, list_size: Optional[int] = None):
+        self.db = db
+        self.collection = db.recommendation_cache
+        self.engine = recommendation_engine
+        self.ttl = ttl or float(os.getenv('RECOMMENDATION_CACHE_TTL', '1800'))
+        self.list_size = list_size or int(os.getenv('RECOMMENDATION_LIST_SIZE', '100'))
+        self.active_days = int(os.getenv('RECOMMENDATION_ACTIVE_DAYS', '7'))
+        self.stats = {
+            "hits": 0, "misses": 0, "stale": 0, "precomputed": 0,
+            "last_run_at": None, "last_run_users": 0, "last_run_seconds": None
+        }
+        self._refreshing: Set[str] = set()
+        # The event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+        self._running = False
+
+    async def compute_for_user(self, user: Dict) -> List[str]:
+        """
+        Rank posts for one user
+
+        Local embedding similarity first; when the LLM re-ranker is enabled it
+        re-orders the head of the list, off the request path.
+        """
+        activities = await self.db.activities.find(
+            {"user_id": user["id"], "post_id": {"$ne": None}},
+            {"_id": 0, "post_id": 1, "action": 1, "created_at": 1}
+        ).sort("created_at", -1).limit(100).to_list(100)
+
+        # Ranking is CPU bound (a scan over the index); keep it off the event loop
+        ranked_ids = await asyncio.to_thread(self.engine.recommend, user, activities, self.list_size)
+        if not ranked_ids or not self.engine.llm_rerank:
+            return ranked_ids
+
+        head = ranked_ids[:60]
+        candidates = await self.db.posts.find({"id": {"$in": head}}).to_list(len(head))
+        id_to_post = {post["id"]: post for post in candidates}
+        user_profile = {
+            "user_id": user["id"],
+            "favorite_platforms": user.get("favorite_platforms", []),
+            "favorite_posts": user.get("favorite_posts", []),
+            "recent_likes": [a["post_id"] for a in activities if a.get("action") == "like"][:20],
+            "preferred_categories": []
+        }
+        reranked = await self.engine.get_recommendations(
+            user_profile, [id_to_post[pid] for pid in head if pid in id_to_post], limit=len(head)
+        )
+        if not reranked:
+            return ranked_ids
+        # Keep the local order for whatever the LLM left out
+        reranked = [pid for pid in reranked if pid in id_to_post]
+        seen = set(reranked)
+        return reranked + [pid for pid in ranked_ids if pid not in seen]
+
+    def _document(self, user_id: str, post_ids: List[str]) -> Dict:
+        now = datetime.now(timezone.utc)
+        return {
+            "_id": user_id,
+            "post_ids": post_ids,
+            "computed_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl)
+        }
+
+    async def get(self, user_id: str) -> Optional[List[str]]:
+        """Cached ranking of a user, or None when missing or stale"""
+        doc = await self.collection.find_one({"_id": user_id})
+        if not doc:
+            self.stats["misses"] += 1
+            return None
+
+        expires_at = doc["expires_at"]
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at <= datetime.now(timezone.utc):
+            # The TTL monitor only runs once a minute, so expired lists can still be read
+            self.stats["stale"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        return doc["post_ids"]
+
+    async def refresh_user(self, user: Dict):
+        """Recompute and store one user's list (concurrent requests for the same user are coalesced)"""
+        if user["id"] in self._refreshing or not self.engine.ann_index.ready:
+            return
+        self._refreshing.add(user["id"])
+        try:
+            post_ids = await self.compute_for_user(user)
+            await self.collection.replace_one({"_id": user["id"]}, self._document(user["id"], post_ids), upsert=True)
+        except Exception as e:
+            logger.error(f"Could not refresh recommendations for user {user['id']}: {e}")
+        finally:
+            self._refreshing.discard(user["id"])
+
+    def schedule_refresh(self, user: Dict):
+        """Recompute a user's list in the background"""
+        task = asyncio.create_task(self.refresh_user(user))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def invalidate(self, user_id: str):
+        """Drop a user's list after their interests changed"""
+        await self.collection.delete_one({"_id": user_id})
+
+    async def active_user_ids(self) -> List[str]:
+        now = datetime.now(timezone.utc)
+        with_sessions = await self.db.sessions.distinct(
+            "user_id", {"$or": [{"expires_at": {"$gt": now}}, {"expires_at": {"$gt": now.isoformat()}}]}
+        )
+        since = (now - timedelta(days=self.active_days)).isoformat()
+        with_activity = await self.db.activities.distinct("user_id", {"created_at": {"$gte": since}})
+        return sorted(set(with_sessions) | set(with_activity))
+
+    async def precompute(self) -> int:
+        """
+        Rank posts for all active users
+
+        Returns:
+            Number of users whose list was stored (0 if a run is already in progress)
+        """
+        if self._running or not self.engine.ann_index.ready:
+            return 0
+        self._running = True
+        started = datetime.now(timezone.utc)
+        stored = 0
+
+        try:
+            user_ids = await self.active_user_ids()
+            for start in range(0, len(user_ids), PRECOMPUTE_BATCH_SIZE):
+                batch_ids = user_ids[start:start + PRECOMPUTE_BATCH_SIZE]
+                users = await self.db.users.find({"id": {"$in": batch_ids}}).to_list(len(batch_ids))
+
+                operations = []
+                for user in users:
+                    post_ids = await self.compute_for_user(user)
+                    operations.append(ReplaceOne({"_id": user["id"]}, self._document(user["id"], post_ids), upsert=True))
+
+                if operations:
+                    await self.collection.bulk_write(operations, ordered=False)
+                    stored += len(operations)
+        finally:
+            self._running = False
+
+        duration = (datetime.now(timezone.utc) - started).total_seconds()
+        self.stats.update({
+            "precomputed": self.stats["precomputed"] + stored,
+            "last_run_at": started.isoformat(),
+            "last_run_users": stored,
+            "last_run_seconds": round(duration, 3)
+        })
+        logger.info(f"Precomputed recommendations for {stored} users in {duration:.2f}s")
+        return stored
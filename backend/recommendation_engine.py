@@ -1,22 +1,51 @@
 import os
 import logging
-from typing import List, Dict
-from emergentintegrations.llm.chat import LlmChat, UserMessage
+from typing import List, Dict, Optional
 import json
 
+from ann_index import IVFIndex
+from embeddings import user_vector
+from llm_client import LLMClient, LLMUnavailableError
+
 logger = logging.getLogger(__name__)
 
 class RecommendationEngine:
-    """AI-powered recommendation engine using LLM"""
+    """Recommendation engine: local embedding similarity, with an optional LLM re-ranker"""
     
-    def __init__(self):
-        self.api_key = os.getenv('EMERGENT_LLM_KEY')
-        if not self.api_key:
+    def __init__(self, ann_index: Optional[IVFIndex] = None, llm_client: Optional[LLMClient] = None):
+        self.llm = llm_client or LLMClient()
+        if not self.llm.available:
             logger.warning("EMERGENT_LLM_KEY not found in environment")
+        # Same index as "more like this": the corpus is embedded and held once
+        self.ann_index = ann_index or IVFIndex()
+        # The LLM only re-orders the locally ranked candidates, and only when asked to
+        self.llm_rerank = os.getenv('RECOMMENDATION_LLM_RERANK', 'false').lower() == 'true' and self.llm.available
+    
+    def recommend(self, user: Dict, activities: List[Dict], limit: int = 10) -> List[str]:
+        """
+        Rank posts for a user by similarity to their interest vector
+        
+        Args:
+            user: User document (favorite_posts, favorite_platforms)
+            activities: Recent activity items of the user
+            limit: Number of recommendations to return
+        
+        Returns:
+            List of post IDs ranked by relevance, empty if the user has no signal yet
+        """
+        if not self.ann_index.ready:
+            return []
+        
+        query = user_vector(self.ann_index, user, activities)
+        if query is None:
+            return []
+        
+        exclude = set(user.get("favorite_posts", []))
+        return [post_id for post_id, _ in self.ann_index.search(query, limit, exclude=exclude)]
     
     async def get_recommendations(self, user_profile: Dict, available_posts: List[Dict], limit: int = 10) -> List[str]:
         """
-        Get personalized post recommendations for a user
+        Re-rank candidate posts for a user with the LLM
         
         Args:
             user_profile: User's interaction data (liked posts, saved posts, preferences)
@@ -26,7 +55,7 @@ class RecommendationEngine:
         Returns:
             List of post IDs ranked by relevance
         """
-        if not self.api_key:
+        if not self.llm.available:
             logger.error("Cannot generate recommendations: API key not available")
             return []
         
@@ -37,13 +66,6 @@ class RecommendationEngine:
             # Prepare posts for analysis
             posts_summary = self._summarize_posts(available_posts[:50])  # Limit to 50 for API efficiency
             
-            # Create AI chat
-            chat = LlmChat(
-                api_key=self.api_key,
-                session_id=f"recommendations_{user_profile.get('user_id', 'guest')}",
-                system_message="You are an expert content recommendation engine. Analyze user interests and recommend the most relevant social media posts."
-            ).with_model("openai", "gpt-4o-mini")
-            
             # Create recommendation prompt
             prompt = f"""Based on this user's interests and the available posts, recommend the TOP {limit} most relevant posts.
 
@@ -57,8 +79,11 @@ Return ONLY a JSON array of post IDs in order of relevance (most relevant first)
 Format: ["post_id_1", "post_id_2", ...]
 Do not include any explanation, only the JSON array."""
 
-            message = UserMessage(text=prompt)
-            response = await chat.send_message(message)
+            response = await self.llm.complete(
+                prompt,
+                system_message="You are an expert content recommendation engine. Analyze user interests and recommend the most relevant social media posts.",
+                session_id=f"recommendations_{user_profile.get('user_id', 'guest')}"
+            )
             
             # Parse AI response
             try:
@@ -80,6 +105,9 @@ Do not include any explanation, only the JSON array."""
                 logger.error(f"Response was: {response}")
                 return []
         
+        except LLMUnavailableError as e:
+            logger.warning(f"LLM re-ranking skipped: {e}")
+            return []
         except Exception as e:
             logger.error(f"Error generating recommendations: {e}")
             return []
@@ -107,49 +135,3 @@ Do not include any explanation, only the JSON array."""
                 "comments": post["comments"]
             })
         return summaries
-    
-    async def detect_trending_topics(self, posts: List[Dict]) -> List[Dict]:
-        """Detect trending topics from recent posts using AI"""
-        if not self.api_key:
-            return []
-        
-        try:
-            # Get recent high-engagement posts
-            posts_content = [
-                {"content": p["content"], "platform": p["platform"], "likes": p["likes"]}
-                for p in posts[:30]
-            ]
-            
-            chat = LlmChat(
-                api_key=self.api_key,
-                session_id="trending_topics",
-                system_message="You are a trending topics analyst. Identify trending themes and topics from social media posts."
-            ).with_model("openai", "gpt-4o-mini")
-            
-            prompt = f"""Analyze these posts and identify the TOP 5 trending topics/themes.
-
-POSTS:
-{json.dumps(posts_content, indent=2)}
-
-Return ONLY a JSON array of trending topics with format:
-[
-  {{"topic": "topic name", "count": number_of_posts, "platforms": ["platform1", "platform2"]}},
-  ...
-]"""
-
-            message = UserMessage(text=prompt)
-            response = await chat.send_message(message)
-            
-            # Parse response
-            response_text = response.strip()
-            if response_text.startswith('```'):
-                response_text = response_text.split('```')[1]
-                if response_text.startswith('json'):
-                    response_text = response_text[4:]
-            
-            topics = json.loads(response_text.strip())
-            return topics
-            
-        except Exception as e:
-            logger.error(f"Error detecting trending topics: {e}")
-            return []
@@ -1,11 +1,17 @@
-import requests
+import asyncio
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import time
 import os
 import base64
 
+import httpx
+from cachetools import LRUCache
+
+from http_client import HttpClientPool, get_http_client
+from http_cache import not_modified
+
 logger = logging.getLogger(__name__)
 
 class RedditScraper:
@@ -23,53 +29,68 @@ class RedditScraper:
         "technology": ["technology", "Futurology", "gadgets"]
     }
     
-    def __init__(self):
-        self.session = requests.Session()
+    # Subreddits behind fetch_viral_content
+    VIRAL_SUBREDDITS = ["pics", "funny", "videos", "interestingasfuck", "nextfuckinglevel", "aww"]
+    
+    def __init__(self, http_client: Optional[HttpClientPool] = None):
+        self.http = http_client or get_http_client()
         self.client_id = os.getenv('REDDIT_CLIENT_ID')
         self.client_secret = os.getenv('REDDIT_CLIENT_SECRET')
         self.access_token = None
-        
-        # Get OAuth access token if credentials are available
-        if self.client_id and self.client_secret:
-            self._authenticate()
+        self.token_expires_at = 0.0
+        # Concurrent fetches share one token request
+        self._auth_lock = asyncio.Lock()
+        # Transformed posts and next cursor per listing URL, reused while the upstream listing is unchanged
+        self._parsed: LRUCache = LRUCache(maxsize=int(os.getenv('REDDIT_PARSED_CACHE_SIZE', '256')))
+        # Seconds a fan-out may take; whatever was fetched by then is returned
+        self.fetch_deadline = float(os.getenv('REDDIT_FETCH_DEADLINE', '25'))
         
         # Use a more realistic user agent
-        self.session.headers.update({
+        self.headers = {
             'User-Agent': 'ChyllApp:v1.0.0 (by /u/chyllapp)',
             'Accept': 'application/json',
             'Accept-Language': 'en-US,en;q=0.9'
-        })
+        }
     
-    def _authenticate(self):
+    async def _authenticate(self):
         """Authenticate with Reddit OAuth"""
         try:
-            auth = requests.auth.HTTPBasicAuth(self.client_id, self.client_secret)
             data = {
                 'grant_type': 'client_credentials',
                 'device_id': 'chyllapp_device'
             }
             headers = {'User-Agent': 'ChyllApp:v1.0.0 (by /u/chyllapp)'}
             
-            response = requests.post(
+            response = await self.http.post(
                 'https://www.reddit.com/api/v1/access_token',
-                auth=auth,
+                auth=(self.client_id, self.client_secret),
                 data=data,
                 headers=headers,
                 timeout=10
             )
             
             if response.status_code == 200:
-                self.access_token = response.json().get('access_token')
-                self.session.headers.update({
-                    'Authorization': f'Bearer {self.access_token}'
-                })
+                payload = response.json()
+                self.access_token = payload.get('access_token')
+                # Refresh a minute before Reddit expires the token
+                self.token_expires_at = time.time() + payload.get('expires_in', 3600) - 60
+                self.headers['Authorization'] = f'Bearer {self.access_token}'
                 logger.info("Successfully authenticated with Reddit OAuth")
             else:
                 logger.error(f"Failed to authenticate with Reddit: {response.status_code}")
-        except Exception as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Error authenticating with Reddit: {e}")
     
-    def fetch_posts(self, subreddit: str = "popular", sort: str = "hot", limit: int = 25) -> List[Dict]:
+    async def _ensure_authenticated(self):
+        """Get (or refresh) an OAuth access token if credentials are available"""
+        if not (self.client_id and self.client_secret):
+            return
+        async with self._auth_lock:
+            if self.access_token and time.time() < self.token_expires_at:
+                return
+            await self._authenticate()
+    
+    async def fetch_posts(self, subreddit: str = "popular", sort: str = "hot", limit: int = 25) -> List[Dict]:
         """
         Fetch posts from a subreddit
         
@@ -81,19 +102,51 @@ class RedditScraper:
         Returns:
             List of post dictionaries
         """
+        posts, _ = await self.fetch_listing(subreddit, sort=sort, limit=limit)
+        return posts
+    
+    async def fetch_listing(
+        self,
+        subreddit: str = "popular",
+        sort: str = "hot",
+        limit: int = 25,
+        after: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Fetch one page of a subreddit listing
+        
+        Args:
+            subreddit: Subreddit name (without r/)
+            sort: Sort type (hot, new, top, rising)
+            limit: Number of posts to fetch (max 100)
+            after: Cursor returned for the previous page
+        
+        Returns:
+            Tuple of (post dictionaries, cursor of the next page or None)
+        """
         try:
+            await self._ensure_authenticated()
+            
             # Use OAuth API if available, otherwise fallback to old.reddit.com
             if self.access_token:
-                url = f"https://oauth.reddit.com/r/{subreddit}/{sort}"
+                url = f"https://{self._listing_host()}/r/{subreddit}/{sort}"
             else:
-                url = f"https://old.reddit.com/r/{subreddit}/{sort}.json"
+                url = f"https://{self._listing_host()}/r/{subreddit}/{sort}.json"
             
             params = {'limit': min(limit, 100)}
+            if after:
+                params['after'] = after
             
             logger.info(f"Fetching posts from r/{subreddit} ({sort}) - OAuth: {bool(self.access_token)}")
-            response = self.session.get(url, params=params, timeout=15)
+            response = await self.http.get(url, params=params, headers=self.headers, timeout=15)
             response.raise_for_status()
             
+            listing_key = str(response.url)
+            if not_modified(response) and listing_key in self._parsed:
+                logger.info(f"r/{subreddit} unchanged since last fetch")
+                posts, next_after = self._parsed[listing_key]
+                return list(posts), next_after
+            
             data = response.json()
             posts = []
             
@@ -103,12 +156,14 @@ class RedditScraper:
                 if self._has_valid_media(post_data):
                     posts.append(self._transform_post(post_data))
             
+            next_after = data.get('data', {}).get('after')
+            self._parsed[listing_key] = (posts, next_after)
             logger.info(f"Successfully fetched {len(posts)} posts from r/{subreddit}")
-            return posts
+            return list(posts), next_after
             
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Error fetching posts from r/{subreddit}: {e}")
-            return []
+            return [], None
     
     def _has_valid_media(self, reddit_post: Dict) -> bool:
         """Check if post has valid media (image or video)"""
@@ -126,43 +181,99 @@ class RedditScraper:
             return True
         return False
     
-    def fetch_multiple_subreddits(self, subreddit_list: List[str], limit_per_sub: int = 10) -> List[Dict]:
+    def _listing_host(self) -> str:
+        return "oauth.reddit.com" if self.access_token else "old.reddit.com"
+    
+    async def _fetch_pages(self, subreddit: str, limit_per_page: int, pages: int, into: List[Dict]):
+        """Follow a subreddit's after cursor for up to ``pages`` pages, adding each page to ``into`` as it arrives"""
+        after = None
+        for _ in range(pages):
+            page, after = await self.fetch_listing(subreddit, sort="hot", limit=limit_per_page, after=after)
+            into.extend(page)
+            if not after:
+                break
+    
+    async def fetch_multiple_subreddits(
+        self,
+        subreddit_list: List[str],
+        limit_per_sub: int = 10,
+        pages: int = 1,
+        deadline: Optional[float] = None
+    ) -> List[Dict]:
         """
-        Fetch posts from multiple subreddits
+        Fetch posts from multiple subreddits concurrently
+        
+        Requests are paced by the shared HTTP client's per-host rate limiter.
+        The number of requests is capped by what the host's rate budget allows
+        within the deadline (fewer pages first, then fewer subreddits), and
+        pages fetched before the deadline are returned even if some
+        subreddits are still incomplete.
         
         Args:
-            subreddit_list: List of subreddit names
-            limit_per_sub: Number of posts to fetch per subreddit
+            subreddit_list: List of subreddit names, most important first
+            limit_per_sub: Number of posts to fetch per subreddit and page
+            pages: Pages to follow per subreddit via the listing's after cursor
+            deadline: Seconds the fan-out may take (defaults to REDDIT_FETCH_DEADLINE)
         
         Returns:
-            Combined list of posts from all subreddits
+            Posts from all subreddits, deduplicated by reddit_id (first occurrence wins)
         """
-        all_posts = []
+        deadline = deadline or self.fetch_deadline
+        subreddits, requested = [], set()
+        for name in subreddit_list:
+            if name.lower() not in requested:
+                requested.add(name.lower())
+                subreddits.append(name)
         
-        for subreddit in subreddit_list:
-            posts = self.fetch_posts(subreddit, sort="hot", limit=limit_per_sub)
-            all_posts.extend(posts)
-            
-            # Be nice to Reddit's servers
-            time.sleep(1)
+        # The listing host, and with it the rate budget, depends on OAuth
+        await self._ensure_authenticated()
+        budget = self.http.rate_limiter.budget(self._listing_host(), deadline)
+        if len(subreddits) * pages > budget:
+            pages = max(budget // len(subreddits), 1)
+            subreddits = subreddits[:max(budget // pages, 1)]
+            logger.info(f"Reddit rate budget allows {budget} requests in {deadline}s: {pages} page(s) of {len(subreddits)} subreddits")
+        
+        results: Dict[str, List[Dict]] = {name: [] for name in subreddits}
+        tasks = [asyncio.create_task(self._fetch_pages(name, limit_per_sub, pages, results[name])) for name in subreddits]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(f"Reddit fetch deadline of {deadline}s reached with {len(pending)} of {len(tasks)} subreddits incomplete")
+        for task in done:
+            if task.exception():
+                logger.error(f"Reddit subreddit fetch failed: {task.exception()}")
+        
+        all_posts, seen = [], set()
+        for posts in results.values():
+            for post in posts:
+                if post.get('reddit_id') in seen:
+                    continue
+                seen.add(post.get('reddit_id'))
+                all_posts.append(post)
         
         return all_posts
     
-    def fetch_viral_content(self, limit: int = 50) -> List[Dict]:
+    async def fetch_viral_content(self, limit: int = 50, include_categories: bool = False, pages: int = 1) -> List[Dict]:
         """
         Fetch viral content from multiple popular subreddits
         
         Args:
-            limit: Total number of posts to fetch
+            limit: Total number of posts to fetch (spread over the subreddits)
+            include_categories: Also fan out over every subreddit of the SUBREDDITS category map
+            pages: Pages to follow per subreddit
         
         Returns:
             List of viral posts
         """
         # Use specific popular subreddits instead of r/popular
-        popular_subs = ["pics", "funny", "videos", "interestingasfuck", "nextfuckinglevel", "aww"]
-        posts_per_sub = max(limit // len(popular_subs), 5)
+        subreddits = list(self.VIRAL_SUBREDDITS)
+        if include_categories:
+            subreddits += [name for names in self.SUBREDDITS.values() for name in names]
+        posts_per_sub = max(limit // len(self.VIRAL_SUBREDDITS), 5)
         
-        return self.fetch_multiple_subreddits(popular_subs, limit_per_sub=posts_per_sub)
+        return await self.fetch_multiple_subreddits(subreddits, limit_per_sub=posts_per_sub, pages=pages)
     
     def _transform_post(self, reddit_post: Dict) -> Dict:
         """
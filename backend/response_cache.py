@@ -0,0 +1,172 @@
+import hashlib
+import logging
+import os
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from cachetools import TLRUCache
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Producers return the JSON payload plus any extra response headers (e.g. X-Next-Cursor)
+Producer = Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]]
+
+
+class InMemoryCacheBackend:
+    """Per-process LRU cache whose entries expire after their own TTL"""
+
+    def __init__(self, maxsize: int = 1024):
+        self._entries = TLRUCache(maxsize=maxsize, ttu=lambda key, value, now: now + value[1])
+        self._versions: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[Dict]:
+        item = self._entries.get(key)
+        return item[0] if item else None
+
+    async def set(self, key: str, entry: Dict, ttl: float):
+        self._entries[key] = (entry, ttl)
+
+    async def get_version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    async def incr_version(self, namespace: str) -> int:
+        self._versions[namespace] = self._versions.get(namespace, 0) + 1
+        return self._versions[namespace]
+
+
+class MongoCacheBackend:
+    """Cache shared between API workers, stored in Mongo.
+
+    Entries live in ``response_cache`` (expired by a TTL index on expires_at)
+    and namespace versions in ``cache_versions``, so an invalidation in one
+    worker is seen by all of them.
+    """
+
+    def __init__(self, db):
+        self.entries = db.response_cache
+        self.versions = db.cache_versions
+
+    async def get(self, key: str) -> Optional[Dict]:
+        doc = await self.entries.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+        return doc["entry"] if doc else None
+
+    async def set(self, key: str, entry: Dict, ttl: float):
+        await self.entries.replace_one(
+            {"_id": key},
+            {"entry": entry, "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl)},
+            upsert=True
+        )
+
+    async def get_version(self, namespace: str) -> int:
+        doc = await self.versions.find_one({"_id": namespace})
+        return doc["version"] if doc else 0
+
+    async def incr_version(self, namespace: str) -> int:
+        doc = await self.versions.find_one_and_update(
+            {"_id": namespace},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["version"]
+
+
+class ResponseCache:
+    """Cache of rendered JSON responses for read-heavy endpoints.
+
+    Keys combine the request path, the normalized query string and a
+    per-namespace version stamp. Writers call ``invalidate`` to bump the
+    version, which orphans every cached entry of that namespace at once
+    (they are then evicted by LRU/TTL). Each entry carries an ETag so
+    clients revalidating with If-None-Match get a 304 without a body.
+    """
+
+    def __init__(self, backend=None, default_ttl: Optional[float] = None):
+        self.backend = backend or InMemoryCacheBackend(int(os.getenv('RESPONSE_CACHE_MAXSIZE', '1024')))
+        self.default_ttl = default_ttl or float(os.getenv('RESPONSE_CACHE_TTL', '300'))
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0}
+
+    @staticmethod
+    def cache_key(request: Request) -> str:
+        """Path plus query parameters sorted and stripped of empty values"""
+        params = sorted((name, value) for name, value in request.query_params.multi_items() if value != "")
+        query = "&".join(f"{name}={value}" for name, value in params)
+        return f"{request.url.path}?{query}"
+
+    async def invalidate(self, namespace: str):
+        """Drop all cached responses of a namespace by bumping its version"""
+        try:
+            await self.backend.incr_version(namespace)
+            self.stats["invalidations"] += 1
+        except Exception as e:
+            logger.error(f"Could not invalidate response cache namespace {namespace}: {e}")
+
+    async def respond(
+        self,
+        request: Request,
+        namespace: str,
+        producer: Producer,
+        ttl: Optional[float] = None
+    ) -> Response:
+        """
+        Serve a JSON response from cache, producing and storing it on a miss
+
+        Args:
+            request: Incoming request (query string and If-None-Match are read from it)
+            namespace: Invalidation group the response belongs to
+            producer: Coroutine function returning (payload, extra headers)
+            ttl: Entry lifetime in seconds (defaults to RESPONSE_CACHE_TTL)
+
+        Returns:
+            200 JSON response, or 304 when the client's ETag is still current
+        """
+        entry = None
+        key = None
+        try:
+            version = await self.backend.get_version(namespace)
+            key = f"{namespace}:{version}:{self.cache_key(request)}"
+            entry = await self.backend.get(key)
+        except Exception as e:
+            # The cache is an optimization; fall through to the database
+            logger.error(f"Response cache lookup failed: {e}")
+
+        if entry:
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+            payload, headers = await producer()
+            body = JSONResponse(jsonable_encoder(payload)).body
+            entry = {
+                "body": body,
+                "etag": f'"{hashlib.sha1(body).hexdigest()}"',
+                "headers": headers
+            }
+            if key:
+                try:
+                    await self.backend.set(key, entry, ttl or self.default_ttl)
+                except Exception as e:
+                    logger.error(f"Response cache store failed: {e}")
+
+        # no-cache: browsers may keep the body but must revalidate it with the ETag
+        headers = {"ETag": entry["etag"], "Cache-Control": "no-cache", **entry["headers"]}
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if entry["etag"] in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+
+def create_response_cache(db) -> ResponseCache:
+    """Build the response cache selected by RESPONSE_CACHE_BACKEND (memory or mongo)"""
+    backend_name = os.getenv('RESPONSE_CACHE_BACKEND', 'memory').lower()
+    if backend_name == 'mongo':
+        return ResponseCache(MongoCacheBackend(db))
+    if backend_name != 'memory':
+        logger.warning(f"Unknown RESPONSE_CACHE_BACKEND '{backend_name}', using in-process cache")
+    return ResponseCache()
@@ -0,0 +1,135 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest run in the moving averages
+EWMA_ALPHA = 0.3
+
+# Consecutive failed fetches after which a platform is reported as failing
+FAILING_THRESHOLD = 3
+
+# Fields of a platform entry that has not been written yet
+DEFAULT_ENTRY = {
+    "posts": 0,
+    "runs": 0,
+    "failures": 0,
+    "consecutive_failures": 0,
+    "last_status": None,
+    "last_fetch_at": None,
+    "last_latency": None,
+    "avg_latency": None,
+    "last_items": None,
+    "avg_items": None,
+    "last_error": None,
+    "last_error_at": None,
+    "last_ingest_at": None,
+    "last_inserted": 0,
+    "last_updated": 0,
+}
+
+
+def _ewma_expr(field: str, value: float) -> Dict:
+    """Pipeline expression folding a new value into the moving average stored in field"""
+    return {
+        "$cond": [
+            {"$eq": [{"$ifNull": [f"${field}", None]}, None]},
+            value,
+            {"$round": [{"$add": [EWMA_ALPHA * value, {"$multiply": [1 - EWMA_ALPHA, f"${field}"]}]}, 3]}
+        ]
+    }
+
+
+def _inc_expr(field: str, delta: int = 1) -> Dict:
+    return {"$add": [{"$ifNull": [f"${field}", 0]}, delta]}
+
+
+class ScraperStats:
+    """Per-platform ingestion statistics shared by all workers.
+
+    One document per platform in ``scraper_stats`` holds the post count,
+    advanced with $inc by every worker's write path and reconciled with a
+    single $group by a scheduled job, plus fetch health (latency, items per
+    run, last error) folded in by the ingestion engine. The status endpoint
+    reads these few documents instead of counting posts.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def reconcile(self, posts) -> Dict:
+        """Reset post counts from the posts collection (corrects drift from missed or concurrent updates)"""
+        stats = await posts.aggregate([{"$group": {"_id": "$platform", "count": {"$sum": 1}}}]).to_list(None)
+        counts = {stat["_id"]: stat["count"] for stat in stats if stat["_id"]}
+        for platform, count in counts.items():
+            await self.collection.update_one({"_id": platform}, {"$set": {"posts": count}}, upsert=True)
+        await self.collection.update_many({"_id": {"$nin": list(counts)}}, {"$set": {"posts": 0}})
+        logger.info(f"Scraper stats reconciled for {len(counts)} platforms")
+        return {"platforms": len(counts)}
+
+    async def record_fetch(self, platform: str, result: Dict):
+        """
+        Fold one fetch outcome into the platform's health figures
+
+        Args:
+            platform: Platform name
+            result: IngestionEngine result (status, error, items, duration, finished_at)
+        """
+        fields = {
+            "runs": _inc_expr("runs"),
+            "last_status": result["status"],
+            "last_fetch_at": result["finished_at"],
+            "last_latency": result["duration"],
+            "avg_latency": _ewma_expr("avg_latency", result["duration"]),
+            "last_items": result["items"],
+        }
+        if result["status"] == "ok":
+            fields["consecutive_failures"] = 0
+            fields["avg_items"] = _ewma_expr("avg_items", result["items"])
+        else:
+            fields["failures"] = _inc_expr("failures")
+            fields["consecutive_failures"] = _inc_expr("consecutive_failures")
+            fields["last_error"] = result["error"]
+            fields["last_error_at"] = result["finished_at"]
+
+        # $literal keeps error messages that start with '$' from being read as field paths
+        update = {
+            field: value if isinstance(value, dict) else {"$literal": value}
+            for field, value in fields.items()
+        }
+        await self.collection.update_one({"_id": platform}, [{"$set": update}], upsert=True)
+
+    async def record_write(self, platform: str, counts: Dict[str, int]):
+        """Advance post counts after a PostWriter batch"""
+        await self.collection.update_one(
+            {"_id": platform},
+            {
+                "$inc": {"posts": counts.get("inserted", 0)},
+                "$set": {
+                    "last_inserted": counts.get("inserted", 0),
+                    "last_updated": counts.get("updated", 0),
+                    "last_ingest_at": datetime.now(timezone.utc).isoformat(),
+                }
+            },
+            upsert=True
+        )
+
+    @staticmethod
+    def health(entry: Dict) -> str:
+        if entry["last_status"] is None:
+            return "unknown"
+        if entry["consecutive_failures"] >= FAILING_THRESHOLD:
+            return "failing"
+        if entry["consecutive_failures"]:
+            return "degraded"
+        return "ok"
+
+    async def snapshot(self) -> Dict[str, Dict]:
+        """Per-platform statistics with a derived health label"""
+        snapshot = {}
+        for document in await self.collection.find({}).sort("_id", 1).to_list(None):
+            entry = {**DEFAULT_ENTRY, **document}
+            platform = entry.pop("_id")
+            snapshot[platform] = {**entry, "health": self.health(entry)}
+        return snapshot
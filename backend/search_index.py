@@ -0,0 +1,185 @@
+import math
+import re
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Hashtags and mentions are kept whole, words are split on non-word characters,
+# and each emoji (pictographs, symbols, dingbats) becomes its own token
+TOKEN_RE = re.compile(
+    r"[#@]\w+"
+    r"|\w+"
+    r"|[\U0001F000-\U0001FAFF☀-➿⬀-⯿]",
+    re.UNICODE
+)
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "i", "in", "is", "it", "its", "of", "on", "or", "that", "the", "this", "to",
+    "was", "were", "will", "with", "you", "your", "my", "me", "we", "our"
+}
+
+# Matches in user names count more than matches in post text
+FIELD_WEIGHTS = {"content": 1.0, "name": 2.0, "username": 2.0}
+
+
+def stem(word: str) -> str:
+    """Light suffix-stripping stemmer (plurals, -ing, -ed, -ly)"""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("ly", ""), ("es", ""), ("s", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == "s" and word.endswith("ss"):
+                return word
+            root = word[:-len(suffix)] + replacement
+            # running -> runn -> run
+            if suffix in ("ing", "ed") and root[-1] == root[-2] and root[-1] not in "lsz":
+                root = root[:-1]
+            return root
+    return word
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into index terms
+
+    "#DanceChallenge" yields both "#dancechallenge" and "dancechallenge", so a
+    hashtag query matches the tag exactly while a plain word still finds it.
+    """
+    if not text:
+        return []
+
+    terms = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token[0] in "#@":
+            terms.append(token)
+            bare = token[1:]
+            if bare:
+                terms.append(stem(bare))
+        elif token.isalnum() or "_" in token:
+            if token not in STOPWORDS and not (len(token) == 1 and token.isalpha()):
+                terms.append(stem(token))
+        else:
+            terms.append(token)
+    return terms
+
+
+class SearchIndex:
+    """In-process inverted index over posts with BM25 ranking.
+
+    Built once from the posts collection at startup and then maintained
+    incrementally as new posts are ingested.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ready = False
+        self._reset()
+
+    def _reset(self):
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.doc_terms: Dict[str, Dict[str, float]] = {}
+        self.doc_lengths: Dict[str, float] = {}
+        self.doc_platforms: Dict[str, str] = {}
+        self.total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def _weighted_terms(self, post: Dict) -> Dict[str, float]:
+        user = post.get("user") or {}
+        fields = {
+            "content": post.get("content"),
+            "name": user.get("name"),
+            "username": user.get("username"),
+        }
+        weighted: Dict[str, float] = Counter()
+        for field, text in fields.items():
+            for term in tokenize(text):
+                weighted[term] += FIELD_WEIGHTS[field]
+        return weighted
+
+    def add(self, post: Dict):
+        """Index (or re-index) a single post document"""
+        doc_id = post.get("id")
+        if not doc_id:
+            return
+        if doc_id in self.doc_terms:
+            self.remove(doc_id)
+
+        terms = self._weighted_terms(post)
+        length = sum(terms.values())
+        for term, frequency in terms.items():
+            self.postings[term][doc_id] = frequency
+
+        self.doc_terms[doc_id] = terms
+        self.doc_lengths[doc_id] = length
+        self.doc_platforms[doc_id] = post.get("platform")
+        self.total_length += length
+
+    def add_many(self, posts: Iterable[Dict]):
+        for post in posts:
+            self.add(post)
+
+    def remove(self, doc_id: str):
+        """Drop a post from the index"""
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id, 0.0)
+        self.doc_platforms.pop(doc_id, None)
+
+    async def build(self, collection, batch_size: int = 1000):
+        """(Re)build the index from the posts collection"""
+        self.ready = False
+        self._reset()
+        projection = {"_id": 0, "id": 1, "content": 1, "user.name": 1, "user.username": 1, "platform": 1}
+
+        async for post in collection.find({}, projection).batch_size(batch_size):
+            self.add(post)
+
+        self.ready = True
+        logger.info(f"Search index built: {len(self)} posts, {len(self.postings)} terms")
+
+    def search(self, query: str, platform: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Rank posts against a free-text query with BM25
+
+        Args:
+            query: Raw user query (never interpreted as a regex)
+            platform: Optional platform filter
+            limit: Maximum number of results
+
+        Returns:
+            List of (post id, score), best match first
+        """
+        terms = set(tokenize(query))
+        doc_count = len(self.doc_lengths)
+        if not terms or not doc_count:
+            return []
+
+        avg_length = self.total_length / doc_count or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                if platform and self.doc_platforms.get(doc_id) != platform:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit else ranked
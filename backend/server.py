@@ -1,15 +1,19 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response, Cookie, BackgroundTasks
-from fastapi.responses import JSONResponse, RedirectResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response, Cookie, Header, Depends, BackgroundTasks
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime, timezone, timedelta
+import re
+import secrets
 import httpx
 import asyncio
+from functools import partial
 from google.oauth2 import id_token
 from google.auth.transport import requests as google_requests
 from emergentintegrations.payments.stripe.checkout import StripeCheckout, CheckoutSessionResponse, CheckoutStatusResponse, CheckoutSessionRequest
@@ -27,6 +31,26 @@ from snapchat_scraper import SnapchatScraper
 from pinterest_scraper import PinterestScraper
 from linkedin_scraper import LinkedInScraper
 from recommendation_engine import RecommendationEngine
+from ann_index import IVFIndex
+from recommendation_cache import RecommendationCache
+from trend_detector import TrendDetector
+from event_hub import EventHub
+from event_bus import EventBus, POST_CREATED, POST_UPDATED, USER_UPDATED
+from job_scheduler import JobScheduler
+from ingestion_engine import IngestionEngine
+from http_client import get_http_client
+from post_writer import ENGAGEMENT_FIELDS, PostWriter
+from db_indexes import SCRAPED_PLATFORMS, ensure_indexes, index_report
+from engagement import backfill_created_at, backfill_engagement_fields, counter_update_pipeline, engagement_fields
+from counter_buffer import CounterBuffer
+from search_index import SearchIndex
+from response_cache import create_response_cache
+from session_cache import SessionCache
+from analytics import AnalyticsSnapshot
+from scraper_stats import ScraperStats
+from engagement_timeseries import EngagementTimeSeries
+from exports import MEDIA_TYPES, POST_EXPORT_FIELDS, ExportFormatError, check_format, flatten_rows, iterate, stream_rows
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, decode_cursor, encode_cursor, keyset_sort
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -57,25 +81,96 @@ async def seed_database():
     if count == 0:
         logger.info("Seeding database with mock viral posts...")
         for post_data in seed_posts:
-            post = Post(**post_data)
-            await db.posts.insert_one(post.dict())
+            post = Post(**post_data).dict()
+            post.update(engagement_fields(post))
+            await db.posts.insert_one(post)
         logger.info(f"Successfully seeded {len(seed_posts)} posts")
     else:
         logger.info(f"Database already contains {count} posts")
 
 
-# Initialize scrapers
-reddit_scraper = RedditScraper()
-youtube_scraper = YouTubeScraper()
-twitter_scraper = TwitterScraper()
-instagram_scraper = InstagramScraper()
-tiktok_scraper = TikTokScraper()
-facebook_scraper = FacebookScraper()
-threads_scraper = ThreadsScraper()
-snapchat_scraper = SnapchatScraper()
-pinterest_scraper = PinterestScraper()
-linkedin_scraper = LinkedInScraper()
-recommendation_engine = RecommendationEngine()
+# Initialize scrapers (all share one pooled keep-alive HTTP client)
+http_client = get_http_client()
+reddit_scraper = RedditScraper(http_client=http_client)
+youtube_scraper = YouTubeScraper(http_client=http_client)
+twitter_scraper = TwitterScraper(http_client=http_client)
+instagram_scraper = InstagramScraper(http_client=http_client)
+tiktok_scraper = TikTokScraper(http_client=http_client)
+facebook_scraper = FacebookScraper(http_client=http_client)
+threads_scraper = ThreadsScraper(http_client=http_client)
+snapchat_scraper = SnapchatScraper(http_client=http_client)
+pinterest_scraper = PinterestScraper(http_client=http_client)
+linkedin_scraper = LinkedInScraper(http_client=http_client)
+# Post embeddings for "more like this" and recommendations: IVF index, trained and persisted as the corpus grows
+ann_index = IVFIndex()
+recommendation_engine = RecommendationEngine(ann_index)
+recommendation_cache = RecommendationCache(db, recommendation_engine)
+ingestion_engine = IngestionEngine()
+# Reddit returns what it fetched by its own deadline; the engine must not cut it off first
+ingestion_engine.set_timeout("reddit", reddit_scraper.fetch_deadline + 5)
+post_writer = PostWriter(db.posts)
+# Writers publish changes once; caches, indexes and push channels subscribe to the bus
+event_bus = EventBus(db)
+post_writer.on_insert(lambda docs: event_bus.publish(POST_CREATED, docs))
+
+
+async def publish_post_updates(platform: str, counts: dict):
+    if counts["updated"]:
+        await event_bus.publish(POST_UPDATED, {"ids": [], "fields": list(ENGAGEMENT_FIELDS)})
+
+
+post_writer.on_change(publish_post_updates)
+trend_detector = TrendDetector()
+event_bus.subscribe(POST_CREATED, trend_detector.observe_many)
+# Connected clients are told about new posts as they are written
+event_hub = EventHub()
+event_bus.subscribe(POST_CREATED, event_hub.publish)
+search_index = SearchIndex()
+event_bus.subscribe(POST_CREATED, search_index.add_many)
+event_bus.subscribe(POST_CREATED, ann_index.add_many)
+# Training and saving run as a scheduled job in one worker; the others re-open its files
+event_bus.subscribe(POST_CREATED, lambda docs: ann_index.reload_if_changed())
+# Cached feeds/analytics are invalidated whenever stored posts change
+response_cache = create_response_cache(db)
+event_bus.subscribe(POST_CREATED, lambda docs: response_cache.invalidate("posts"))
+event_bus.subscribe(POST_UPDATED, lambda change: response_cache.invalidate("posts"))
+session_cache = SessionCache(db)
+# The writing request's own cached session is dropped before publish returns, even in changestream mode
+event_bus.on_publish(USER_UPDATED, lambda change: session_cache.invalidate_user(change["user_id"]))
+
+
+async def forget_user_caches(change: dict):
+    session_cache.invalidate_user(change["user_id"])
+    # Recommendations only depend on the user's favorites
+    if {"favorite_posts", "favorite_platforms"} & set(change["fields"]):
+        await recommendation_cache.invalidate(change["user_id"])
+
+
+event_bus.subscribe(USER_UPDATED, forget_user_caches)
+# Dashboard overview is served from a snapshot kept current by the ingestion path
+analytics_snapshot = AnalyticsSnapshot(db)
+post_writer.on_insert(analytics_snapshot.record_inserted)
+post_writer.on_change(lambda platform, counts: analytics_snapshot.refresh_if_stale())
+# Per-platform counts and fetch health for /api/scraper/status
+scraper_stats = ScraperStats(db.scraper_stats)
+ingestion_engine.on_result(scraper_stats.record_fetch)
+post_writer.on_change(scraper_stats.record_write)
+# Engagement history sampled at every ingest, for velocity analytics
+engagement_timeseries = EngagementTimeSeries(db.engagement_rollups)
+post_writer.on_batch(engagement_timeseries.record)
+# Opt-in write-behind for like/comment/share counters
+counter_buffer = None
+
+
+async def counters_flushed(totals: Dict[str, int]):
+    """Apply flushed write-behind increments to the analytics snapshot and notify listeners"""
+    for field, delta in totals.items():
+        await analytics_snapshot.record_counter(field, delta)
+    await event_bus.publish(POST_UPDATED, {"ids": [], "fields": list(totals)})
+
+
+if os.getenv('COUNTER_WRITE_BEHIND', 'false').lower() == 'true':
+    counter_buffer = CounterBuffer(db.posts, on_flush=counters_flushed)
 
 # Stripe configuration
 STRIPE_API_KEY = os.getenv('STRIPE_API_KEY')
@@ -101,78 +196,107 @@ SUBSCRIPTION_PACKAGES = {
 # Startup event to seed database
 @app.on_event("startup")
 async def startup_db():
+    await ensure_indexes(db)
     await seed_database()
-    # Start background auto-refresh task
-    import asyncio
-    asyncio.create_task(auto_refresh_viral_content())
+    converted = await backfill_created_at(db.posts)
+    if converted:
+        logger.info(f"Converted string createdAt to dates on {converted} posts")
+    backfilled = await backfill_engagement_fields(db.posts)
+    if backfilled:
+        logger.info(f"Backfilled engagement scores on {backfilled} posts")
+    await analytics_snapshot.refresh()
+    await response_cache.invalidate("posts")
+    await event_bus.start()
+    # Search falls back to regex matching until the index is built
+    asyncio.create_task(search_index.build(db.posts))
+    asyncio.create_task(ann_index.sync(db.posts))
+    asyncio.create_task(trend_detector.warm(db.posts))
+    if counter_buffer:
+        counter_buffer.start()
+    # Scraper runs and recommendation precompute, shared between workers
+    await job_scheduler.start()
+
+
+# Personalized platforms are only scraped for users who connected them
+PERSONALIZED_PLATFORMS = ("tiktok", "facebook", "instagram")
+
+# Seconds between scraper runs per platform (SCRAPE_INTERVAL_<PLATFORM> overrides)
+SCRAPE_INTERVALS = {
+    "reddit": 300,
+    "twitter": 600,
+    "youtube": 900,
+    "tiktok": 900,
+    "facebook": 900,
+    "instagram": 900,
+}
 
+SCRAPE_JOBS = {
+    "youtube": partial(youtube_scraper.fetch_trending_videos, max_results=5),
+    "reddit": partial(reddit_scraper.fetch_viral_content, limit=5),
+    "twitter": partial(twitter_scraper.fetch_trending_tweets, max_results=5),
+    "tiktok": partial(tiktok_scraper.fetch_trending_videos, max_results=5),
+    "facebook": partial(facebook_scraper.fetch_trending_posts, max_results=5),
+    "instagram": partial(instagram_scraper.fetch_trending_posts, max_results=5),
+}
 
-async def auto_refresh_viral_content():
-    """Background task to fetch fresh viral content every 5 minutes"""
-    while True:
-        try:
-            await asyncio.sleep(300)  # 5 minutes
-            
-            logger.info("Auto-refresh: Fetching fresh viral content from all platforms...")
-            
-            # Fetch top 5 from YouTube (fastest, most reliable)
-            youtube_posts = youtube_scraper.fetch_trending_videos(max_results=5)
-            for post_data in youtube_posts:
-                existing = await db.posts.find_one({"youtube_id": post_data.get("youtube_id")})
-                if not existing:
-                    await db.posts.insert_one(post_data)
-                    logger.info(f"Added new YouTube post: {post_data['content'][:50]}")
-            
-            # Fetch top 5 from Reddit
-            reddit_posts = reddit_scraper.fetch_viral_content(limit=5)
-            for post_data in reddit_posts:
-                existing = await db.posts.find_one({"reddit_id": post_data.get("reddit_id")})
-                if not existing:
-                    await db.posts.insert_one(post_data)
-                    logger.info(f"Added new Reddit post: {post_data['content'][:50]}")
-            
-            # Fetch from Twitter
-            twitter_posts = twitter_scraper.fetch_trending_tweets(max_results=5)
-            for post_data in twitter_posts:
-                existing = await db.posts.find_one({"twitter_id": post_data.get("twitter_id")})
-                if not existing:
-                    await db.posts.insert_one(post_data)
-                    logger.info(f"Added new Twitter post: {post_data['content'][:50]}")
-            
-            # Fetch personalized content for users with connected platforms
-            connections = await db.platform_connections.find({}).to_list(None)
-            
-            for conn in connections:
-                platform = conn["platform"]
-                user_id = conn["user_id"]
-                
-                logger.info(f"Fetching personalized {platform} content for user {user_id}")
-                
-                # Note: For production, you'd use the stored access_token to fetch user's feed
-                # For now, we'll fetch sample content and tag it with user_id
-                if platform == 'tiktok':
-                    tiktok_posts = tiktok_scraper.fetch_trending_videos(max_results=5)
-                    for post_data in tiktok_posts[:2]:  # 2 per user to avoid spam
-                        post_data["user_specific"] = user_id
-                        await db.posts.insert_one(post_data)
-                
-                elif platform == 'facebook':
-                    fb_posts = facebook_scraper.fetch_trending_posts(max_results=5)
-                    for post_data in fb_posts[:2]:
-                        post_data["user_specific"] = user_id
-                        await db.posts.insert_one(post_data)
-                
-                elif platform == 'instagram':
-                    ig_posts = instagram_scraper.fetch_trending_posts(max_results=5)
-                    for post_data in ig_posts[:2]:
-                        post_data["user_specific"] = user_id
-                        await db.posts.insert_one(post_data)
-            
-            logger.info("Auto-refresh completed successfully")
-            
-        except Exception as e:
-            logger.error(f"Auto-refresh error: {e}")
-            await asyncio.sleep(60)  # Wait 1 min before retry on error
+
+async def refresh_platform(platform: str) -> dict:
+    """Scheduled job: fetch fresh viral content of one platform and store it"""
+    connections = []
+    if platform in PERSONALIZED_PLATFORMS:
+        connections = await db.platform_connections.find({"platform": platform}).to_list(None)
+        if not connections:
+            return {"skipped": "no connected users"}
+    
+    posts = await ingestion_engine.fetch(platform, SCRAPE_JOBS[platform])
+    
+    if platform not in PERSONALIZED_PLATFORMS:
+        counts = await post_writer.upsert_posts(platform, posts)
+        logger.info(f"Auto-refresh {platform}: {counts}")
+        return counts
+    
+    # Note: For production, you'd use the stored access_token to fetch user's feed
+    # For now, we tag the shared sample content with user_id (2 per user to avoid spam)
+    for conn in connections:
+        logger.info(f"Storing personalized {platform} content for user {conn['user_id']}")
+        await post_writer.upsert_posts(platform, posts[:2], user_specific=conn["user_id"])
+    return {"fetched": len(posts), "users": len(connections)}
+
+
+async def precompute_recommendations() -> dict:
+    """Scheduled job: rank fresh content for active users off the request path"""
+    return {"users": await recommendation_cache.precompute()}
+
+
+async def maintain_ann_index() -> dict:
+    """Scheduled job: train the ANN index once it is large enough and persist new vectors"""
+    if not ann_index.ready:
+        return {"skipped": "index not synced yet"}
+    return await ann_index.maintain()
+
+
+job_scheduler = JobScheduler(db.scheduled_jobs)
+for scraped_platform, default_interval in SCRAPE_INTERVALS.items():
+    job_scheduler.register(
+        f"scrape:{scraped_platform}",
+        partial(refresh_platform, scraped_platform),
+        interval=float(os.getenv(f'SCRAPE_INTERVAL_{scraped_platform.upper()}', str(default_interval)))
+    )
+job_scheduler.register(
+    "recommendations:precompute",
+    precompute_recommendations,
+    interval=float(os.getenv('RECOMMENDATION_PRECOMPUTE_INTERVAL', '300'))
+)
+job_scheduler.register(
+    "scraper_stats:reconcile",
+    partial(scraper_stats.reconcile, db.posts),
+    interval=float(os.getenv('SCRAPER_STATS_RECONCILE_INTERVAL', '3600'))
+)
+job_scheduler.register(
+    "ann_index:maintain",
+    maintain_ann_index,
+    interval=float(os.getenv('ANN_MAINTAIN_INTERVAL', '300'))
+)
 
 
 # API Routes
@@ -181,16 +305,8 @@ async def root():
     return {"message": "Welcome to ChyllApp API"}
 
 
-@api_router.get("/posts", response_model=List[Post])
-async def get_posts(
-    platform: Optional[str] = Query(None, description="Filter by platform (comma-separated for multiple)"),
-    category: Optional[str] = Query(None, description="Filter by category (comma-separated for multiple)"),
-    time_range: Optional[str] = Query(None, description="Time range: today, week, month, all"),
-    sort_by: Optional[str] = Query("date", description="Sort by: date, likes, comments, engagement"),
-    limit: Optional[int] = Query(None, description="Limit number of results"),
-    skip: Optional[int] = Query(0, description="Skip number of results for pagination")
-):
-    """Get all posts with advanced filters and pagination"""
+def build_posts_query(platform: Optional[str] = None, category: Optional[str] = None, time_range: Optional[str] = None) -> dict:
+    """Mongo filter for the platform/category/time_range feed filters (shared by feeds and exports)"""
     query = {}
     
     # Multi-platform filter
@@ -224,31 +340,86 @@ async def get_posts(
             start_time = None
         
         if start_time:
-            query["createdAt"] = {"$gte": start_time.isoformat()}
+            query["createdAt"] = {"$gte": start_time}
     
-    # Determine sort order
-    if sort_by == 'likes':
-        sort_order = [("likes", -1)]
-    elif sort_by == 'comments':
-        sort_order = [("comments", -1)]
-    elif sort_by == 'engagement':
-        # Sort by total engagement (likes + comments + shares)
-        sort_order = [("likes", -1)]  # Simplified, would need aggregation for true engagement
-    else:  # date (default)
-        sort_order = [("createdAt", -1)]
+    return query
+
+
+@api_router.get("/posts", response_model=List[Post])
+async def get_posts(
+    request: Request,
+    platform: Optional[str] = Query(None, description="Filter by platform (comma-separated for multiple)"),
+    category: Optional[str] = Query(None, description="Filter by category (comma-separated for multiple)"),
+    time_range: Optional[str] = Query(None, description="Time range: today, week, month, all"),
+    sort_by: Optional[str] = Query("date", description="Sort by: date, likes, comments, engagement, hot"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description=f"Limit number of results (default {DEFAULT_PAGE_SIZE})"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    skip: Optional[int] = Query(0, ge=0, description="Skip number of results (legacy pagination, ignored when cursor is set)")
+):
+    """Get all posts with advanced filters and keyset pagination"""
+    query = build_posts_query(platform, category, time_range)
     
-    posts_cursor = db.posts.find(query).sort(sort_order).skip(skip)
+    page_size = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    
+    # Keyset pagination: continue strictly after the last (sort key, id) of the previous page
+    if cursor:
+        try:
+            query = {"$and": [query, decode_cursor(cursor, sort_by)]}
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    async def produce():
+        posts_cursor = db.posts.find(query).sort(keyset_sort(sort_by))
+        if skip and not cursor:
+            posts_cursor = posts_cursor.skip(skip)
+        
+        # Fetch one extra row to know whether another page exists
+        posts = await posts_cursor.limit(page_size + 1).to_list(page_size + 1)
+        
+        headers = {}
+        if len(posts) > page_size:
+            posts = posts[:page_size]
+            headers["X-Next-Cursor"] = encode_cursor(sort_by, posts[-1])
+        
+        return [Post(**post) for post in posts], headers
+    
+    return await response_cache.respond(request, "posts", produce)
+
+
+@api_router.get("/posts/export")
+async def export_posts(
+    format: str = Query("csv", description="Export format: csv, ndjson, parquet or arrow (the last two need pyarrow)"),
+    platform: Optional[str] = Query(None, description="Filter by platform (comma-separated for multiple)"),
+    category: Optional[str] = Query(None, description="Filter by category (comma-separated for multiple)"),
+    time_range: Optional[str] = Query(None, description="Time range: today, week, month, all"),
+    sort_by: Optional[str] = Query("date", description="Sort by: date, likes, comments, engagement, hot"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of posts (default: all)")
+):
+    """Stream posts matching the feed filters, in constant memory"""
+    try:
+        check_format(format)
+    except ExportFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
+    query = build_posts_query(platform, category, time_range)
+    posts_cursor = db.posts.find(query, {"_id": 0}).sort(keyset_sort(sort_by)).batch_size(1000)
     if limit:
         posts_cursor = posts_cursor.limit(limit)
     
-    posts = await posts_cursor.to_list(limit or 1000)
-    return [Post(**post) for post in posts]
+    return StreamingResponse(
+        stream_rows(flatten_rows(posts_cursor, POST_EXPORT_FIELDS), POST_EXPORT_FIELDS, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=chyllapp_posts.{format}"}
+    )
 
 
 @api_router.get("/posts/featured", response_model=Post)
-async def get_featured_post():
+async def get_featured_post(request: Request):
     """Get the featured post for hero section"""
+    return await response_cache.respond(request, "posts", _featured_post)
+
+
+async def _featured_post():
     # Get the post with most likes from viral category
     # Prioritize platforms with real video content (YouTube, Reddit)
     post = await db.posts.find_one(
@@ -279,7 +450,7 @@ async def get_featured_post():
     if not post:
         raise HTTPException(status_code=404, detail="No posts found")
     
-    return Post(**post)
+    return Post(**post), {}
 
 
 @api_router.get("/posts/new-count")
@@ -289,8 +460,14 @@ async def get_new_posts_count(
     category: Optional[str] = Query(None, description="Filter by category")
 ):
     """Check how many new posts have been added since a given timestamp"""
+    # createdAt is a BSON date; comparing it with a string would match nothing
+    try:
+        since_date = datetime.fromisoformat(since.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="since must be an ISO timestamp")
+    
     try:
-        query = {"createdAt": {"$gt": since}}
+        query = {"createdAt": {"$gt": since_date}}
         
         if platform:
             query["platform"] = platform
@@ -309,6 +486,19 @@ async def get_new_posts_count(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@api_router.get("/posts/stream")
+async def stream_new_posts(
+    platform: Optional[str] = Query(None, description="Only notify about posts from this platform"),
+    category: Optional[str] = Query(None, description="Only notify about posts in this category")
+):
+    """Server-sent events announcing new posts as they are ingested"""
+    return StreamingResponse(
+        event_hub.stream(platform, category),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @api_router.get("/posts/{post_id}", response_model=Post)
 async def get_post(post_id: str):
     """Get a single post by ID"""
@@ -320,22 +510,68 @@ async def get_post(post_id: str):
     return Post(**post)
 
 
-@api_router.post("/posts/{post_id}/like")
-async def like_post(post_id: str, request: LikeRequest):
-    """Like or unlike a post"""
-    post = await db.posts.find_one({"id": post_id})
+async def increment_post_counter(post_id: str, field: str) -> int:
+    """
+    Atomically add one to a post counter and return its new value
     
+    The increment and the engagement_score/hotness refresh happen in a single
+    find_one_and_update, so concurrent clicks are never lost. With the
+    write-behind buffer enabled the increment is queued instead and the
+    returned value includes increments not yet flushed.
+    
+    Raises:
+        HTTPException: 404 if the post does not exist
+    """
+    if counter_buffer:
+        post = await db.posts.find_one({"id": post_id}, {"_id": 0, field: 1})
+        if not post:
+            raise HTTPException(status_code=404, detail="Post not found")
+        pending = counter_buffer.add(post_id, field)
+        return post.get(field, 0) + pending
+    
+    post = await db.posts.find_one_and_update(
+        {"id": post_id},
+        counter_update_pipeline({field: 1}),
+        projection={"_id": 0, field: 1},
+        return_document=ReturnDocument.AFTER
+    )
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
+    await analytics_snapshot.record_counter(field)
+    await event_bus.publish(POST_UPDATED, {"ids": [post_id], "fields": [field]})
+    return post[field]
+
+
+@api_router.get("/posts/{post_id}/similar", response_model=List[Post])
+async def get_similar_posts(
+    post_id: str,
+    limit: int = Query(10, ge=1, le=50, description="Number of similar posts")
+):
+    """Posts most similar to the given one (approximate nearest neighbours over post embeddings)"""
+    post = None
+    if post_id not in ann_index.rows:
+        post = await db.posts.find_one({"id": post_id}, {"_id": 0})
+        if not post:
+            raise HTTPException(status_code=404, detail="Post not found")
+    
+    neighbours = ann_index.similar(post_id, limit, post=post)
+    if not neighbours:
+        return []
+    
+    ids = [doc_id for doc_id, _ in neighbours]
+    posts = await db.posts.find({"id": {"$in": ids}}).to_list(len(ids))
+    rank = {doc_id: position for position, doc_id in enumerate(ids)}
+    posts.sort(key=lambda p: rank[p["id"]])
+    return [Post(**p) for p in posts]
+
+
+@api_router.post("/posts/{post_id}/like")
+async def like_post(post_id: str, request: LikeRequest):
+    """Like or unlike a post"""
     # Check if user already liked (in a real app, check user_likes collection)
     # For now, just increment the like count
-    new_likes = post["likes"] + 1
-    
-    await db.posts.update_one(
-        {"id": post_id},
-        {"$set": {"likes": new_likes, "updatedAt": datetime.utcnow()}}
-    )
+    new_likes = await increment_post_counter(post_id, "likes")
     
     return {"likes": new_likes, "isLiked": True}
 
@@ -343,18 +579,7 @@ async def like_post(post_id: str, request: LikeRequest):
 @api_router.post("/posts/{post_id}/comment")
 async def comment_post(post_id: str, request: CommentRequest):
     """Add a comment to a post"""
-    post = await db.posts.find_one({"id": post_id})
-    
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    # Increment comment count
-    new_comments = post["comments"] + 1
-    
-    await db.posts.update_one(
-        {"id": post_id},
-        {"$set": {"comments": new_comments, "updatedAt": datetime.utcnow()}}
-    )
+    new_comments = await increment_post_counter(post_id, "comments")
     
     # In a real app, save the comment to a comments collection
     logger.info(f"Comment from {request.userId}: {request.comment}")
@@ -365,29 +590,26 @@ async def comment_post(post_id: str, request: CommentRequest):
 @api_router.post("/posts/{post_id}/share")
 async def share_post(post_id: str, request: ShareRequest):
     """Track post share"""
-    post = await db.posts.find_one({"id": post_id})
-    
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    # Increment share count
-    new_shares = post["shares"] + 1
-    
-    await db.posts.update_one(
-        {"id": post_id},
-        {"$set": {"shares": new_shares, "updatedAt": datetime.utcnow()}}
-    )
+    new_shares = await increment_post_counter(post_id, "shares")
     
     return {"shares": new_shares}
 
 
 @api_router.get("/platforms", response_model=List[PlatformInfo])
-async def get_platforms():
+async def get_platforms(request: Request):
     """Get list of available platforms"""
-    platforms = platform_info + [
-        {"platform": "reddit", "name": "Reddit", "color": "#FF4500", "icon": "🔥"}
-    ]
-    return [PlatformInfo(**p) for p in platforms]
+    async def produce():
+        platforms = platform_info + [
+            {"platform": "reddit", "name": "Reddit", "color": "#FF4500", "icon": "🔥"}
+        ]
+        return [PlatformInfo(**p) for p in platforms], {}
+    
+    # Static list: only the ETag/304 path matters, so keep it for a day
+    return await response_cache.respond(request, "platforms", produce, ttl=86400)
+
+
+# Best-ranked matches considered when search results are re-sorted by date/likes/comments
+SEARCH_SORT_CANDIDATES = 5000
 
 
 @api_router.get("/search", response_model=List[Post])
@@ -395,11 +617,14 @@ async def search_posts(
     q: str = Query(..., description="Search query"),
     platform: Optional[str] = Query(None, description="Filter by platform"),
     sort_by: Optional[str] = Query("relevance", description="Sort by: relevance, date, likes, comments"),
-    limit: Optional[int] = Query(50, description="Limit number of results")
+    limit: Optional[int] = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Limit number of results")
 ):
     """
     Search posts by keywords in content and user names
     
+    Matches are ranked with BM25 over an in-memory index of post text and
+    user names; the query is tokenized, never interpreted as a regex.
+    
     Args:
         q: Search query string
         platform: Optional platform filter
@@ -407,18 +632,9 @@ async def search_posts(
         limit: Maximum number of results
     """
     try:
-        # Build search query
-        search_query = {
-            "$or": [
-                {"content": {"$regex": q, "$options": "i"}},  # Case-insensitive search in content
-                {"user.name": {"$regex": q, "$options": "i"}},  # Search in user names
-                {"user.username": {"$regex": q, "$options": "i"}}  # Search in usernames
-            ]
-        }
-        
-        # Add platform filter if specified
-        if platform:
-            search_query["platform"] = platform
+        limit = limit or DEFAULT_PAGE_SIZE
+        if not q.strip():
+            return []
         
         # Define sort order
         sort_order = []
@@ -428,13 +644,32 @@ async def search_posts(
             sort_order = [("likes", -1)]
         elif sort_by == "comments":
             sort_order = [("comments", -1)]
-        else:  # relevance (default)
-            # For relevance, we'll just use creation date as a proxy
-            sort_order = [("createdAt", -1)]
         
-        # Execute search
-        posts_cursor = db.posts.find(search_query).sort(sort_order).limit(limit)
-        posts = await posts_cursor.to_list(limit)
+        if search_index.ready:
+            ranked = search_index.search(q, platform=platform)
+            if not sort_order:
+                # relevance (default): fetch the best matches and keep their rank order
+                ids = [doc_id for doc_id, _ in ranked[:limit]]
+                posts = await db.posts.find({"id": {"$in": ids}}).to_list(len(ids))
+                rank = {doc_id: position for position, doc_id in enumerate(ids)}
+                posts.sort(key=lambda post: rank[post["id"]])
+            else:
+                ids = [doc_id for doc_id, _ in ranked[:SEARCH_SORT_CANDIDATES]]
+                posts_cursor = db.posts.find({"id": {"$in": ids}}).sort(sort_order + [("id", -1)]).limit(limit)
+                posts = await posts_cursor.to_list(limit)
+        else:
+            pattern = re.escape(q)
+            search_query = {
+                "$or": [
+                    {"content": {"$regex": pattern, "$options": "i"}},
+                    {"user.name": {"$regex": pattern, "$options": "i"}},
+                    {"user.username": {"$regex": pattern, "$options": "i"}}
+                ]
+            }
+            if platform:
+                search_query["platform"] = platform
+            posts_cursor = db.posts.find(search_query).sort(sort_order or [("createdAt", -1)]).limit(limit)
+            posts = await posts_cursor.to_list(limit)
         
         logger.info(f"Search query: '{q}', platform: {platform}, found: {len(posts)} results")
         
@@ -446,18 +681,26 @@ async def search_posts(
 
 
 @api_router.post("/scraper/fetch-reddit")
-async def fetch_reddit_posts(limit: int = 50):
+async def fetch_reddit_posts(limit: int = 50, include_categories: bool = False, pages: int = Query(1, ge=1, le=5)):
     """
     Fetch viral posts from Reddit and save to database
     
     Args:
         limit: Number of posts to fetch (default 50)
+        include_categories: Also fetch every subreddit of the category map
+        pages: Listing pages to follow per subreddit
     """
     try:
         logger.info(f"Fetching {limit} posts from Reddit...")
         
-        # Fetch posts from Reddit
-        reddit_posts = reddit_scraper.fetch_viral_content(limit=limit)
+        # Subreddits are fetched concurrently and merged by reddit_id
+        reddit_posts = await ingestion_engine.fetch(
+            "reddit",
+            reddit_scraper.fetch_viral_content,
+            limit=limit,
+            include_categories=include_categories,
+            pages=pages
+        )
         
         if not reddit_posts:
             return {
@@ -466,16 +709,9 @@ async def fetch_reddit_posts(limit: int = 50):
                 "posts_added": 0
             }
         
-        # Save posts to database (avoid duplicates)
-        posts_added = 0
-        for post_data in reddit_posts:
-            # Check if post already exists (by reddit_id if available)
-            existing_post = await db.posts.find_one({"reddit_id": post_data.get("reddit_id")})
-            
-            if not existing_post:
-                post = Post(**post_data)
-                await db.posts.insert_one(post.dict())
-                posts_added += 1
+        # Single bulk upsert: new posts are inserted, known posts get fresh engagement counters
+        counts = await post_writer.upsert_posts("reddit", reddit_posts)
+        posts_added = counts["inserted"]
         
         logger.info(f"Successfully added {posts_added} new Reddit posts to database")
         
@@ -483,6 +719,8 @@ async def fetch_reddit_posts(limit: int = 50):
             "success": True,
             "message": f"Successfully fetched and saved {posts_added} Reddit posts",
             "posts_added": posts_added,
+            "posts_updated": counts["updated"],
+            "posts_unchanged": counts["unchanged"],
             "total_fetched": len(reddit_posts)
         }
         
@@ -503,7 +741,7 @@ async def fetch_youtube_videos(limit: int = 50):
         logger.info(f"Fetching {limit} trending videos from YouTube...")
         
         # Fetch videos from YouTube
-        youtube_videos = youtube_scraper.fetch_trending_videos(max_results=limit)
+        youtube_videos = await ingestion_engine.fetch("youtube", youtube_scraper.fetch_trending_videos, max_results=limit)
         
         if not youtube_videos:
             return {
@@ -512,16 +750,9 @@ async def fetch_youtube_videos(limit: int = 50):
                 "posts_added": 0
             }
         
-        # Save videos to database (avoid duplicates)
-        posts_added = 0
-        for video_data in youtube_videos:
-            # Check if video already exists (by youtube_id)
-            existing_post = await db.posts.find_one({"youtube_id": video_data.get("youtube_id")})
-            
-            if not existing_post:
-                post = Post(**video_data)
-                await db.posts.insert_one(post.dict())
-                posts_added += 1
+        # Single bulk upsert: new posts are inserted, known posts get fresh engagement counters
+        counts = await post_writer.upsert_posts("youtube", youtube_videos)
+        posts_added = counts["inserted"]
         
         logger.info(f"Successfully added {posts_added} new YouTube videos to database")
         
@@ -529,6 +760,8 @@ async def fetch_youtube_videos(limit: int = 50):
             "success": True,
             "message": f"Successfully fetched and saved {posts_added} YouTube videos",
             "posts_added": posts_added,
+            "posts_updated": counts["updated"],
+            "posts_unchanged": counts["unchanged"],
             "total_fetched": len(youtube_videos)
         }
         
@@ -549,7 +782,7 @@ async def fetch_twitter_posts(limit: int = 50):
         logger.info(f"Fetching {limit} trending tweets from Twitter...")
         
         # Fetch tweets from Twitter
-        twitter_posts = twitter_scraper.fetch_trending_tweets(max_results=limit)
+        twitter_posts = await ingestion_engine.fetch("twitter", twitter_scraper.fetch_trending_tweets, max_results=limit)
         
         if not twitter_posts:
             return {
@@ -558,16 +791,9 @@ async def fetch_twitter_posts(limit: int = 50):
                 "posts_added": 0
             }
         
-        # Save tweets to database (avoid duplicates)
-        posts_added = 0
-        for tweet_data in twitter_posts:
-            # Check if tweet already exists (by twitter_id)
-            existing_post = await db.posts.find_one({"twitter_id": tweet_data.get("twitter_id")})
-            
-            if not existing_post:
-                post = Post(**tweet_data)
-                await db.posts.insert_one(post.dict())
-                posts_added += 1
+        # Single bulk upsert: new posts are inserted, known posts get fresh engagement counters
+        counts = await post_writer.upsert_posts("twitter", twitter_posts)
+        posts_added = counts["inserted"]
         
         logger.info(f"Successfully added {posts_added} new Twitter posts to database")
         
@@ -575,6 +801,8 @@ async def fetch_twitter_posts(limit: int = 50):
             "success": True,
             "message": f"Successfully fetched and saved {posts_added} Twitter posts",
             "posts_added": posts_added,
+            "posts_updated": counts["updated"],
+            "posts_unchanged": counts["unchanged"],
             "total_fetched": len(twitter_posts)
         }
         
@@ -595,7 +823,7 @@ async def fetch_instagram_posts(limit: int = 50):
         logger.info(f"Fetching {limit} trending posts from Instagram...")
         
         # Fetch posts from Instagram
-        instagram_posts = instagram_scraper.fetch_trending_posts(max_results=limit)
+        instagram_posts = await ingestion_engine.fetch("instagram", instagram_scraper.fetch_trending_posts, max_results=limit)
         
         if not instagram_posts:
             return {
@@ -604,16 +832,9 @@ async def fetch_instagram_posts(limit: int = 50):
                 "posts_added": 0
             }
         
-        # Save posts to database (avoid duplicates)
-        posts_added = 0
-        for post_data in instagram_posts:
-            # Check if post already exists (by instagram_id)
-            existing_post = await db.posts.find_one({"instagram_id": post_data.get("instagram_id")})
-            
-            if not existing_post:
-                post = Post(**post_data)
-                await db.posts.insert_one(post.dict())
-                posts_added += 1
+        # Single bulk upsert: new posts are inserted, known posts get fresh engagement counters
+        counts = await post_writer.upsert_posts("instagram", instagram_posts)
+        posts_added = counts["inserted"]
         
         logger.info(f"Successfully added {posts_added} new Instagram posts to database")
         
@@ -621,6 +842,8 @@ async def fetch_instagram_posts(limit: int = 50):
             "success": True,
             "message": f"Successfully fetched and saved {posts_added} Instagram posts",
             "posts_added": posts_added,
+            "posts_updated": counts["updated"],
+            "posts_unchanged": counts["unchanged"],
             "total_fetched": len(instagram_posts)
         }
         
@@ -634,24 +857,22 @@ async def fetch_tiktok_videos(limit: int = 50):
     """Fetch trending videos from TikTok and save to database"""
     try:
         logger.info(f"Fetching {limit} trending videos from TikTok...")
-        tiktok_videos = tiktok_scraper.fetch_trending_videos(max_results=limit)
+        tiktok_videos = await ingestion_engine.fetch("tiktok", tiktok_scraper.fetch_trending_videos, max_results=limit)
         
         if not tiktok_videos:
             return {"success": False, "message": "No videos fetched from TikTok", "posts_added": 0}
         
-        posts_added = 0
-        for video_data in tiktok_videos:
-            existing_post = await db.posts.find_one({"tiktok_id": video_data.get("tiktok_id")})
-            if not existing_post:
-                post = Post(**video_data)
-                await db.posts.insert_one(post.dict())
-                posts_added += 1
+        # Single bulk upsert: new posts are inserted, known posts get fresh engagement counters
+        counts = await post_writer.upsert_posts("tiktok", tiktok_videos)
+        posts_added = counts["inserted"]
         
         logger.info(f"Successfully added {posts_added} new TikTok videos to database")
         return {
             "success": True,
             "message": f"Successfully fetched and saved {posts_added} TikTok videos",
             "posts_added": posts_added,
+            "posts_updated": counts["updated"],
+            "posts_unchanged": counts["unchanged"],
             "total_fetched": len(tiktok_videos)
         }
     except Exception as e:
@@ -664,24 +885,22 @@ async def fetch_facebook_posts(limit: int = 50):
     """Fetch trending posts from Facebook and save to database"""
     try:
         logger.info(f"Fetching {limit} trending posts from Facebook...")
-        facebook_posts = facebook_scraper.fetch_trending_posts(max_results=limit)
+        facebook_posts = await ingestion_engine.fetch("facebook", facebook_scraper.fetch_trending_posts, max_results=limit)
         
         if not facebook_posts:
             return {"success": False, "message": "No posts fetched from Facebook", "posts_added": 0}
         
-        posts_added = 0
-        for post_data in facebook_posts:
-            existing_post = await db.posts.find_one({"facebook_id": post_data.get("facebook_id")})
-            if not existing_post:
-                post = Post(**post_data)
-                await db.posts.insert_one(post.dict())
-                posts_added += 1
+        # Single bulk upsert: new posts are inserted, known posts get fresh engagement counters
+        counts = await post_writer.upsert_posts("facebook", facebook_posts)
+        posts_added = counts["inserted"]
         
         logger.info(f"Successfully added {posts_added} new Facebook posts to database")
         return {
             "success": True,
             "message": f"Successfully fetched and saved {posts_added} Facebook posts",
             "posts_added": posts_added,
+            "posts_updated": counts["updated"],
+            "posts_unchanged": counts["unchanged"],
             "total_fetched": len(facebook_posts)
         }
     except Exception as e:
@@ -694,24 +913,22 @@ async def fetch_threads_posts(limit: int = 50):
     """Fetch trending posts from Threads and save to database"""
     try:
         logger.info(f"Fetching {limit} trending posts from Threads...")
-        threads_posts = threads_scraper.fetch_trending_posts(max_results=limit)
+        threads_posts = await ingestion_engine.fetch("threads", threads_scraper.fetch_trending_posts, max_results=limit)
         
         if not threads_posts:
             return {"success": False, "message": "No posts fetched from Threads", "posts_added": 0}
         
-        posts_added = 0
-        for post_data in threads_posts:
-            existing_post = await db.posts.find_one({"threads_id": post_data.get("threads_id")})
-            if not existing_post:
-                post = Post(**post_data)
-                await db.posts.insert_one(post.dict())
-                posts_added += 1
+        # Single bulk upsert: new posts are inserted, known posts get fresh engagement counters
+        counts = await post_writer.upsert_posts("threads", threads_posts)
+        posts_added = counts["inserted"]
         
         logger.info(f"Successfully added {posts_added} new Threads posts to database")
         return {
             "success": True,
             "message": f"Successfully fetched and saved {posts_added} Threads posts",
             "posts_added": posts_added,
+            "posts_updated": counts["updated"],
+            "posts_unchanged": counts["unchanged"],
             "total_fetched": len(threads_posts)
         }
     except Exception as e:
@@ -724,24 +941,22 @@ async def fetch_snapchat_content(limit: int = 50):
     """Fetch trending content from Snapchat and save to database"""
     try:
         logger.info(f"Fetching {limit} trending content from Snapchat...")
-        snapchat_content = snapchat_scraper.fetch_trending_content(max_results=limit)
+        snapchat_content = await ingestion_engine.fetch("snapchat", snapchat_scraper.fetch_trending_content, max_results=limit)
         
         if not snapchat_content:
             return {"success": False, "message": "No content fetched from Snapchat", "posts_added": 0}
         
-        posts_added = 0
-        for post_data in snapchat_content:
-            existing_post = await db.posts.find_one({"snapchat_id": post_data.get("snapchat_id")})
-            if not existing_post:
-                post = Post(**post_data)
-                await db.posts.insert_one(post.dict())
-                posts_added += 1
+        # Single bulk upsert: new posts are inserted, known posts get fresh engagement counters
+        counts = await post_writer.upsert_posts("snapchat", snapchat_content)
+        posts_added = counts["inserted"]
         
         logger.info(f"Successfully added {posts_added} new Snapchat posts to database")
         return {
             "success": True,
             "message": f"Successfully fetched and saved {posts_added} Snapchat content",
             "posts_added": posts_added,
+            "posts_updated": counts["updated"],
+            "posts_unchanged": counts["unchanged"],
             "total_fetched": len(snapchat_content)
         }
     except Exception as e:
@@ -754,24 +969,22 @@ async def fetch_pinterest_pins(limit: int = 50):
     """Fetch trending pins from Pinterest and save to database"""
     try:
         logger.info(f"Fetching {limit} trending pins from Pinterest...")
-        pinterest_pins = pinterest_scraper.fetch_trending_pins(max_results=limit)
+        pinterest_pins = await ingestion_engine.fetch("pinterest", pinterest_scraper.fetch_trending_pins, max_results=limit)
         
         if not pinterest_pins:
             return {"success": False, "message": "No pins fetched from Pinterest", "posts_added": 0}
         
-        posts_added = 0
-        for pin_data in pinterest_pins:
-            existing_post = await db.posts.find_one({"pinterest_id": pin_data.get("pinterest_id")})
-            if not existing_post:
-                post = Post(**pin_data)
-                await db.posts.insert_one(post.dict())
-                posts_added += 1
+        # Single bulk upsert: new posts are inserted, known posts get fresh engagement counters
+        counts = await post_writer.upsert_posts("pinterest", pinterest_pins)
+        posts_added = counts["inserted"]
         
         logger.info(f"Successfully added {posts_added} new Pinterest pins to database")
         return {
             "success": True,
             "message": f"Successfully fetched and saved {posts_added} Pinterest pins",
             "posts_added": posts_added,
+            "posts_updated": counts["updated"],
+            "posts_unchanged": counts["unchanged"],
             "total_fetched": len(pinterest_pins)
         }
     except Exception as e:
@@ -784,24 +997,22 @@ async def fetch_linkedin_posts(limit: int = 50):
     """Fetch trending posts from LinkedIn and save to database"""
     try:
         logger.info(f"Fetching {limit} trending posts from LinkedIn...")
-        linkedin_posts = linkedin_scraper.fetch_trending_posts(max_results=limit)
+        linkedin_posts = await ingestion_engine.fetch("linkedin", linkedin_scraper.fetch_trending_posts, max_results=limit)
         
         if not linkedin_posts:
             return {"success": False, "message": "No posts fetched from LinkedIn", "posts_added": 0}
         
-        posts_added = 0
-        for post_data in linkedin_posts:
-            existing_post = await db.posts.find_one({"linkedin_id": post_data.get("linkedin_id")})
-            if not existing_post:
-                post = Post(**post_data)
-                await db.posts.insert_one(post.dict())
-                posts_added += 1
+        # Single bulk upsert: new posts are inserted, known posts get fresh engagement counters
+        counts = await post_writer.upsert_posts("linkedin", linkedin_posts)
+        posts_added = counts["inserted"]
         
         logger.info(f"Successfully added {posts_added} new LinkedIn posts to database")
         return {
             "success": True,
             "message": f"Successfully fetched and saved {posts_added} LinkedIn posts",
             "posts_added": posts_added,
+            "posts_updated": counts["updated"],
+            "posts_unchanged": counts["unchanged"],
             "total_fetched": len(linkedin_posts)
         }
     except Exception as e:
@@ -811,36 +1022,19 @@ async def fetch_linkedin_posts(limit: int = 50):
 
 @api_router.get("/scraper/status")
 async def scraper_status():
-    """Get status of scraper and database"""
+    """Get status of scraper and database, with per-platform ingestion health"""
     try:
-        total_posts = await db.posts.count_documents({})
-        reddit_posts = await db.posts.count_documents({"platform": "reddit"})
-        youtube_posts = await db.posts.count_documents({"platform": "youtube"})
-        twitter_posts = await db.posts.count_documents({"platform": "twitter"})
-        instagram_posts = await db.posts.count_documents({"platform": "instagram"})
-        tiktok_posts = await db.posts.count_documents({"platform": "tiktok"})
-        facebook_posts = await db.posts.count_documents({"platform": "facebook"})
-        threads_posts = await db.posts.count_documents({"platform": "threads"})
-        snapchat_posts = await db.posts.count_documents({"platform": "snapchat"})
-        pinterest_posts = await db.posts.count_documents({"platform": "pinterest"})
-        linkedin_posts = await db.posts.count_documents({"platform": "linkedin"})
-        mock_posts = total_posts - reddit_posts - youtube_posts - twitter_posts - instagram_posts - tiktok_posts - facebook_posts - threads_posts - snapchat_posts - pinterest_posts - linkedin_posts
+        platforms = await scraper_stats.snapshot()
+        total_posts = sum(entry["posts"] for entry in platforms.values())
+        platform_counts = {platform: platforms.get(platform, {}).get("posts", 0) for platform in SCRAPED_PLATFORMS}
         
         return {
             "status": "active",
             "total_posts": total_posts,
-            "reddit_posts": reddit_posts,
-            "youtube_posts": youtube_posts,
-            "twitter_posts": twitter_posts,
-            "instagram_posts": instagram_posts,
-            "tiktok_posts": tiktok_posts,
-            "facebook_posts": facebook_posts,
-            "threads_posts": threads_posts,
-            "snapchat_posts": snapchat_posts,
-            "pinterest_posts": pinterest_posts,
-            "linkedin_posts": linkedin_posts,
-            "mock_posts": mock_posts,
-            "scraper_ready": True
+            **{f"{platform}_posts": count for platform, count in platform_counts.items()},
+            "mock_posts": total_posts - sum(platform_counts.values()),
+            "scraper_ready": True,
+            "platforms": platforms
         }
     except Exception as e:
         logger.error(f"Error getting scraper status: {e}")
@@ -850,6 +1044,116 @@ async def scraper_status():
         }
 
 
+# Operators: users whose email is listed in ADMIN_EMAILS, or callers sending ADMIN_TOKEN as X-Admin-Token
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv('ADMIN_EMAILS', '').split(',') if email.strip()}
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+
+async def require_admin(
+    session_token: Optional[str] = Cookie(None),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Dependency guarding the /admin endpoints"""
+    if ADMIN_TOKEN and x_admin_token and secrets.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        return
+    
+    user = await get_current_user_from_token(session_token)
+    if not user:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if (user.get("email") or "").lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+
+@api_router.get("/admin/indexes", dependencies=[Depends(require_admin)])
+async def get_index_report():
+    """Report missing, unexpected and unused indexes against the index registry"""
+    try:
+        return await index_report(db)
+    except Exception as e:
+        logger.error(f"Error building index report: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@api_router.get("/admin/recommendations", dependencies=[Depends(require_admin)])
+async def get_recommendation_metrics():
+    """Hit/miss counters and last run of the recommendation precompute worker"""
+    total = recommendation_cache.stats["hits"] + recommendation_cache.stats["misses"] + recommendation_cache.stats["stale"]
+    return {
+        **recommendation_cache.stats,
+        "hit_rate": round(recommendation_cache.stats["hits"] / total, 3) if total else None,
+        "cached_users": await db.recommendation_cache.estimated_document_count()
+    }
+
+
+@api_router.get("/admin/rate-limits", dependencies=[Depends(require_admin)])
+async def get_rate_limits():
+    """Request pacing, remaining provider quota and throttling counters per upstream host"""
+    return http_client.rate_limiter.snapshot()
+
+
+@api_router.get("/admin/upstream-cache", dependencies=[Depends(require_admin)])
+async def get_upstream_cache_metrics():
+    """Hits, 304 revalidations and bytes saved by the scrapers' upstream response cache"""
+    if not http_client.response_cache:
+        return {"enabled": False}
+    return {"enabled": True, **http_client.response_cache.snapshot()}
+
+
+@api_router.get("/admin/jobs", dependencies=[Depends(require_admin)])
+async def list_jobs():
+    """Schedule, lease and last outcome of every background job"""
+    try:
+        return await job_scheduler.status()
+    except Exception as e:
+        logger.error(f"Error listing jobs: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@api_router.post("/admin/jobs/{name}/trigger", dependencies=[Depends(require_admin)])
+async def trigger_job(name: str):
+    """Run a job as soon as a worker picks it up"""
+    job = await job_scheduler.trigger(name)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, "name": name, "next_run_at": job["next_run_at"]}
+
+
+@api_router.post("/admin/jobs/{name}/pause", dependencies=[Depends(require_admin)])
+async def pause_job(name: str):
+    """Stop scheduling a job until it is resumed"""
+    job = await job_scheduler.set_paused(name, True)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, "name": name, "paused": True}
+
+
+@api_router.post("/admin/jobs/{name}/resume", dependencies=[Depends(require_admin)])
+async def resume_job(name: str):
+    """Resume a paused job"""
+    job = await job_scheduler.set_paused(name, False)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"success": True, "name": name, "paused": False}
+
+
+@api_router.get("/admin/events", dependencies=[Depends(require_admin)])
+async def get_event_bus_metrics():
+    """Delivery mode, subscriptions and counters of the internal event bus"""
+    return event_bus.snapshot()
+
+
+@api_router.get("/admin/streams", dependencies=[Depends(require_admin)])
+async def get_stream_metrics():
+    """Connected new-post stream clients and events published/delivered by this worker"""
+    return event_hub.snapshot()
+
+
+@api_router.get("/admin/llm", dependencies=[Depends(require_admin)])
+async def get_llm_metrics():
+    """Call, cache, timeout and latency counters and circuit state of the shared LLM client"""
+    return recommendation_engine.llm.snapshot()
+
+
 # ============ Authentication Endpoints ============
 
 async def get_current_user_from_token(session_token: Optional[str] = None) -> Optional[dict]:
@@ -861,18 +1165,8 @@ async def get_current_user_from_token(session_token: Optional[str] = None) -> Op
         return None
     
     try:
-        # Find active session
-        session = await db.sessions.find_one({
-            "session_token": session_token,
-            "expires_at": {"$gt": datetime.now(timezone.utc).isoformat()}
-        })
-        
-        if not session:
-            return None
-        
-        # Get user data
-        user = await db.users.find_one({"id": session["user_id"]})
-        return user
+        # Cached per token; misses join sessions and users in one aggregation
+        return await session_cache.get_user(session_token)
     except Exception as e:
         logger.error(f"Error getting current user: {e}")
         return None
@@ -947,7 +1241,6 @@ async def google_callback_direct(code: str, response: Response):
         
         new_session = Session(user_id=user_id, session_token=session_token, expires_at=expires_at)
         session_dict = new_session.dict()
-        session_dict["expires_at"] = expires_at.isoformat()
         session_dict["created_at"] = new_session.created_at.isoformat()
         await db.sessions.insert_one(session_dict)
         
@@ -1032,7 +1325,6 @@ async def create_session(request: Request, response: Response, session_data: Ses
         )
         
         session_dict = new_session.dict()
-        session_dict["expires_at"] = expires_at.isoformat()
         session_dict["created_at"] = new_session.created_at.isoformat()
         
         await db.sessions.insert_one(session_dict)
@@ -1100,6 +1392,7 @@ async def logout(
     if session_token:
         # Delete session from database
         await db.sessions.delete_one({"session_token": session_token})
+        session_cache.invalidate_token(session_token)
     
     # Clear cookie
     response.delete_cookie(
@@ -1166,7 +1459,6 @@ async def facebook_callback(code: str, response: Response):
         
         new_session = Session(user_id=user_id, session_token=session_token, expires_at=expires_at)
         session_dict = new_session.dict()
-        session_dict["expires_at"] = expires_at.isoformat()
         session_dict["created_at"] = new_session.created_at.isoformat()
         await db.sessions.insert_one(session_dict)
         
@@ -1234,6 +1526,7 @@ async def update_user_profile(
         {"id": user["id"]},
         {"$set": update_data}
     )
+    await event_bus.publish(USER_UPDATED, {"user_id": user["id"], "fields": list(update_data)})
     
     # Get updated user
     updated_user = await db.users.find_one({"id": user["id"]})
@@ -1271,6 +1564,7 @@ async def toggle_favorite(
             {"id": user["id"]},
             {"$pull": {"favorite_posts": post_id}}
         )
+        await event_bus.publish(USER_UPDATED, {"user_id": user["id"], "fields": ["favorite_posts"]})
         
         # Log activity
         activity = ActivityItem(
@@ -1289,6 +1583,7 @@ async def toggle_favorite(
             {"id": user["id"]},
             {"$addToSet": {"favorite_posts": post_id}}
         )
+        await event_bus.publish(USER_UPDATED, {"user_id": user["id"], "fields": ["favorite_posts"]})
         
         # Log activity
         activity = ActivityItem(
@@ -1353,6 +1648,7 @@ async def update_user_preferences(
             "updated_at": datetime.now(timezone.utc).isoformat()
         }}
     )
+    await event_bus.publish(USER_UPDATED, {"user_id": user["id"], "fields": ["favorite_platforms", "updated_at"]})
     
     return {"success": True, "message": "Preferences updated"}
 
@@ -1468,7 +1764,7 @@ async def get_personalized_recommendations(
     session_token: Optional[str] = Cookie(None),
     limit: int = Query(20, description="Number of recommendations")
 ):
-    """Get AI-powered personalized recommendations for the user"""
+    """Get personalized recommendations for the user (embedding similarity, optional LLM re-rank)"""
     # Check if user is authenticated
     token = session_token or (request.headers.get("Authorization", "").replace("Bearer ", "") if request.headers.get("Authorization") else None)
     
@@ -1482,40 +1778,25 @@ async def get_personalized_recommendations(
         if user and user.get("favorite_posts"):
             query["id"] = {"$nin": user["favorite_posts"]}
         
-        available_posts = await db.posts.find(query).sort("createdAt", -1).limit(100).to_list(100)
-        
         if user:
-            # AI-powered recommendations for logged-in users
-            user_profile = {
-                "user_id": user["id"],
-                "favorite_platforms": user.get("favorite_platforms", []),
-                "favorite_posts": user.get("favorite_posts", []),
-                "recent_likes": [],  # Would get from activities collection
-                "preferred_categories": []  # Would analyze from saved posts
-            }
-            
-            # Get AI recommendations
-            recommended_ids = await recommendation_engine.get_recommendations(
-                user_profile,
-                [p for p in available_posts],
-                limit=limit
-            )
-            
-            # If AI returns recommendations, use them; otherwise fallback
-            if recommended_ids:
-                # Get posts in recommended order
-                id_to_post = {p["id"]: p for p in available_posts}
+            # Served from the precomputed list; a missing or stale one is rebuilt in the background
+            recommended_ids = await recommendation_cache.get(user["id"])
+            if recommended_ids is None:
+                recommendation_cache.schedule_refresh(user)
+            else:
+                favorites = set(user.get("favorite_posts", []))
+                recommended_ids = [pid for pid in recommended_ids if pid not in favorites][:limit]
+                posts = await db.posts.find({"id": {"$in": recommended_ids}}).to_list(len(recommended_ids))
+                id_to_post = {p["id"]: p for p in posts}
                 recommended_posts = [id_to_post[pid] for pid in recommended_ids if pid in id_to_post]
-                return [Post(**post) for post in recommended_posts]
-        
-        # Fallback: Trending algorithm for non-logged-in users or if AI fails
-        # Sort by engagement score (likes + comments * 2 + shares * 3)
-        for post in available_posts:
-            post["engagement_score"] = post["likes"] + (post["comments"] * 2) + (post["shares"] * 3)
+                if recommended_posts:
+                    return [Post(**post) for post in recommended_posts]
         
-        available_posts.sort(key=lambda x: x["engagement_score"], reverse=True)
+        # Fallback: Trending algorithm for non-logged-in users, users without history yet or stale lists
+        # Indexed sort on the materialized engagement score (likes + comments * 2 + shares * 3)
+        posts = await db.posts.find(query).sort([("engagement_score", -1), ("id", -1)]).limit(limit).to_list(limit)
         
-        return [Post(**post) for post in available_posts[:limit]]
+        return [Post(**post) for post in posts]
         
     except Exception as e:
         logger.error(f"Error generating recommendations: {e}")
@@ -1525,20 +1806,13 @@ async def get_personalized_recommendations(
 
 
 @api_router.get("/trending/topics")
-async def get_trending_topics(limit: int = Query(5, description="Number of topics")):
-    """Get AI-detected trending topics from recent posts"""
+async def get_trending_topics(
+    limit: int = Query(5, description="Number of topics"),
+    platform: Optional[str] = Query(None, description="Only topics trending on this platform")
+):
+    """Get trending topics detected incrementally from ingested posts"""
     try:
-        # Get recent high-engagement posts
-        posts = await db.posts.find().sort("createdAt", -1).limit(50).to_list(50)
-        
-        if not posts:
-            return []
-        
-        # Use AI to detect trends
-        topics = await recommendation_engine.detect_trending_topics([p for p in posts])
-        
-        return topics[:limit]
-        
+        return trend_detector.top(limit, platform=platform)
     except Exception as e:
         logger.error(f"Error detecting trending topics: {e}")
         return []
@@ -1547,57 +1821,34 @@ async def get_trending_topics(limit: int = Query(5, description="Number of topic
 # ============ Analytics Endpoints ============
 
 @api_router.get("/analytics/overview")
-async def get_analytics_overview():
+async def get_analytics_overview(request: Request):
     """Get overall platform analytics"""
+    async def produce():
+        return await compute_analytics_overview(), {}
+    
+    return await response_cache.respond(request, "posts", produce)
+
+
+async def compute_analytics_overview():
+    """Read the materialized overview (post, engagement and media totals)"""
     try:
-        total_posts = await db.posts.count_documents({})
-        
-        # Get platform breakdown
-        platform_pipeline = [
-            {"$group": {"_id": "$platform", "count": {"$sum": 1}}}
-        ]
-        platform_stats = await db.posts.aggregate(platform_pipeline).to_list(None)
-        
-        # Get category breakdown
-        category_pipeline = [
-            {"$group": {"_id": "$category", "count": {"$sum": 1}}}
-        ]
-        category_stats = await db.posts.aggregate(category_pipeline).to_list(None)
-        
-        # Get total engagement
-        total_likes = await db.posts.aggregate([
-            {"$group": {"_id": None, "total": {"$sum": "$likes"}}}
-        ]).to_list(1)
-        
-        total_comments = await db.posts.aggregate([
-            {"$group": {"_id": None, "total": {"$sum": "$comments"}}}
-        ]).to_list(1)
-        
-        total_shares = await db.posts.aggregate([
-            {"$group": {"_id": None, "total": {"$sum": "$shares"}}}
-        ]).to_list(1)
-        
-        # Get video count
-        video_count = await db.posts.count_documents({"media.type": "video"})
-        
-        return {
-            "total_posts": total_posts,
-            "total_videos": video_count,
-            "total_images": total_posts - video_count,
-            "total_likes": total_likes[0]["total"] if total_likes else 0,
-            "total_comments": total_comments[0]["total"] if total_comments else 0,
-            "total_shares": total_shares[0]["total"] if total_shares else 0,
-            "platforms": {stat["_id"]: stat["count"] for stat in platform_stats},
-            "categories": {stat["_id"]: stat["count"] for stat in category_stats}
-        }
+        return await analytics_snapshot.overview()
     except Exception as e:
         logger.error(f"Error getting analytics overview: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @api_router.get("/analytics/platforms")
-async def get_platform_analytics():
+async def get_platform_analytics(request: Request):
     """Get detailed platform performance metrics"""
+    async def produce():
+        return await compute_platform_analytics(), {}
+    
+    return await response_cache.respond(request, "posts", produce)
+
+
+async def compute_platform_analytics():
+    """Aggregate per-platform engagement metrics"""
     try:
         pipeline = [
             {
@@ -1637,37 +1888,81 @@ async def get_platform_analytics():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@api_router.get("/analytics/rising")
+async def get_rising_posts(
+    window: int = Query(60, ge=1, le=43200, description="Look-back window in minutes"),
+    platform: Optional[str] = Query(None, description="Filter by platform"),
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE, description="Number of posts")
+):
+    """Fastest rising posts: largest engagement growth within the window"""
+    try:
+        rising = await engagement_timeseries.rising_posts(timedelta(minutes=window), platform=platform, limit=limit)
+        if not rising:
+            return []
+        
+        # Resolve native ids back to stored posts (global copies, not personalized ones)
+        ids_by_platform = {}
+        for item in rising:
+            ids_by_platform.setdefault(item["platform"], []).append(item["native_id"])
+        posts = await db.posts.find({
+            "$or": [{f"{p}_id": {"$in": ids}} for p, ids in ids_by_platform.items()],
+            "user_specific": {"$exists": False}
+        }).to_list(None)
+        posts_by_key = {(post["platform"], post.get(f"{post['platform']}_id")): post for post in posts}
+        
+        return [
+            {
+                "post": Post(**posts_by_key[(item["platform"], item["native_id"])]),
+                "gained": item["gained"],
+                "score_per_hour": item["score_per_hour"]
+            }
+            for item in rising
+            if (item["platform"], item["native_id"]) in posts_by_key
+        ]
+    except Exception as e:
+        logger.error(f"Error getting rising posts: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@api_router.get("/analytics/platforms/velocity")
+async def get_platform_velocity(
+    window: int = Query(60, ge=1, le=43200, description="Look-back window in minutes")
+):
+    """Engagement gained per platform within the window"""
+    try:
+        return await engagement_timeseries.platform_velocity(timedelta(minutes=window))
+    except Exception as e:
+        logger.error(f"Error getting platform velocity: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @api_router.get("/analytics/export")
-async def export_analytics(format: str = Query("json", description="Export format: json or csv")):
+async def export_analytics(format: str = Query("json", description="Export format: json, csv, ndjson, parquet or arrow")):
     """Export analytics data"""
+    if format != "json":
+        try:
+            check_format(format)
+        except ExportFormatError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     try:
-        overview = await get_analytics_overview()
-        platforms = await get_platform_analytics()
+        overview = await compute_analytics_overview()
+        platforms = await compute_platform_analytics()
         
-        data = {
+        if format != "json":
+            # Per-platform stats as rows
+            fields = ["platform", "posts", "videos", "likes", "comments", "shares"]
+            return StreamingResponse(
+                stream_rows(iterate(platforms), fields, format),
+                media_type=MEDIA_TYPES[format],
+                headers={"Content-Disposition": f"attachment; filename=chyllapp_analytics.{format}"}
+            )
+        
+        return {
             "overview": overview,
             "platforms": platforms,
             "exported_at": datetime.now(timezone.utc).isoformat()
         }
-        
-        if format == "csv":
-            # Simple CSV export of platform stats
-            import io
-            import csv
-            
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=["platform", "posts", "videos", "likes", "comments", "shares"])
-            writer.writeheader()
-            writer.writerows(platforms)
-            
-            from fastapi.responses import StreamingResponse
-            return StreamingResponse(
-                iter([output.getvalue()]),
-                media_type="text/csv",
-                headers={"Content-Disposition": "attachment; filename=chyllapp_analytics.csv"}
-            )
-        else:
-            return data
             
     except Exception as e:
         logger.error(f"Error exporting analytics: {e}")
@@ -1996,6 +2291,10 @@ async def get_payment_status(
                     "updated_at": datetime.now(timezone.utc).isoformat()
                 }}
             )
+            await event_bus.publish(USER_UPDATED, {
+                "user_id": user["id"],
+                "fields": ["subscription_tier", "subscription_expires_at", "updated_at"]
+            })
             
             logger.info(f"User {user['id']} upgraded to premium")
         
@@ -2183,9 +2482,17 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    event_hub.close()
+    await job_scheduler.stop()
+    await event_bus.stop()
+    ingestion_engine.shutdown()
+    if counter_buffer:
+        await counter_buffer.stop()
+    await http_client.aclose()
     client.close()
\ No newline at end of file
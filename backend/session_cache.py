@@ -0,0 +1,98 @@
+import copy
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, Optional, Union
+
+from cachetools import TLRUCache
+
+logger = logging.getLogger(__name__)
+
+
+def _expires_in(expires_at: Union[datetime, str, None]) -> float:
+    """Seconds until a session expires (expires_at is a BSON date, or an ISO string on older sessions)"""
+    if isinstance(expires_at, str):
+        try:
+            expires_at = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
+        except ValueError:
+            return 0.0
+    if not isinstance(expires_at, datetime):
+        return 0.0
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return (expires_at - datetime.now(timezone.utc)).total_seconds()
+
+
+class SessionCache:
+    """Cache of authenticated users keyed on session token.
+
+    Misses resolve session and user in one $lookup aggregation. Entries live
+    for at most ``ttl`` seconds and never past the session's own expiry.
+    ``invalidate_user`` runs on every ``user.updated`` event of the event
+    bus and logout calls ``invalidate_token``; the short TTL bounds
+    staleness from any other writer.
+    """
+
+    def __init__(self, db, maxsize: Optional[int] = None, ttl: Optional[float] = None):
+        self.db = db
+        self.ttl = ttl or float(os.getenv('SESSION_CACHE_TTL', '60'))
+        self._entries = TLRUCache(
+            maxsize=maxsize or int(os.getenv('SESSION_CACHE_MAXSIZE', '10000')),
+            ttu=lambda token, value, now: now + value[1]
+        )
+        self.stats = {"hits": 0, "misses": 0}
+
+    async def _lookup(self, session_token: str) -> Optional[Dict]:
+        now = datetime.now(timezone.utc)
+        pipeline = [
+            {"$match": {
+                "session_token": session_token,
+                "$or": [
+                    {"expires_at": {"$gt": now}},
+                    {"expires_at": {"$gt": now.isoformat()}}
+                ]
+            }},
+            {"$limit": 1},
+            {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "id", "as": "user"}},
+            {"$unwind": "$user"},
+            {"$project": {"_id": 0, "user": 1, "expires_at": 1}}
+        ]
+        results = await self.db.sessions.aggregate(pipeline).to_list(1)
+        return results[0] if results else None
+
+    async def get_user(self, session_token: str) -> Optional[Dict]:
+        """
+        Resolve the user owning an active session
+
+        Args:
+            session_token: Session token from the cookie or Authorization header
+
+        Returns:
+            Copy of the user document, or None if the session is unknown or expired
+        """
+        cached = self._entries.get(session_token)
+        if cached is not None:
+            self.stats["hits"] += 1
+            return copy.deepcopy(cached[0])
+
+        self.stats["misses"] += 1
+        result = await self._lookup(session_token)
+        if not result:
+            return None
+
+        user = result["user"]
+        lifetime = min(self.ttl, _expires_in(result.get("expires_at")))
+        if lifetime > 0:
+            self._entries[session_token] = (user, lifetime)
+        return copy.deepcopy(user)
+
+    def invalidate_token(self, session_token: str):
+        """Forget a single session (logout)"""
+        self._entries.pop(session_token, None)
+
+    def invalidate_user(self, user_id: str):
+        """Forget every cached session of a user after their document changed"""
+        # A linear scan keeps no per-user bookkeeping to leak; updates are rare next to reads
+        stale = [token for token, (user, _) in self._entries.items() if user.get("id") == user_id]
+        for token in stale:
+            self._entries.pop(token, None)
@@ -1,22 +1,24 @@
-import requests
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
 import time
 
+from http_client import HttpClientPool, get_http_client
+
 logger = logging.getLogger(__name__)
 
 class SnapchatScraper:
     """Scraper for fetching trending content from Snapchat"""
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[HttpClientPool] = None):
+        self.http = http_client or get_http_client()
         self.client_id = os.getenv('SNAPCHAT_CLIENT_ID')
         self.client_secret = os.getenv('SNAPCHAT_CLIENT_SECRET')
         
         if not self.client_id or not self.client_secret:
             logger.warning("Snapchat API credentials not found in environment variables")
     
-    def fetch_trending_content(self, max_results: int = 50) -> List[Dict]:
+    async def fetch_trending_content(self, max_results: int = 50) -> List[Dict]:
         """
         Fetch trending content from Snapchat
         
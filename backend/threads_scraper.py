@@ -1,22 +1,24 @@
-import requests
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
 import time
 
+from http_client import HttpClientPool, get_http_client
+
 logger = logging.getLogger(__name__)
 
 class ThreadsScraper:
     """Scraper for fetching trending posts from Threads (Meta)"""
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[HttpClientPool] = None):
+        self.http = http_client or get_http_client()
         self.client_id = os.getenv('THREADS_CLIENT_ID')
         self.client_secret = os.getenv('THREADS_CLIENT_SECRET')
         
         if not self.client_id or not self.client_secret:
             logger.warning("Threads API credentials not found in environment variables")
     
-    def fetch_trending_posts(self, max_results: int = 50) -> List[Dict]:
+    async def fetch_trending_posts(self, max_results: int = 50) -> List[Dict]:
         """
         Fetch trending posts from Threads
         
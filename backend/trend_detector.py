@@ -0,0 +1,182 @@
+import logging
+import math
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from search_index import STOPWORDS, TOKEN_RE
+
+logger = logging.getLogger(__name__)
+
+# Terms tracked before the faintest ones are pruned
+MAX_TERMS = 50000
+# A topic needs at least this much recent (decayed) volume to be reported
+MIN_RECENT_COUNT = 2.0
+
+# Words too generic to be a topic on their own
+TOPIC_STOPWORDS = STOPWORDS | {
+    "just", "like", "get", "got", "new", "now", "one", "out", "all", "can", "not",
+    "but", "what", "when", "how", "who", "about", "more", "this", "they", "their",
+    "video", "post", "check", "watch", "today", "day", "time", "people", "via",
+}
+
+
+def _as_timestamp(moment: Union[datetime, str, None]) -> Optional[float]:
+    if isinstance(moment, str):
+        try:
+            moment = datetime.fromisoformat(moment.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if not isinstance(moment, datetime):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def extract_terms(text: Optional[str]) -> Set[str]:
+    """Hashtags plus word unigrams and bigrams (stopwords never start or end a bigram)"""
+    if not text:
+        return set()
+
+    terms = set()
+    words: List[Optional[str]] = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token.startswith("#") and len(token) > 2:
+            terms.add(token)
+            words.append(None)
+        elif token.isalpha():
+            words.append(token)
+        else:
+            words.append(None)
+
+    for index, word in enumerate(words):
+        if not word or word in TOPIC_STOPWORDS or len(word) < 4:
+            continue
+        terms.add(word)
+        following = words[index + 1] if index + 1 < len(words) else None
+        if following and following not in TOPIC_STOPWORDS and len(following) > 2:
+            terms.add(f"{word} {following}")
+    return terms
+
+
+class TrendDetector:
+    """Streaming trending-topic detector.
+
+    Every ingested post adds 1 to each of its terms in two exponentially
+    decaying counters: a short one (recent volume) and a long one (the
+    baseline). A topic is trending when its recent volume bursts above what
+    the baseline predicts; per-platform recent volumes give the breakdown.
+    Counters decay lazily, so observing a post and reading the top topics
+    never rescan history.
+    """
+
+    def __init__(self, short_half_life: Optional[float] = None, long_half_life: Optional[float] = None):
+        # Half-lives in seconds
+        self.short_half_life = short_half_life or float(os.getenv('TREND_SHORT_HALF_LIFE', '3600'))
+        self.long_half_life = long_half_life or float(os.getenv('TREND_LONG_HALF_LIFE', '86400'))
+        self.terms: Dict[str, Dict] = {}
+
+    def _decay(self, value: float, elapsed: float, half_life: float) -> float:
+        return value * math.pow(0.5, elapsed / half_life) if elapsed > 0 else value
+
+    def _advance(self, state: Dict, now: float):
+        """Bring a term's counters forward to ``now``"""
+        elapsed = now - state["t"]
+        if elapsed <= 0:
+            return
+        state["short"] = self._decay(state["short"], elapsed, self.short_half_life)
+        state["long"] = self._decay(state["long"], elapsed, self.long_half_life)
+        state["platforms"] = {
+            platform: self._decay(value, elapsed, self.short_half_life)
+            for platform, value in state["platforms"].items()
+        }
+        state["t"] = now
+
+    def observe(self, post: Dict, at: Optional[Union[datetime, str]] = None):
+        """
+        Count the terms of one post
+
+        Args:
+            post: Post document (content and platform are read)
+            at: When the post was seen; defaults to now. Older observations
+                contribute their already-decayed weight.
+        """
+        now = datetime.now(timezone.utc).timestamp()
+        seen_at = min(_as_timestamp(at) or now, now)
+        platform = post.get("platform") or "unknown"
+
+        for term in extract_terms(post.get("content")):
+            state = self.terms.get(term)
+            if state is None:
+                state = self.terms[term] = {"short": 0.0, "long": 0.0, "t": now, "platforms": {}}
+            self._advance(state, now)
+
+            age = now - seen_at
+            short_weight = self._decay(1.0, age, self.short_half_life)
+            state["short"] += short_weight
+            state["long"] += self._decay(1.0, age, self.long_half_life)
+            state["platforms"][platform] = state["platforms"].get(platform, 0.0) + short_weight
+
+        if len(self.terms) > MAX_TERMS:
+            self._prune(now)
+
+    def observe_many(self, posts: Iterable[Dict]):
+        for post in posts:
+            self.observe(post)
+
+    def _prune(self, now: float):
+        for state in self.terms.values():
+            self._advance(state, now)
+        keep = sorted(self.terms.items(), key=lambda item: item[1]["long"], reverse=True)[:MAX_TERMS * 3 // 4]
+        self.terms = dict(keep)
+
+    async def warm(self, collection, limit: int = 2000):
+        """Replay recent posts at their creation time so trends exist right after startup"""
+        projection = {"_id": 0, "content": 1, "platform": 1, "createdAt": 1}
+        posts = await collection.find({}, projection).sort("createdAt", -1).limit(limit).to_list(limit)
+        for post in posts:
+            self.observe(post, at=post.get("createdAt"))
+        logger.info(f"Trend detector warmed with {len(posts)} posts, {len(self.terms)} terms")
+
+    def burst_score(self, state: Dict) -> float:
+        """How far recent volume exceeds the baseline's expectation (in standard deviations)"""
+        expected = state["long"] * self.short_half_life / self.long_half_life
+        return (state["short"] - expected) / math.sqrt(expected + 1.0)
+
+    def top(self, limit: int = 5, platform: Optional[str] = None) -> List[Dict]:
+        """
+        Currently trending topics
+
+        Returns:
+            List of {topic, count, platforms, score}, strongest burst first
+        """
+        now = datetime.now(timezone.utc).timestamp()
+        candidates = []
+        for term, state in self.terms.items():
+            self._advance(state, now)
+            volume = state["platforms"].get(platform, 0.0) if platform else state["short"]
+            if volume < MIN_RECENT_COUNT:
+                continue
+            candidates.append((self.burst_score(state), term, state))
+
+        # On equal scores the phrase wins over its single words
+        candidates.sort(key=lambda item: (round(item[0], 6), len(item[1].split())), reverse=True)
+
+        topics, covered = [], set()
+        for score, term, state in candidates:
+            words = set(term.lstrip("#").split())
+            # Skip terms whose words are all part of stronger topics already listed
+            if words <= covered:
+                continue
+            covered |= words
+            platforms = sorted(state["platforms"].items(), key=lambda item: item[1], reverse=True)
+            topics.append({
+                "topic": term,
+                "count": round(state["short"]),
+                "platforms": [name for name, value in platforms if value >= 0.5],
+                "score": round(score, 2)
+            })
+            if len(topics) == limit:
+                break
+        return topics
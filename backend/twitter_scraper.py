@@ -1,9 +1,13 @@
-import requests
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
 import time
 
+import httpx
+
+from http_client import HttpClientPool, get_http_client
+from http_cache import not_modified
+
 logger = logging.getLogger(__name__)
 
 class TwitterScraper:
@@ -11,22 +15,22 @@ class TwitterScraper:
     
     BASE_URL = "https://api.twitter.com/2"
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[HttpClientPool] = None):
+        self.http = http_client or get_http_client()
         self.bearer_token = os.getenv('TWITTER_BEARER_TOKEN')
         self.api_key = os.getenv('TWITTER_API_KEY')
         self.api_secret = os.getenv('TWITTER_API_SECRET')
+        # Processed tweets per search query, reused while the results are unchanged
+        self._parsed: Dict[str, List[Dict]] = {}
         
         if not self.bearer_token:
             logger.warning("Twitter Bearer Token not found in environment variables")
         
-        self.session = requests.Session()
+        self.headers = {'User-Agent': 'ChyllApp v2.0'}
         if self.bearer_token:
-            self.session.headers.update({
-                'Authorization': f'Bearer {self.bearer_token}',
-                'User-Agent': 'ChyllApp v2.0'
-            })
+            self.headers['Authorization'] = f'Bearer {self.bearer_token}'
     
-    def fetch_trending_tweets(self, max_results: int = 50) -> List[Dict]:
+    async def fetch_trending_tweets(self, max_results: int = 50) -> List[Dict]:
         """
         Fetch trending tweets from Twitter
         
@@ -64,20 +68,20 @@ class TwitterScraper:
                 }
                 
                 logger.info(f"Fetching tweets for query: {query[:30]}...")
-                response = self.session.get(url, params=params, timeout=15)
+                response = await self.http.get(url, params=params, headers=self.headers, timeout=15)
                 
-                if response.status_code == 200:
+                if response.status_code == 200 and not_modified(response) and query in self._parsed:
+                    all_tweets.extend(self._parsed[query])
+                elif response.status_code == 200:
                     data = response.json()
                     tweets = self._process_tweets(data)
+                    self._parsed[query] = tweets
                     all_tweets.extend(tweets)
                 elif response.status_code == 429:
                     logger.warning("Twitter API rate limit reached")
                     break
                 else:
                     logger.error(f"Error fetching tweets: {response.status_code} - {response.text}")
-                
-                # Rate limiting
-                time.sleep(1)
             
             # Remove duplicates and sort by engagement
             unique_tweets = {t['twitter_id']: t for t in all_tweets}.values()
@@ -90,7 +94,7 @@ class TwitterScraper:
             logger.info(f"Successfully fetched {len(sorted_tweets)} unique tweets")
             return list(sorted_tweets)[:max_results]
             
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Error fetching tweets: {e}")
             return []
     
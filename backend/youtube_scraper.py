@@ -1,9 +1,13 @@
-import requests
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
 import time
 
+import httpx
+
+from http_client import HttpClientPool, get_http_client
+from http_cache import not_modified
+
 logger = logging.getLogger(__name__)
 
 class YouTubeScraper:
@@ -11,12 +15,15 @@ class YouTubeScraper:
     
     BASE_URL = "https://www.googleapis.com/youtube/v3"
     
-    def __init__(self):
+    def __init__(self, http_client: Optional[HttpClientPool] = None):
+        self.http = http_client or get_http_client()
         self.api_key = os.getenv('YOUTUBE_API_KEY')
+        # Transformed videos per chart URL, reused while the chart is unchanged (ETag)
+        self._parsed: Dict[str, List[Dict]] = {}
         if not self.api_key:
             logger.warning("YouTube API key not found in environment variables")
     
-    def fetch_trending_videos(self, max_results: int = 50, region_code: str = 'US') -> List[Dict]:
+    async def fetch_trending_videos(self, max_results: int = 50, region_code: str = 'US') -> List[Dict]:
         """
         Fetch trending videos from YouTube
         
@@ -42,9 +49,14 @@ class YouTubeScraper:
             }
             
             logger.info(f"Fetching trending videos from YouTube ({region_code})")
-            response = requests.get(url, params=params, timeout=15)
+            response = await self.http.get(url, params=params, timeout=15)
             response.raise_for_status()
             
+            chart_key = f"{region_code}:{params['maxResults']}"
+            if not_modified(response) and chart_key in self._parsed:
+                logger.info(f"YouTube trending chart ({region_code}) unchanged since last fetch")
+                return list(self._parsed[chart_key])
+            
             data = response.json()
             videos = []
             
@@ -53,14 +65,15 @@ class YouTubeScraper:
                 if video:
                     videos.append(video)
             
+            self._parsed[chart_key] = videos
             logger.info(f"Successfully fetched {len(videos)} videos from YouTube")
-            return videos
+            return list(videos)
             
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Error fetching YouTube videos: {e}")
             return []
     
-    def search_videos(self, query: str, max_results: int = 25) -> List[Dict]:
+    async def search_videos(self, query: str, max_results: int = 25) -> List[Dict]:
         """
         Search for videos on YouTube
         
@@ -87,7 +100,7 @@ class YouTubeScraper:
             }
             
             logger.info(f"Searching YouTube for: {query}")
-            response = requests.get(url, params=params, timeout=15)
+            response = await self.http.get(url, params=params, timeout=15)
             response.raise_for_status()
             
             data = response.json()
@@ -95,15 +108,15 @@ class YouTubeScraper:
             
             # Get full details for these videos
             if video_ids:
-                return self._get_video_details(video_ids)
+                return await self._get_video_details(video_ids)
             
             return []
             
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Error searching YouTube: {e}")
             return []
     
-    def _get_video_details(self, video_ids: List[str]) -> List[Dict]:
+    async def _get_video_details(self, video_ids: List[str]) -> List[Dict]:
         """Get detailed information for multiple videos"""
         try:
             url = f"{self.BASE_URL}/videos"
@@ -113,7 +126,7 @@ class YouTubeScraper:
                 'key': self.api_key
             }
             
-            response = requests.get(url, params=params, timeout=15)
+            response = await self.http.get(url, params=params, timeout=15)
             response.raise_for_status()
             
             data = response.json()
@@ -126,7 +139,7 @@ class YouTubeScraper:
             
             return videos
             
-        except requests.RequestException as e:
+        except (httpx.HTTPError, ValueError) as e:
             logger.error(f"Error getting YouTube video details: {e}")
             return []
     
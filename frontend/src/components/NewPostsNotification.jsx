@@ -1,7 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { RefreshCw } from 'lucide-react';
 import { Button } from './ui/button';
-import axios from 'axios';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 
@@ -10,32 +9,29 @@ const NewPostsNotification = ({ lastCheckTime, onRefresh }) => {
   const [showNotification, setShowNotification] = useState(false);
 
   useEffect(() => {
-    // Poll for new posts every 30 seconds
-    const checkForNewPosts = async () => {
-      if (!lastCheckTime) return;
+    // Counts restart whenever the feed was refreshed
+    setNewPostsCount(0);
+    setShowNotification(false);
+  }, [lastCheckTime]);
 
-      try {
-        const response = await axios.get(`${BACKEND_URL}/api/posts/new-count`, {
-          params: { since: lastCheckTime }
-        });
+  useEffect(() => {
+    // The server pushes new-post events; EventSource reconnects on its own
+    const source = new EventSource(`${BACKEND_URL}/api/posts/stream`);
 
-        if (response.data.has_new) {
-          setNewPostsCount(response.data.new_count);
-          setShowNotification(true);
-        }
-      } catch (error) {
-        console.error('Error checking for new posts:', error);
+    source.addEventListener('new_posts', (event) => {
+      const data = JSON.parse(event.data);
+      if (data.new_count > 0) {
+        setNewPostsCount((count) => count + data.new_count);
+        setShowNotification(true);
       }
-    };
-
-    // Initial check
-    checkForNewPosts();
+    });
 
-    // Set up polling interval (30 seconds)
-    const interval = setInterval(checkForNewPosts, 30000);
+    source.onerror = () => {
+      console.error('New posts stream interrupted, reconnecting...');
+    };
 
-    return () => clearInterval(interval);
-  }, [lastCheckTime]);
+    return () => source.close();
+  }, []);
 
   const handleRefresh = () => {
     setShowNotification(false);
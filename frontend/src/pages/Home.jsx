@@ -22,6 +22,7 @@ const Home = () => {
   const [showScrollTop, setShowScrollTop] = useState(false);
   const [page, setPage] = useState(0);
   const [hasMore, setHasMore] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loadingMore, setLoadingMore] = useState(false);
   const [activeFilters, setActiveFilters] = useState({
     platforms: [],
@@ -80,18 +81,24 @@ const Home = () => {
 
     window.addEventListener('scroll', handleScroll);
     return () => window.removeEventListener('scroll', handleScroll);
-  }, [loadingMore, hasMore, page]);
+  }, [loadingMore, hasMore, page, nextCursor]);
 
   const scrollToTop = () => {
     window.scrollTo({ top: 0, behavior: 'smooth' });
   };
 
-  const buildFilterParams = (skipValue = 0) => {
+  const buildFilterParams = (skipValue = 0, cursor = null) => {
     const params = {
       limit: POSTS_PER_PAGE,
-      skip: skipValue,
     };
 
+    // Keyset cursor from the previous page; skip is only a fallback for cached pages
+    if (cursor) {
+      params.cursor = cursor;
+    } else {
+      params.skip = skipValue;
+    }
+
     if (activeFilters.platforms.length > 0) {
       params.platform = activeFilters.platforms.join(',');
     }
@@ -127,6 +134,7 @@ const Home = () => {
           if (age < CACHE_DURATION) {
             console.log('Using cached posts data');
             setAllPosts(JSON.parse(cachedData));
+            setNextCursor(localStorage.getItem('chyllapp_posts_cursor'));
             setLoading(false);
             setPage(1);
             return;
@@ -137,17 +145,20 @@ const Home = () => {
       // Fetch from API with filters
       const params = buildFilterParams(0);
       const response = await axios.get(`${API}/posts`, { params });
+      const cursor = response.headers['x-next-cursor'] || null;
       setAllPosts(response.data);
+      setNextCursor(cursor);
       
       // Update cache only if no filters
       if (!hasActiveFilters) {
         localStorage.setItem('chyllapp_posts', JSON.stringify(response.data));
         localStorage.setItem('chyllapp_posts_time', Date.now().toString());
+        localStorage.setItem('chyllapp_posts_cursor', cursor || '');
       }
       
       setLoading(false);
       setPage(1);
-      setHasMore(response.data.length === POSTS_PER_PAGE);
+      setHasMore(Boolean(cursor));
     } catch (error) {
       console.error('Error fetching posts:', error);
       setLoading(false);
@@ -158,6 +169,7 @@ const Home = () => {
   useEffect(() => {
     setLoading(true);
     setPage(0);
+    setNextCursor(null);
     setAllPosts([]);
     fetchInitialPosts();
   }, [activeFilters]);
@@ -167,13 +179,15 @@ const Home = () => {
 
     setLoadingMore(true);
     try {
-      const params = buildFilterParams(page * POSTS_PER_PAGE);
+      const params = buildFilterParams(page * POSTS_PER_PAGE, nextCursor);
       const response = await axios.get(`${API}/posts`, { params });
+      const cursor = response.headers['x-next-cursor'] || null;
       
       if (response.data.length > 0) {
         setAllPosts(prev => [...prev, ...response.data]);
         setPage(prev => prev + 1);
-        setHasMore(response.data.length === POSTS_PER_PAGE);
+        setNextCursor(cursor);
+        setHasMore(Boolean(cursor));
         console.log(`Loaded ${response.data.length} more posts (page ${page + 1})`);
       } else {
         setHasMore(false);
@@ -210,6 +224,7 @@ const Home = () => {
   const handleRefreshPosts = () => {
     setLoading(true);
     setPage(0);
+    setNextCursor(null);
     setAllPosts([]);
     setLastCheckTime(new Date().toISOString());
     fetchInitialPosts();
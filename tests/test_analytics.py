@@ -0,0 +1,52 @@
+import asyncio
+from types import SimpleNamespace
+
+from analytics import SNAPSHOT_ID, AnalyticsSnapshot
+
+
+class SnapshotCollection:
+    """Collection double applying flat $inc updates to one stored document"""
+
+    def __init__(self):
+        self.document = {"_id": SNAPSHOT_ID, "total_posts": 0, "platforms": {}, "categories": {}}
+        self.updates = []
+
+    async def update_one(self, query, update):
+        self.updates.append(update)
+        for path, delta in update["$inc"].items():
+            target = self.document
+            *parents, leaf = path.split(".")
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[leaf] = target.get(leaf, 0) + delta
+
+    async def find_one(self, query, projection=None):
+        return {key: value for key, value in self.document.items() if key != "_id"}
+
+
+def make_snapshot():
+    snapshots = SnapshotCollection()
+    return AnalyticsSnapshot(SimpleNamespace(posts=None, analytics_snapshots=snapshots)), snapshots
+
+
+def test_breakdown_values_with_dots_and_dollars_stay_single_keys():
+    snapshot, snapshots = make_snapshot()
+    posts = [
+        {"platform": "reddit", "category": "web3.0", "likes": 4},
+        {"platform": "reddit", "category": "$money", "likes": 1},
+        {"platform": "x", "category": "100%.real"},
+    ]
+    asyncio.run(snapshot.record_inserted(posts))
+
+    for path in snapshots.updates[0]["$inc"]:
+        assert path.count(".") <= 1 and "$" not in path
+    overview = asyncio.run(snapshot.overview())
+    assert overview["categories"] == {"web3.0": 1, "$money": 1, "100%.real": 1}
+    assert overview["platforms"] == {"reddit": 2, "x": 1}
+    assert overview["total_likes"] == 5
+
+
+def test_counter_increments_apply_to_totals():
+    snapshot, snapshots = make_snapshot()
+    asyncio.run(snapshot.record_counter("shares", 3))
+    assert snapshots.updates == [{"$inc": {"total_shares": 3}}]
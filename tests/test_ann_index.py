@@ -0,0 +1,81 @@
+import asyncio
+import threading
+
+import numpy as np
+
+from ann_index import IVFIndex
+from embeddings import PostEmbedder
+
+
+def post(post_id: str, content: str) -> dict:
+    return {"id": post_id, "content": content, "platform": "reddit", "category": "viral", "user": {"name": "someone"}}
+
+
+def make_index(path) -> IVFIndex:
+    return IVFIndex(path=str(path), embedder=PostEmbedder(dim=32), nprobe=4, save_every=10)
+
+
+def test_saved_index_is_loaded_memory_mapped_by_another_process(tmp_path):
+    writer = make_index(tmp_path)
+    writer.add_many([post("a", "cats and dogs"), post("b", "stock market news")])
+    asyncio.run(writer.save())
+
+    reader = make_index(tmp_path)
+    assert reader.load()
+    assert reader.ids == ["a", "b"] and reader.tail == []
+    assert isinstance(reader.base, np.memmap)
+    np.testing.assert_allclose(reader.vector("b"), writer.vector("b"))
+    assert reader.search(reader.vector("a"), k=1)[0][0] == "a"
+
+
+def test_reload_picks_up_a_newer_save_and_keeps_unsaved_posts(tmp_path):
+    writer, reader = make_index(tmp_path), make_index(tmp_path)
+    writer.add(post("a", "cats and dogs"))
+    asyncio.run(writer.save())
+    reader.load()
+    assert not reader.reload_if_changed()
+
+    reader.add(post("local", "only ingested by the reader"))
+    writer.add(post("b", "stock market news"))
+    asyncio.run(writer.save())
+
+    assert reader.reload_if_changed()
+    assert reader.ids == ["a", "b", "local"]
+    assert reader.rows["local"] == 2 and len(reader.tail) == 1
+    assert not reader.reload_if_changed()
+
+
+def test_saves_leave_only_the_index_files(tmp_path):
+    index = make_index(tmp_path)
+    index.add(post("a", "cats and dogs"))
+    asyncio.run(index.save())
+    index.add(post("b", "stock market news"))
+    asyncio.run(index.save())
+
+    assert sorted(file.name for file in tmp_path.iterdir()) == [".lock", "ids.json", "vectors.npy"]
+
+
+def test_untrained_save_drops_lists_of_an_older_trained_save(tmp_path):
+    (tmp_path / "centroids.npy").write_bytes(b"stale")
+    (tmp_path / "assignments.npy").write_bytes(b"stale")
+    index = make_index(tmp_path)
+    index.add(post("a", "cats and dogs"))
+    asyncio.run(index.save())
+
+    assert not (tmp_path / "centroids.npy").exists()
+    assert make_index(tmp_path).load()
+
+
+def test_load_waits_for_a_save_holding_the_file_lock(tmp_path):
+    writer = make_index(tmp_path)
+    writer.add(post("a", "cats and dogs"))
+    asyncio.run(writer.save())
+
+    reader = make_index(tmp_path)
+    loaded = threading.Event()
+    with writer._file_lock(exclusive=True):
+        thread = threading.Thread(target=lambda: reader.load() and loaded.set())
+        thread.start()
+        assert not loaded.wait(0.1)
+    thread.join(timeout=5)
+    assert loaded.is_set()
@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+from counter_buffer import CounterBuffer
+
+
+class FlakyCollection:
+    """Collection double whose bulk_write fails a given number of times before succeeding"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.writes = []
+
+    async def bulk_write(self, operations, ordered=True):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("primary stepped down")
+        self.writes.append(operations)
+        return SimpleNamespace(modified_count=len(operations))
+
+
+def test_pending_deltas_accumulate_per_post_and_field():
+    buffer = CounterBuffer(FlakyCollection(), flush_interval=60)
+    buffer.add("p1", "likes")
+    assert buffer.add("p1", "likes", 2) == 3
+    assert buffer.pending_delta("p1", "likes") == 3
+    assert buffer.pending_delta("p1", "shares") == 0
+
+
+def test_failed_flush_requeues_deltas_for_the_next_flush():
+    collection = FlakyCollection(failures=1)
+    buffer = CounterBuffer(collection, flush_interval=60)
+    buffer.add("p1", "likes", 2)
+
+    assert asyncio.run(buffer.flush()) == 0
+    # Later increments merge with the requeued ones
+    buffer.add("p1", "likes")
+    assert buffer.pending_delta("p1", "likes") == 3
+
+    assert asyncio.run(buffer.flush()) == 1
+    (operation,) = collection.writes[0]
+    assert operation._doc[0]["$set"]["likes"] == {"$add": [{"$ifNull": ["$likes", 0]}, 3]}
+    assert not buffer.pending
+
+
+def test_on_flush_receives_the_written_per_field_totals():
+    flushed = []
+
+    async def on_flush(totals):
+        flushed.append(totals)
+
+    buffer = CounterBuffer(FlakyCollection(), flush_interval=60, on_flush=on_flush)
+    buffer.add("p1", "likes", 2)
+    buffer.add("p2", "likes")
+    buffer.add("p2", "shares")
+    asyncio.run(buffer.flush())
+    # Nothing pending: no write and no notification
+    asyncio.run(buffer.flush())
+
+    assert flushed == [{"likes": 3, "shares": 1}]
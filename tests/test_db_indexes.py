@@ -0,0 +1,35 @@
+from db_indexes import INDEX_REGISTRY, SCRAPED_PLATFORMS, _platform_id_indexes
+
+
+def test_platform_id_indexes_are_partial_and_unique():
+    indexes = {model.document["name"]: model.document for model in _platform_id_indexes()}
+    assert len(indexes) == len(SCRAPED_PLATFORMS)
+
+    for platform in SCRAPED_PLATFORMS:
+        document = indexes[f"posts_{platform}_id_unique"]
+        assert list(document["key"].items()) == [(f"{platform}_id", 1), ("user_specific", 1)]
+        assert document["unique"] is True
+        assert document["partialFilterExpression"] == {f"{platform}_id": {"$exists": True}}
+        # Sparse compound indexes would still cover posts of other platforms that have user_specific
+        assert "sparse" not in document
+
+
+def test_registry_index_names_are_unique_per_collection():
+    for collection_name, models in INDEX_REGISTRY.items():
+        names = [model.document["name"] for model in models]
+        assert len(names) == len(set(names)), collection_name
+
+
+def test_feed_indexes_end_with_id_for_keyset_pagination():
+    for model in INDEX_REGISTRY["posts"]:
+        keys = list(model.document["key"])
+        if model.document["name"].endswith("_id") and len(keys) > 1:
+            assert keys[-1] == "id", model.document["name"]
+
+
+def test_ttl_indexes_expire_at_the_stored_date():
+    for collection_name, models in INDEX_REGISTRY.items():
+        for model in models:
+            if "expireAfterSeconds" in model.document:
+                assert model.document["expireAfterSeconds"] == 0
+                assert list(model.document["key"]) == ["expires_at"], collection_name
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+from event_bus import POST_CREATED, POST_UPDATED, EventBus, _changed_fields
+
+NOW = datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def object_id(seconds_ago: float, counter: int = 0) -> ObjectId:
+    """ObjectId generated the given number of seconds before NOW"""
+    base = ObjectId.from_datetime(NOW - timedelta(seconds=seconds_ago)).binary
+    return ObjectId(base[:8] + counter.to_bytes(4, "big"))
+
+
+class Cursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction):
+        self.documents.sort(key=lambda document: document[key], reverse=direction < 0)
+        return self
+
+    async def to_list(self, length):
+        return self.documents
+
+
+class PostsCollection:
+    """Collection double supporting the _id range queries of the poller"""
+
+    def __init__(self):
+        self.documents = []
+
+    def insert(self, _id: ObjectId, post_id: str):
+        self.documents.append({"_id": _id, "id": post_id})
+
+    def find(self, query):
+        since = query.get("_id", {}).get("$gte")
+        return Cursor([document for document in self.documents if since is None or document["_id"] >= since])
+
+    async def find_one(self, query, projection=None, sort=None):
+        return max(self.documents, key=lambda document: document["_id"], default=None)
+
+
+class Database:
+    def __init__(self):
+        self.posts = PostsCollection()
+
+
+def make_bus():
+    bus = EventBus(Database(), mode="auto")
+    bus.mode = "poll"
+    received = []
+    bus.subscribe(POST_CREATED, lambda posts: received.append([post["id"] for post in posts]))
+    return bus, received
+
+
+def poll(bus: EventBus):
+    return [post["id"] for post in asyncio.run(bus._fetch_new_posts())]
+
+
+def test_poll_skips_existing_posts_then_returns_each_insert_once():
+    bus, _ = make_bus()
+    bus.db.posts.insert(object_id(600), "old")
+    bus.db.posts.insert(object_id(10), "recent")
+    # The first poll records what exists; the poller does not dispatch it
+    assert poll(bus) == ["recent"]
+
+    bus.db.posts.insert(object_id(5), "new")
+    assert poll(bus) == ["new"]
+    assert poll(bus) == []
+
+
+def test_poll_picks_up_inserts_that_become_visible_out_of_order():
+    bus, _ = make_bus()
+    bus.db.posts.insert(object_id(0), "first")
+    poll(bus)
+
+    bus.db.posts.insert(object_id(20, counter=1), "late")
+    bus.db.posts.insert(object_id(0, counter=2), "next")
+    assert poll(bus) == ["late", "next"]
+
+
+def test_poll_mode_leaves_post_created_to_the_poller():
+    bus, received = make_bus()
+    updates = []
+    bus.subscribe(POST_UPDATED, updates.append)
+
+    asyncio.run(bus.publish(POST_CREATED, [{"id": "p1"}]))
+    asyncio.run(bus.publish(POST_UPDATED, {"ids": ["p1"], "fields": ["likes"]}))
+
+    assert received == []
+    assert updates == [{"ids": ["p1"], "fields": ["likes"]}]
+
+
+def test_changed_fields_are_top_level_names():
+    change = {
+        "operationType": "update",
+        "updateDescription": {
+            "updatedFields": {"favorite_posts.3": "p9", "name": "x"},
+            "removedFields": ["avatar"],
+            "truncatedArrays": [{"field": "history", "newSize": 2}]
+        }
+    }
+    assert _changed_fields(change) == {"favorite_posts", "name", "avatar", "history"}
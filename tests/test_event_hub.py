@@ -0,0 +1,47 @@
+from event_hub import MAX_PENDING_IDS, EventHub
+
+
+def post(post_id: str, platform: str = "reddit", category: str = "viral", **extra) -> dict:
+    return {"id": post_id, "platform": platform, "category": category, **extra}
+
+
+def test_posts_are_matched_once_per_filter_group():
+    hub = EventHub(heartbeat=60)
+    everything, also_everything = hub.subscribe(), hub.subscribe()
+    reddit = hub.subscribe(platform="reddit")
+    youtube_news = hub.subscribe(platform="youtube", category="news")
+
+    hub.publish([post("a"), post("b", platform="youtube", category="news"), post("c", platform="youtube")])
+
+    assert len(hub.groups) == 3
+    assert everything.take()["platforms"] == also_everything.take()["platforms"] == {"reddit": 1, "youtube": 2}
+    assert reddit.take()["post_ids"] == ["a"]
+    assert youtube_news.take()["new_count"] == 1
+
+
+def test_slow_subscriber_gets_one_combined_event():
+    hub = EventHub(heartbeat=60)
+    subscriber = hub.subscribe()
+    for batch in range(30):
+        hub.publish([post(f"p{batch}")])
+
+    event = subscriber.take()
+    assert event["new_count"] == 30
+    assert event["post_ids"] == [f"p{batch}" for batch in range(30 - MAX_PENDING_IDS, 30)]
+    assert subscriber.take()["new_count"] == 0
+
+
+def test_personalized_posts_are_not_announced():
+    hub = EventHub(heartbeat=60)
+    subscriber = hub.subscribe()
+    hub.publish([post("mine", user_specific="user-1")])
+
+    assert not subscriber.wakeup.is_set()
+    assert subscriber.take() == {"new_count": 0, "post_ids": [], "platforms": {}}
+
+
+def test_unsubscribing_the_last_member_drops_the_group():
+    hub = EventHub(heartbeat=60)
+    subscriber = hub.subscribe(platform="reddit")
+    hub.unsubscribe(subscriber)
+    assert hub.groups == {} and len(hub) == 0
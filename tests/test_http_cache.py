@@ -0,0 +1,124 @@
+import asyncio
+
+import httpx
+import pytest
+
+from http_cache import CACHE_STATUS_HEADER, HttpResponseCache, _freshness, not_modified
+from http_client import HttpClientPool
+from rate_limiter import RateLimiter
+
+URL = "https://api.test/listing"
+
+
+@pytest.mark.parametrize("cache_control, expected", [
+    ("max-age=60", 60.0),
+    ("public, s-maxage=30", 30.0),
+    ("Max-Age=15, must-revalidate", 15.0),
+    ("no-cache, max-age=60", 0.0),
+    ("no-store", None),
+    ("private, no-store, max-age=60", None),
+    ("", 0.0),
+])
+def test_freshness(cache_control, expected):
+    assert _freshness(httpx.Headers({"cache-control": cache_control})) == expected
+
+
+def test_not_modified():
+    assert not_modified(httpx.Response(200, headers={CACHE_STATUS_HEADER: "hit"}))
+    assert not_modified(httpx.Response(200, headers={CACHE_STATUS_HEADER: "revalidated"}))
+    assert not not_modified(httpx.Response(200))
+
+
+class Upstream:
+    """Mock transport answering with a fixed body and honouring If-None-Match"""
+
+    def __init__(self, headers):
+        self.headers = headers
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if "etag" in self.headers and request.headers.get("if-none-match") == self.headers["etag"]:
+            return httpx.Response(304, headers={"etag": self.headers["etag"]})
+        return httpx.Response(200, headers=self.headers, content=b'{"items": [1, 2, 3]}')
+
+
+def make_pool(upstream: Upstream, cache: HttpResponseCache) -> HttpClientPool:
+    pool = HttpClientPool(rate_limiter=RateLimiter(limits={"api.test": (100.0, 100)}), response_cache=cache)
+    pool._client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    return pool
+
+
+def fetch_twice(pool: HttpClientPool, **kwargs):
+    async def run():
+        first = await pool.get(URL, **kwargs)
+        second = await pool.get(URL, **kwargs)
+        await pool.aclose()
+        return first, second
+    return asyncio.run(run())
+
+
+def test_fresh_entry_is_answered_without_a_request(tmp_path):
+    upstream = Upstream({"cache-control": "max-age=300", "content-type": "application/json"})
+    cache = HttpResponseCache(path=str(tmp_path))
+    first, second = fetch_twice(make_pool(upstream, cache), params={"limit": 5})
+
+    assert len(upstream.requests) == 1
+    assert not not_modified(first)
+    assert second.headers[CACHE_STATUS_HEADER] == "hit"
+    assert second.json() == {"items": [1, 2, 3]}
+    assert cache.stats["hits"] == 1
+    assert cache.stats["bytes_saved"] == len(first.content)
+
+
+def test_stale_entry_is_revalidated_and_304_reuses_the_body(tmp_path):
+    upstream = Upstream({"etag": '"v1"', "cache-control": "no-cache"})
+    cache = HttpResponseCache(path=str(tmp_path))
+    first, second = fetch_twice(make_pool(upstream, cache))
+
+    assert len(upstream.requests) == 2
+    assert upstream.requests[1].headers["if-none-match"] == '"v1"'
+    assert second.status_code == 200
+    assert second.headers[CACHE_STATUS_HEADER] == "revalidated"
+    assert second.content == first.content
+    assert cache.stats["revalidated"] == 1
+
+
+def test_uncacheable_responses_are_not_stored(tmp_path):
+    upstream = Upstream({"cache-control": "no-store", "etag": '"v1"'})
+    cache = HttpResponseCache(path=str(tmp_path))
+    fetch_twice(make_pool(upstream, cache))
+
+    assert len(upstream.requests) == 2
+    assert "if-none-match" not in upstream.requests[1].headers
+    assert cache.stats["stored"] == 0
+
+
+def test_query_string_is_kept_out_of_stored_metadata(tmp_path):
+    upstream = Upstream({"cache-control": "max-age=300"})
+    cache = HttpResponseCache(path=str(tmp_path))
+    fetch_twice(make_pool(upstream, cache), params={"api_key": "secret"})
+
+    (meta_file,) = tmp_path.glob("*.json")
+    assert "secret" not in meta_file.read_text()
+
+
+def test_disk_errors_fall_back_to_uncached_requests(tmp_path):
+    blocker = tmp_path / "not-a-directory"
+    blocker.write_text("")
+    upstream = Upstream({"cache-control": "max-age=300"})
+    cache = HttpResponseCache(path=str(blocker / "cache"))
+    first, second = fetch_twice(make_pool(upstream, cache))
+
+    assert first.status_code == second.status_code == 200
+    assert len(upstream.requests) == 2
+    # Both lookups and both stores failed
+    assert cache.stats["disk_errors"] == 4
+    assert cache.stats["stored"] == 0
+
+
+def test_writes_leave_no_temporary_files(tmp_path):
+    upstream = Upstream({"etag": '"v1"', "cache-control": "no-cache"})
+    fetch_twice(make_pool(upstream, HttpResponseCache(path=str(tmp_path))))
+
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".body", ".json"]
@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from job_scheduler import JobScheduler
+
+
+def matches(document, query) -> bool:
+    for field, condition in query.items():
+        value = document.get(field)
+        if isinstance(condition, dict):
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+            if "$lte" in condition and not (value is not None and value <= condition["$lte"]):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class JobsCollection:
+    """Collection double for scheduled_jobs with the filters and updates the scheduler uses"""
+
+    def __init__(self):
+        self.documents = {}
+
+    def _apply(self, document, update):
+        document.update(update.get("$set", {}))
+        for field, delta in update.get("$inc", {}).items():
+            document[field] = document.get(field, 0) + delta
+
+    async def update_one(self, query, update, upsert=False):
+        document = self.documents.get(query["_id"])
+        if document is None and upsert:
+            document = self.documents[query["_id"]] = {"_id": query["_id"], **update.get("$setOnInsert", {})}
+        elif document is None or not matches(document, query):
+            return
+        self._apply(document, update)
+
+    async def find_one_and_update(self, query, update, return_document=None):
+        document = self.documents.get(query["_id"])
+        if document is None or not matches(document, query):
+            return None
+        self._apply(document, update)
+        return dict(document)
+
+
+def scheduler(collection, owner: str, lease: float = 60) -> JobScheduler:
+    instance = JobScheduler(collection, tick=1, lease=lease)
+    instance.owner = owner
+    instance.register("scrape:reddit", lambda: {"fetched": 5}, interval=300, jitter=0)
+    return instance
+
+
+def due_job(collection, **fields):
+    now = datetime.now(timezone.utc)
+    collection.documents["scrape:reddit"] = {
+        "_id": "scrape:reddit", "paused": False, "next_run_at": now, "lease_owner": None, "lease_expires_at": now, **fields
+    }
+
+
+def claim(instance: JobScheduler) -> bool:
+    return asyncio.run(instance._claim(instance.jobs["scrape:reddit"]))
+
+
+def test_only_one_worker_claims_a_due_job():
+    collection = JobsCollection()
+    due_job(collection)
+    first, second = scheduler(collection, "worker-a"), scheduler(collection, "worker-b")
+
+    assert claim(first)
+    assert not claim(second)
+    assert collection.documents["scrape:reddit"]["lease_owner"] == "worker-a"
+
+
+def test_paused_and_not_yet_due_jobs_are_not_claimed():
+    collection = JobsCollection()
+    due_job(collection, paused=True)
+    assert not claim(scheduler(collection, "worker-a"))
+
+    due_job(collection, next_run_at=datetime.now(timezone.utc) + timedelta(minutes=5))
+    assert not claim(scheduler(collection, "worker-a"))
+
+
+def test_expired_lease_is_taken_over_and_the_old_owner_cannot_renew_or_release_it():
+    collection = JobsCollection()
+    due_job(collection)
+    stale, fresh = scheduler(collection, "worker-a", lease=0.03), scheduler(collection, "worker-b")
+    job = stale.jobs["scrape:reddit"]
+
+    assert claim(stale)
+    collection.documents["scrape:reddit"]["lease_expires_at"] -= timedelta(minutes=5)
+    assert claim(fresh)
+    taken_until = collection.documents["scrape:reddit"]["lease_expires_at"]
+
+    async def renew_briefly():
+        renewal = asyncio.create_task(stale._renew(job))
+        await asyncio.sleep(0.05)
+        renewal.cancel()
+    asyncio.run(renew_briefly())
+    asyncio.run(stale._execute(job))
+
+    document = collection.documents["scrape:reddit"]
+    assert document["lease_owner"] == "worker-b"
+    assert document["lease_expires_at"] == taken_until
+    assert "last_status" not in document
+
+
+def test_owner_renews_while_running_and_releases_after_the_run():
+    collection = JobsCollection()
+    due_job(collection)
+    owner = scheduler(collection, "worker-a", lease=0.03)
+    job = owner.jobs["scrape:reddit"]
+    assert claim(owner)
+    claimed_until = collection.documents["scrape:reddit"]["lease_expires_at"]
+
+    renewed = []
+
+    async def slow_run():
+        await asyncio.sleep(0.05)
+        renewed.append(collection.documents["scrape:reddit"]["lease_expires_at"] > claimed_until)
+        return {"fetched": 5}
+    job.func = slow_run
+    asyncio.run(owner._execute(job))
+
+    document = collection.documents["scrape:reddit"]
+    assert renewed == [True]
+    assert document["last_status"] == "ok"
+    assert document["last_result"] == {"fetched": 5}
+    assert document["run_count"] == 1
+    assert document["lease_owner"] is None
+    assert document["next_run_at"] >= document["lease_expires_at"] + timedelta(seconds=299)
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("emergentintegrations")
+
+import llm_client  # noqa: E402
+from llm_client import CircuitBreaker, LLMClient, LLMUnavailableError  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_client.time, "monotonic", fake)
+    return fake
+
+
+def test_circuit_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_half_open_lets_exactly_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock.now += 60
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # A failed trial re-opens the circuit for another full reset_timeout
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow() and breaker.allow()
+
+
+def test_released_trial_can_be_retried(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    clock.now += 60
+    assert breaker.allow()
+    breaker.release_trial()
+    assert breaker.allow()
+
+
+class ScriptedClient(LLMClient):
+    """Client whose provider call waits on a gate and then returns or raises"""
+
+    def __init__(self, outcome="text", **kwargs):
+        super().__init__(api_key="key", retries=0, **kwargs)
+        self.outcome = outcome
+        self.calls = 0
+        self.gate = None
+
+    async def _call(self, prompt, system_message, session_id, model):
+        self.calls += 1
+        await self.gate.wait()
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+def test_identical_prompts_in_flight_share_one_call_and_are_cached():
+    async def run():
+        client = ScriptedClient()
+        client.gate = asyncio.Event()
+        first = asyncio.create_task(client.complete("hi", "sys"))
+        second = asyncio.create_task(client.complete("hi", "sys"))
+        await asyncio.sleep(0)
+        client.gate.set()
+        results = await asyncio.gather(first, second)
+        return client, results, await client.complete("hi", "sys")
+
+    client, results, cached = asyncio.run(run())
+    assert results == ["text", "text"] and cached == "text"
+    assert client.calls == 1
+    assert client.stats["coalesced"] == 1 and client.stats["cache_hits"] == 1
+
+
+def test_cancelled_call_fails_waiters_and_frees_the_trial(clock):
+    async def run():
+        client = ScriptedClient()
+        client.gate = asyncio.Event()
+        client.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        client.breaker.record_failure()
+        clock.now += 60
+
+        owner = asyncio.create_task(client.complete("hi", "sys"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(client.complete("hi", "sys"))
+        await asyncio.sleep(0)
+        owner.cancel()
+        with pytest.raises(LLMUnavailableError):
+            await waiter
+        return client
+
+    client = asyncio.run(run())
+    assert client._in_flight == {}
+    # The cancelled trial proved nothing, so the next call may try again
+    assert client.breaker.allow()
+
+
+def test_provider_errors_count_towards_the_circuit():
+    async def run():
+        client = ScriptedClient(outcome=RuntimeError("boom"))
+        client.gate = asyncio.Event()
+        client.gate.set()
+        client.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        for _ in range(2):
+            with pytest.raises(LLMUnavailableError):
+                await client.complete("hi", "sys")
+        with pytest.raises(LLMUnavailableError, match="circuit is open"):
+            await client.complete("other", "sys")
+        return client
+
+    client = asyncio.run(run())
+    assert client.calls == 2 and client.stats["rejected"] == 1
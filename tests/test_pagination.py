@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from pagination import InvalidCursorError, decode_cursor, encode_cursor, keyset_sort
+
+
+def page_after(posts, cursor, sort_by):
+    """Apply the decoded keyset filter in Python, the way Mongo would"""
+    (older, tied) = decode_cursor(cursor, sort_by)["$or"]
+    field = next(iter(older))
+    bound = older[field]["$lt"]
+    return [
+        post for post in posts
+        if post[field] < bound or (post[field] == tied[field] and post["id"] < tied["id"]["$lt"])
+    ]
+
+
+def test_date_cursor_round_trips_the_sort_key_and_id():
+    last = {"id": "p2", "createdAt": datetime(2025, 3, 1, 12, 30)}
+    query = decode_cursor(encode_cursor("date", last), "date")
+
+    assert query == {"$or": [
+        {"createdAt": {"$lt": last["createdAt"]}},
+        {"createdAt": last["createdAt"], "id": {"$lt": "p2"}}
+    ]}
+
+
+def test_ties_on_the_sort_key_continue_on_id():
+    posts = [{"id": f"p{index}", "likes": likes} for index, likes in enumerate([5, 5, 5, 3])]
+    ordered = sorted(posts, key=lambda post: (post["likes"], post["id"]), reverse=True)
+
+    first_page = ordered[:2]
+    rest = page_after(ordered, encode_cursor("likes", first_page[-1]), "likes")
+
+    assert first_page + rest == ordered
+    assert keyset_sort("likes") == [("likes", -1), ("id", -1)]
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "e30", "eyJzIjoiZGF0ZSJ9"])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "date")
+
+
+def test_cursor_issued_for_another_sort_is_rejected():
+    cursor = encode_cursor("likes", {"id": "p1", "likes": 4})
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "date")
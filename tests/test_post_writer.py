@@ -0,0 +1,108 @@
+import asyncio
+from types import SimpleNamespace
+
+from post_writer import ENGAGEMENT_FIELDS, PostWriter
+
+
+class RecordingCollection:
+    """Collection double recording the bulk upserts it is sent; every upsert inserts"""
+
+    def __init__(self):
+        self.operations = []
+        self.updated_many = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.operations = operations
+        return SimpleNamespace(
+            upserted_count=len(operations),
+            matched_count=0,
+            modified_count=0,
+            upserted_ids={index: f"oid{index}" for index in range(len(operations))}
+        )
+
+    async def update_many(self, query, update):
+        self.updated_many.append(query)
+
+
+def scraped_post(native_id: str, likes: int = 10, **extra) -> dict:
+    return {
+        "reddit_id": native_id,
+        "platform": "reddit",
+        "platformColor": "#FF4500",
+        "user": {"name": "someone", "username": "u/someone", "avatar": "https://example.test/a.png"},
+        "content": f"post {native_id}",
+        "media": {"type": "image", "url": "https://example.test/i.png"},
+        "likes": likes,
+        "comments": 2,
+        "shares": 1,
+        "timestamp": "1h ago",
+        "category": "viral",
+        **extra
+    }
+
+
+def upsert(writer: PostWriter, posts, **kwargs):
+    return asyncio.run(writer.upsert_posts("reddit", posts, **kwargs))
+
+
+def test_shared_posts_are_keyed_on_native_id_without_user_specific():
+    collection = RecordingCollection()
+    upsert(PostWriter(collection), [scraped_post("abc")])
+
+    (operation,) = collection.operations
+    assert operation._filter == {"reddit_id": "abc", "user_specific": {"$exists": False}}
+    assert operation._upsert is True
+
+
+def test_personalized_posts_are_keyed_per_user():
+    collection = RecordingCollection()
+    upsert(PostWriter(collection), [scraped_post("abc", user_specific="stale")], user_specific="user-1")
+
+    (operation,) = collection.operations
+    assert operation._filter == {"reddit_id": "abc", "user_specific": "user-1"}
+    # The filter's equality fields are copied into the upserted document, so it is not set twice
+    assert "user_specific" not in operation._doc["$setOnInsert"]
+
+
+def test_counters_are_refreshed_and_everything_else_only_inserted():
+    collection = RecordingCollection()
+    upsert(PostWriter(collection), [scraped_post("abc", likes=7)])
+
+    (operation,) = collection.operations
+    update = operation._doc
+    assert set(update["$set"]) == set(ENGAGEMENT_FIELDS) | {"engagement_score"}
+    assert update["$set"]["likes"] == 7
+    assert update["$set"]["engagement_score"] == 7 + 2 * 2 + 1 * 3
+    for field in ENGAGEMENT_FIELDS + ("engagement_score", "reddit_id"):
+        assert field not in update["$setOnInsert"]
+    assert update["$setOnInsert"]["content"] == "post abc"
+
+
+def test_batch_is_deduplicated_and_posts_without_native_id_skipped():
+    collection = RecordingCollection()
+    counts = upsert(PostWriter(collection), [scraped_post("abc", likes=1), scraped_post("abc", likes=5), scraped_post(None)])
+
+    (operation,) = collection.operations
+    assert operation._doc["$set"]["likes"] == 5
+    assert counts == {"inserted": 1, "updated": 0, "unchanged": 0, "skipped": 1}
+
+
+def test_insert_listeners_receive_the_inserted_documents():
+    collection = RecordingCollection()
+    writer = PostWriter(collection)
+    received = []
+    writer.on_insert(received.extend)
+    upsert(writer, [scraped_post("abc"), scraped_post("def")])
+
+    assert [doc["reddit_id"] for doc in received] == ["abc", "def"]
+    assert all(doc["likes"] == 10 and "id" in doc for doc in received)
+
+
+def test_only_model_fields_native_id_and_source_link_are_stored():
+    collection = RecordingCollection()
+    upsert(PostWriter(collection), [scraped_post("abc", reddit_url="https://reddit.com/r/x/abc", raw={"$where": 1}, score=3)])
+
+    (operation,) = collection.operations
+    stored = operation._doc["$setOnInsert"]
+    assert stored["reddit_url"] == "https://reddit.com/r/x/abc"
+    assert "raw" not in stored and "score" not in stored
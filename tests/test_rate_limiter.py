@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter, TokenBucket, _quota_headers, parse_limits, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake)
+    return fake
+
+
+def test_token_bucket_allows_a_burst_then_paces(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    for _ in range(3):
+        assert bucket.delay() == 0.0
+        bucket.take()
+
+    assert bucket.delay() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.delay() == 0.0
+
+
+def test_token_bucket_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    bucket.take()
+    bucket.take()
+    clock.now += 60
+    bucket.delay()
+    assert bucket.tokens == 2
+
+
+def test_token_bucket_block_for_overrides_available_tokens(clock):
+    bucket = TokenBucket(rate=1.0, capacity=5)
+    bucket.block_for(10)
+    assert bucket.delay() == pytest.approx(10)
+    # A shorter block never shortens an existing one
+    bucket.block_for(2)
+    assert bucket.delay() == pytest.approx(10)
+    clock.now += 10
+    assert bucket.delay() == 0.0
+
+
+def test_budget_counts_burst_and_refill(clock):
+    limiter = RateLimiter(limits={"api.test": (0.5, 4)})
+    assert limiter.budget("api.test", 10) == 9
+    limiter._bucket("api.test").block_for(6)
+    assert limiter.budget("api.test", 10) == 6
+    assert limiter.budget("api.test", 5) == 0
+
+
+def test_parse_limits():
+    assert parse_limits("a.test=2/5, b.test=0.5,broken=x/1,noequals") == {"a.test": (2.0, 5.0), "b.test": (0.5, 1.0)}
+    assert parse_limits(None) == {}
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_parse_retry_after_http_date():
+    value = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=90), usegmt=True)
+    assert parse_retry_after(value) == pytest.approx(90, abs=2)
+    past = format_datetime(datetime.now(timezone.utc) - timedelta(seconds=90), usegmt=True)
+    assert parse_retry_after(past) == 0.0
+
+
+def test_quota_headers_variants():
+    headers = httpx.Headers({
+        "X-Ratelimit-Remaining": "42.0",
+        "x-ratelimit-used": "58",
+        "X-Rate-Limit-Reset": "300",
+        "RateLimit-Limit": "100",
+        "Content-Type": "application/json"
+    })
+    assert _quota_headers(headers) == {"remaining": 42.0, "used": 58.0, "reset": 300.0, "limit": 100.0}
+
+
+def test_quota_headers_skip_unparsable_values():
+    assert _quota_headers(httpx.Headers({"x-ratelimit-remaining": "n/a"})) == {}
+
+
+def test_observe_spreads_remaining_quota_and_blocks_when_exhausted(clock):
+    limiter = RateLimiter(limits={"api.test": (5.0, 10)})
+    bucket = limiter._bucket("api.test")
+
+    limiter.observe("api.test", httpx.Response(200, headers={"x-ratelimit-remaining": "10", "x-ratelimit-reset": "100"}))
+    assert bucket.rate == pytest.approx(0.1)
+
+    wait = limiter.observe("api.test", httpx.Response(429, headers={"retry-after": "30"}))
+    assert wait == 30.0
+    assert bucket.delay() == pytest.approx(30)
+    assert limiter.stats["api.test"]["throttled"] == 1
+
+
+def test_acquire_fails_fast_beyond_max_wait(clock):
+    limiter = RateLimiter(limits={"api.test": (1.0, 1)}, max_wait=5)
+    limiter._bucket("api.test").block_for(60)
+    with pytest.raises(rate_limiter.RateLimitedError):
+        asyncio.run(limiter.acquire("api.test"))
+    assert limiter.stats["api.test"]["rejected"] == 1
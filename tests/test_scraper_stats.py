@@ -0,0 +1,66 @@
+import asyncio
+
+from scraper_stats import FAILING_THRESHOLD, ScraperStats
+
+
+class Cursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, key, direction):
+        self.documents = sorted(self.documents, key=lambda document: document[key], reverse=direction < 0)
+        return self
+
+    async def to_list(self, length):
+        return self.documents
+
+
+class StatsCollection:
+    """Collection double holding the per-platform documents and recording updates"""
+
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+        self.updates = []
+
+    def find(self, query):
+        return Cursor(list(self.documents))
+
+    async def update_one(self, query, update, upsert=False):
+        self.updates.append((query, update, upsert))
+
+
+def test_writes_are_shared_increments_not_process_state():
+    collection = StatsCollection()
+    asyncio.run(ScraperStats(collection).record_write("reddit", {"inserted": 3, "updated": 2}))
+
+    ((query, update, upsert),) = collection.updates
+    assert query == {"_id": "reddit"} and upsert
+    assert update["$inc"] == {"posts": 3}
+    assert update["$set"]["last_updated"] == 2
+
+
+def test_fetch_outcomes_are_folded_in_server_side():
+    collection = StatsCollection()
+    result = {"status": "error", "error": "$bad", "items": 0, "duration": 1.5, "finished_at": "2026-01-01T00:00:00+00:00"}
+    asyncio.run(ScraperStats(collection).record_fetch("reddit", result))
+
+    ((_, [stage], upsert),) = collection.updates
+    fields = stage["$set"]
+    assert upsert
+    assert fields["failures"] == {"$add": [{"$ifNull": ["$failures", 0]}, 1]}
+    # Values are literals, so an error message is never read as a field path
+    assert fields["last_error"] == {"$literal": "$bad"}
+    assert "avg_items" not in fields
+
+
+def test_snapshot_fills_defaults_and_derives_health():
+    collection = StatsCollection([
+        {"_id": "twitter", "posts": 4, "last_status": "error", "consecutive_failures": FAILING_THRESHOLD},
+        {"_id": "reddit", "posts": 7, "last_status": "ok", "consecutive_failures": 0},
+        {"_id": "youtube", "posts": 2},
+    ])
+    snapshot = asyncio.run(ScraperStats(collection).snapshot())
+
+    assert list(snapshot) == ["reddit", "twitter", "youtube"]
+    assert [entry["health"] for entry in snapshot.values()] == ["ok", "failing", "unknown"]
+    assert snapshot["youtube"]["runs"] == 0